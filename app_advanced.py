@@ -1,9 +1,37 @@
+import inspect
+import os
+import typing
+import uuid
 import streamlit as st
 import pandas as pd
-import time
 import plotly.express as px
 from datetime import datetime
+from background_refresh import RefreshingValue
+from metrics import CACHE_LOOKUPS, QUOTES, STAGE_SECONDS, cache_hit_rate, start_metrics_server
+from history_db import COMPARISON, HISTORY, HistoryDB
+from quote_result import as_dict
 from scraper_advanced import YourMechanicAdvancedScraper
+from usage_log import UsageLog
+
+# Chu kỳ nạp lại danh mục dịch vụ và hãng xe ở nền (giây)
+CATALOG_REFRESH_SECONDS = int(os.environ.get("YOURMECHANIC_CATALOG_REFRESH", "3600"))
+
+# Số dòng mỗi trang của chi tiết dịch vụ, lịch sử và bảng so sánh
+DETAILS_PAGE_SIZE = 10
+HISTORY_PAGE_SIZE = 10
+COMPARISON_PAGE_SIZE = 50
+
+def _download_accepts_callable() -> bool:
+    """download_button nhận callable cho `data` (tạo nội dung khi bấm tải xuống)"""
+    try:
+        return "Callable" in str(typing.get_type_hints(st.download_button).get("data"))
+    except Exception:
+        return False
+
+# Expander có trạng thái (key/on_change, `.open`) và download_button nhận callable chỉ có ở Streamlit mới
+# (cần Python >= 3.10); bản cũ hơn (vd. image python:3.9) dựng nội dung mọi expander của trang và tạo CSV ngay
+STATEFUL_EXPANDER = "on_change" in inspect.signature(st.expander).parameters
+LAZY_DOWNLOAD = _download_accepts_callable()
 
 # Cấu hình trang
 st.set_page_config(
@@ -48,14 +76,60 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_shared_scraper():
+    """Scraper dùng chung cho mọi session trong process (chung cache, connection pool)"""
+    start_metrics_server()
+    return YourMechanicAdvancedScraper()
+
+@st.cache_resource
+def get_usage_log():
+    """Nhật ký tra giá dùng chung, là nguồn cho worker làm ấm cache (warmup.py)"""
+    return UsageLog()
+
+@st.cache_resource
+def get_history_db():
+    """Database lịch sử/so sánh dùng chung cho mọi người dùng (phân biệt theo user id)"""
+    return HistoryDB()
+
+def get_user_id():
+    """Id người dùng giữ trong query param `uid` (giữ nguyên khi refresh hoặc lưu bookmark)"""
+    user_id = st.query_params.get("uid")
+    if not user_id:
+        user_id = uuid.uuid4().hex
+        st.query_params["uid"] = user_id
+    return user_id
+
+@st.cache_resource
+def get_shared_catalog():
+    """Danh mục dịch vụ và hãng xe dùng chung, nạp lại bởi thread nền để rerun không chờ network.
+
+    Loader ném lỗi hoặc trả rỗng khi không lấy được dữ liệu (thread nền thử lại sau `retry_interval`);
+    danh mục dự phòng chỉ được trả về khi đọc, lúc chưa nạp thành công lần nào.
+    """
+    scraper = get_shared_scraper()
+    return {
+        "categories": RefreshingValue(
+            "categories",
+            scraper.fetch_service_categories,
+            fallback=scraper._get_updated_fallback_categories(),
+            interval=CATALOG_REFRESH_SECONDS
+        ).start(),
+        "makes": RefreshingValue(
+            "makes",
+            scraper.fetch_vehicle_makes,
+            fallback=scraper._get_fallback_makes(),
+            interval=CATALOG_REFRESH_SECONDS
+        ).start(),
+    }
+
 def init_session_state():
     """Khởi tạo session state"""
     if 'scraper' not in st.session_state:
-        st.session_state.scraper = YourMechanicAdvancedScraper()
-    if 'search_history' not in st.session_state:
-        st.session_state.search_history = []
-    if 'comparison_list' not in st.session_state:
-        st.session_state.comparison_list = []
+        st.session_state.scraper = get_shared_scraper()
+    # Lịch sử và danh sách so sánh nằm trong HistoryDB, session chỉ giữ user id
+    if 'user_id' not in st.session_state:
+        st.session_state.user_id = get_user_id()
 
 def display_header():
     """Hiển thị header"""
@@ -97,14 +171,8 @@ def sidebar_vehicle_info():
         help="Chọn năm sản xuất của xe"
     )
     
-    # Hãng xe
-    try:
-        car_makes = st.session_state.scraper.get_vehicle_makes()
-    except:
-        car_makes = [
-            "Toyota", "Honda", "Ford", "Chevrolet", "Nissan", "BMW", "Mercedes-Benz",
-            "Audi", "Volkswagen", "Hyundai", "Kia", "Mazda", "Subaru", "Lexus"
-        ]
+    # Hãng xe (cache dùng chung, nạp lại ở nền)
+    car_makes = get_shared_catalog()["makes"].get()
     
     selected_make = st.sidebar.selectbox("🏭 Hãng xe", car_makes)
     
@@ -142,11 +210,8 @@ def service_selection():
     """Giao diện chọn dịch vụ"""
     st.header("📋 Chọn dịch vụ cần báo giá")
     
-    # Lấy danh mục dịch vụ
-    try:
-        categories = st.session_state.scraper.get_service_categories_from_website()
-    except:
-        categories = st.session_state.scraper._get_fallback_categories()
+    # Lấy danh mục dịch vụ (cache dùng chung, nạp lại ở nền)
+    categories = get_shared_catalog()["categories"].get()
     
     # Tab cho các danh mục
     category_tabs = st.tabs(list(categories.keys()))
@@ -171,6 +236,161 @@ def service_selection():
     
     return selected_services
 
+def page_offset(total, page_size, key, label):
+    """Ô chọn trang (chỉ hiện khi nhiều hơn một trang), trả về offset của trang đang chọn"""
+    pages = (total + page_size - 1) // page_size
+    if pages <= 1:
+        return 0
+    page = st.number_input(label, min_value=1, max_value=pages, value=1, key=key)
+    return (min(page, pages) - 1) * page_size
+
+def detailed_csv(results):
+    """CSV chi tiết các báo giá (chỉ tạo khi người dùng bấm tải xuống)"""
+    detailed_csv_data = []
+    for result in results:
+        row = {
+            'Dịch vụ': result['service'],
+            'Giá thấp nhất': result['min_price'],
+            'Giá trung bình': result['avg_price'], 
+            'Giá cao nhất': result['max_price'],
+            'Thời gian': result['labor_time'],
+            'Nguồn': result['source']
+        }
+        
+        # Thêm thông tin chi tiết nếu có
+        if 'customer_rating' in result:
+            row['Đánh giá'] = result['customer_rating']['average_rating']
+            row['Số đánh giá'] = result['customer_rating']['total_reviews']
+        
+        if 'cost_breakdown' in result:
+            breakdown = result['cost_breakdown']
+            row['Chi phí thợ'] = breakdown['labor_cost']
+            row['Chi phí phụ tùng'] = breakdown['parts_cost']
+        
+        if 'warranty_info' in result:
+            row['Bảo hành phụ tùng'] = result['warranty_info']['parts_warranty']
+            row['Bảo hành thợ'] = result['warranty_info']['labor_warranty']
+        
+        detailed_csv_data.append(row)
+    
+    return pd.DataFrame(detailed_csv_data).to_csv(index=False)
+
+def service_details(result):
+    """Nội dung chi tiết của một dịch vụ (giá, đánh giá, bảo hành, thợ, lịch hẹn, phí)"""
+    # Thông tin cơ bản
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.markdown("### 💰 Giá cả")
+        st.info(f"**Thấp nhất:** ${result['min_price']:,}")
+        st.success(f"**Trung bình:** ${result['avg_price']:,}")
+        st.error(f"**Cao nhất:** ${result['max_price']:,}")
+        
+        # Hiển thị cost breakdown nếu có
+        if 'cost_breakdown' in result:
+            breakdown = result['cost_breakdown']
+            st.markdown("#### 📊 Phân tích chi phí")
+            st.write(f"💪 **Chi phí thợ:** ${breakdown['labor_cost']:,} ({breakdown['labor_hours']}h)")
+            st.write(f"🔧 **Chi phí phụ tùng:** ${breakdown['parts_cost']:,}")
+            st.write(f"🏪 **Vật tư xưởng:** ${breakdown['shop_supplies']:,}")
+            st.write(f"💸 **Thuế ước tính:** ${breakdown['taxes']:,}")
+    
+    with col2:
+        st.markdown("### ⭐ Đánh giá")
+        if 'customer_rating' in result:
+            rating = result['customer_rating']
+            st.metric("Điểm trung bình", f"{rating['average_rating']}/5.0 ⭐")
+            st.metric("Tổng đánh giá", f"{rating['total_reviews']:,} reviews")
+            
+            # Rating breakdown
+            st.markdown("#### 📊 Phân bố đánh giá")
+            for star, percent in rating['rating_breakdown'].items():
+                stars = star.replace('_', ' ').title()
+                st.write(f"{stars}: {percent}")
+        
+        st.markdown("### ⏱️ Thời gian")
+        st.info(f"**Ước tính:** {result.get('labor_time', 'N/A')}")
+        if 'availability' in result:
+            avail = result['availability']
+            st.write(f"**Thời gian hoàn thành:** {avail.get('estimated_duration', 'N/A')}")
+            if avail.get('same_day_available'):
+                st.success("✅ Có thể phục vụ trong ngày")
+    
+    with col3:
+        st.markdown("### 🛡️ Bảo hành")
+        if 'warranty_info' in result:
+            warranty = result['warranty_info']
+            st.success(f"**Phụ tùng:** {warranty['parts_warranty']}")
+            st.success(f"**Thợ làm:** {warranty['labor_warranty']}")
+            st.info(f"**Phạm vi:** {warranty['coverage']}")
+            st.write(f"📝 {warranty['details']}")
+        
+        st.markdown("### 👨‍🔧 Thông tin thợ")
+        if 'mechanic_info' in result:
+            mechanic = result['mechanic_info']
+            if mechanic['certified_mechanics']:
+                st.success("✅ Thợ được chứng nhận")
+            st.write(f"**Kinh nghiệm:** {mechanic['average_experience']}")
+            st.write(f"**Chứng chỉ:** {', '.join(mechanic['certifications'])}")
+            if mechanic['mobile_service']:
+                st.success("🚗 Dịch vụ tận nơi")
+    
+    # Mô tả dịch vụ
+    if 'service_description' in result:
+        st.markdown("### 📝 Mô tả dịch vụ")
+        st.write(result['service_description'])
+    
+    # Những gì được bao gồm
+    if 'whats_included' in result:
+        st.markdown("### ✅ Dịch vụ bao gồm")
+        for item in result['whats_included']:
+            st.write(item)
+    
+    # Thông tin lịch hẹn
+    if 'availability' in result:
+        avail = result['availability']
+        st.markdown("### 📅 Thông tin lịch hẹn")
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.write(f"**Giờ phục vụ:** {avail['service_hours']}")
+            st.write(f"**Thời gian đặt lịch:** {avail['typical_booking_time']}")
+            if avail['weekend_available']:
+                st.success("✅ Phục vụ cuối tuần")
+        
+        with col2:
+            if avail['same_day_available']:
+                st.success("✅ Phục vụ trong ngày")
+            if avail.get('emergency_service'):
+                st.warning("🚨 Dịch vụ khẩn cấp")
+            else:
+                st.info("ℹ️ Không có dịch vụ khẩn cấp")
+    
+    # Phí bổ sung
+    if 'additional_fees' in result:
+        fees = result['additional_fees']
+        st.markdown("### 💳 Phí bổ sung")
+        st.success(f"✅ {fees['note']}")
+        
+        fee_details = []
+        if fees['diagnostic_fee'] > 0:
+            fee_details.append(f"Phí chẩn đoán: ${fees['diagnostic_fee']}")
+        if fees['disposal_fee'] > 0:
+            fee_details.append(f"Phí xử lý môi trường: ${fees['disposal_fee']}")
+        if fees['travel_fee'] > 0:
+            fee_details.append(f"Phí đi lại: ${fees['travel_fee']}")
+        
+        if fee_details:
+            for detail in fee_details:
+                st.write(f"• {detail}")
+    
+    # Địa điểm phục vụ
+    if 'mechanic_info' in result and 'service_locations' in result['mechanic_info']:
+        st.markdown("### 📍 Địa điểm phục vụ")
+        locations = result['mechanic_info']['service_locations']
+        for location in locations:
+            st.write(f"• {location}")
+
 def price_analysis(results, vehicle_info):
     """Phân tích và hiển thị giá chi tiết"""
     if not results:
@@ -179,7 +399,7 @@ def price_analysis(results, vehicle_info):
     st.header("💰 Phân tích chi tiết dịch vụ")
     
     # Tạo DataFrame
-    df = pd.DataFrame(results)
+    df = pd.DataFrame([as_dict(result) for result in results])
     
     # Metrics tổng quan
     col1, col2, col3, col4 = st.columns(4)
@@ -231,122 +451,18 @@ def price_analysis(results, vehicle_info):
     # Chi tiết từng dịch vụ
     st.subheader("📋 Chi tiết từng dịch vụ")
     
-    for i, result in enumerate(results):
-        with st.expander(f"🔧 {result['service']} - ${result['avg_price']:,}", expanded=False):
-            
-            # Thông tin cơ bản
-            col1, col2, col3 = st.columns(3)
-            
-            with col1:
-                st.markdown("### 💰 Giá cả")
-                st.info(f"**Thấp nhất:** ${result['min_price']:,}")
-                st.success(f"**Trung bình:** ${result['avg_price']:,}")
-                st.error(f"**Cao nhất:** ${result['max_price']:,}")
-                
-                # Hiển thị cost breakdown nếu có
-                if 'cost_breakdown' in result:
-                    breakdown = result['cost_breakdown']
-                    st.markdown("#### 📊 Phân tích chi phí")
-                    st.write(f"💪 **Chi phí thợ:** ${breakdown['labor_cost']:,} ({breakdown['labor_hours']}h)")
-                    st.write(f"🔧 **Chi phí phụ tùng:** ${breakdown['parts_cost']:,}")
-                    st.write(f"🏪 **Vật tư xưởng:** ${breakdown['shop_supplies']:,}")
-                    st.write(f"💸 **Thuế ước tính:** ${breakdown['taxes']:,}")
-            
-            with col2:
-                st.markdown("### ⭐ Đánh giá")
-                if 'customer_rating' in result:
-                    rating = result['customer_rating']
-                    st.metric("Điểm trung bình", f"{rating['average_rating']}/5.0 ⭐")
-                    st.metric("Tổng đánh giá", f"{rating['total_reviews']:,} reviews")
-                    
-                    # Rating breakdown
-                    st.markdown("#### 📊 Phân bố đánh giá")
-                    for star, percent in rating['rating_breakdown'].items():
-                        stars = star.replace('_', ' ').title()
-                        st.write(f"{stars}: {percent}")
-                
-                st.markdown("### ⏱️ Thời gian")
-                st.info(f"**Ước tính:** {result.get('labor_time', 'N/A')}")
-                if 'availability' in result:
-                    avail = result['availability']
-                    st.write(f"**Thời gian hoàn thành:** {avail.get('estimated_duration', 'N/A')}")
-                    if avail.get('same_day_available'):
-                        st.success("✅ Có thể phục vụ trong ngày")
-            
-            with col3:
-                st.markdown("### 🛡️ Bảo hành")
-                if 'warranty_info' in result:
-                    warranty = result['warranty_info']
-                    st.success(f"**Phụ tùng:** {warranty['parts_warranty']}")
-                    st.success(f"**Thợ làm:** {warranty['labor_warranty']}")
-                    st.info(f"**Phạm vi:** {warranty['coverage']}")
-                    st.write(f"📝 {warranty['details']}")
-                
-                st.markdown("### 👨‍🔧 Thông tin thợ")
-                if 'mechanic_info' in result:
-                    mechanic = result['mechanic_info']
-                    if mechanic['certified_mechanics']:
-                        st.success("✅ Thợ được chứng nhận")
-                    st.write(f"**Kinh nghiệm:** {mechanic['average_experience']}")
-                    st.write(f"**Chứng chỉ:** {', '.join(mechanic['certifications'])}")
-                    if mechanic['mobile_service']:
-                        st.success("🚗 Dịch vụ tận nơi")
-            
-            # Mô tả dịch vụ
-            if 'service_description' in result:
-                st.markdown("### 📝 Mô tả dịch vụ")
-                st.write(result['service_description'])
-            
-            # Những gì được bao gồm
-            if 'whats_included' in result:
-                st.markdown("### ✅ Dịch vụ bao gồm")
-                for item in result['whats_included']:
-                    st.write(item)
-            
-            # Thông tin lịch hẹn
-            if 'availability' in result:
-                avail = result['availability']
-                st.markdown("### 📅 Thông tin lịch hẹn")
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    st.write(f"**Giờ phục vụ:** {avail['service_hours']}")
-                    st.write(f"**Thời gian đặt lịch:** {avail['typical_booking_time']}")
-                    if avail['weekend_available']:
-                        st.success("✅ Phục vụ cuối tuần")
-                
-                with col2:
-                    if avail['same_day_available']:
-                        st.success("✅ Phục vụ trong ngày")
-                    if avail.get('emergency_service'):
-                        st.warning("🚨 Dịch vụ khẩn cấp")
-                    else:
-                        st.info("ℹ️ Không có dịch vụ khẩn cấp")
-            
-            # Phí bổ sung
-            if 'additional_fees' in result:
-                fees = result['additional_fees']
-                st.markdown("### 💳 Phí bổ sung")
-                st.success(f"✅ {fees['note']}")
-                
-                fee_details = []
-                if fees['diagnostic_fee'] > 0:
-                    fee_details.append(f"Phí chẩn đoán: ${fees['diagnostic_fee']}")
-                if fees['disposal_fee'] > 0:
-                    fee_details.append(f"Phí xử lý môi trường: ${fees['disposal_fee']}")
-                if fees['travel_fee'] > 0:
-                    fee_details.append(f"Phí đi lại: ${fees['travel_fee']}")
-                
-                if fee_details:
-                    for detail in fee_details:
-                        st.write(f"• {detail}")
-            
-            # Địa điểm phục vụ
-            if 'mechanic_info' in result and 'service_locations' in result['mechanic_info']:
-                st.markdown("### 📍 Địa điểm phục vụ")
-                locations = result['mechanic_info']['service_locations']
-                for location in locations:
-                    st.write(f"• {location}")
+    # Chỉ dựng nội dung của dịch vụ đang mở, mỗi lần một trang
+    offset = page_offset(len(results), DETAILS_PAGE_SIZE, "details_page", f"Trang (tổng {len(results)} dịch vụ)")
+    for i, result in enumerate(results[offset:offset + DETAILS_PAGE_SIZE], start=offset):
+        label = f"🔧 {result['service']} - ${result['avg_price']:,}"
+        if STATEFUL_EXPANDER:
+            expander = st.expander(label, expanded=False, key=f"details_{i}_{result['service']}", on_change="rerun")
+            if not expander.open:
+                continue
+        else:
+            expander = st.expander(label, expanded=False)
+        with expander:
+            service_details(result)
     
     # Bảng tóm tắt
     st.subheader("📊 Bảng tóm tắt")
@@ -375,80 +491,104 @@ def price_analysis(results, vehicle_info):
     col1, col2, col3 = st.columns(3)
     with col1:
         if st.button("📋 Lưu vào lịch sử"):
-            st.session_state.search_history.append({
-                'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                'vehicle': f"{vehicle_info[0]} {vehicle_info[1]} {vehicle_info[2]}",
-                'services': len(results),
-                'total_cost': total_avg,
-                'results': results
-            })
+            get_history_db().add(st.session_state.user_id, results, HISTORY, *map(str, vehicle_info))
             st.success("✅ Đã lưu vào lịch sử!")
     
     with col2:
         if st.button("🔄 So sánh với tìm kiếm khác"):
-            st.session_state.comparison_list.extend(results)
+            get_history_db().add(st.session_state.user_id, results, COMPARISON, *map(str, vehicle_info))
             st.success("✅ Đã thêm vào danh sách so sánh!")
     
     with col3:
-        # Xuất CSV chi tiết
-        detailed_csv_data = []
-        for result in results:
-            row = {
-                'Dịch vụ': result['service'],
-                'Giá thấp nhất': result['min_price'],
-                'Giá trung bình': result['avg_price'], 
-                'Giá cao nhất': result['max_price'],
-                'Thời gian': result['labor_time'],
-                'Nguồn': result['source']
-            }
-            
-            # Thêm thông tin chi tiết nếu có
-            if 'customer_rating' in result:
-                row['Đánh giá'] = result['customer_rating']['average_rating']
-                row['Số đánh giá'] = result['customer_rating']['total_reviews']
-            
-            if 'cost_breakdown' in result:
-                breakdown = result['cost_breakdown']
-                row['Chi phí thợ'] = breakdown['labor_cost']
-                row['Chi phí phụ tùng'] = breakdown['parts_cost']
-            
-            if 'warranty_info' in result:
-                row['Bảo hành phụ tùng'] = result['warranty_info']['parts_warranty']
-                row['Bảo hành thợ'] = result['warranty_info']['labor_warranty']
-            
-            detailed_csv_data.append(row)
-        
-        detailed_csv_df = pd.DataFrame(detailed_csv_data)
-        csv = detailed_csv_df.to_csv(index=False)
+        # Xuất CSV chi tiết: nội dung chỉ được tạo khi bấm tải xuống
         st.download_button(
             label="📥 Tải xuống CSV chi tiết",
-            data=csv,
+            data=(lambda: detailed_csv(results)) if LAZY_DOWNLOAD else detailed_csv(results),
             file_name=f"yourmechanic_detailed_quotes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
             mime='text/csv'
         )
 
 def search_history():
     """Hiển thị lịch sử tìm kiếm"""
-    if not st.session_state.search_history:
+    db = get_history_db()
+    user_id = st.session_state.user_id
+    total = db.count_searches(user_id, HISTORY)
+    if not total:
         st.info("📝 Chưa có lịch sử tìm kiếm nào.")
         return
     
     st.header("📚 Lịch sử tìm kiếm")
     
-    for i, search in enumerate(reversed(st.session_state.search_history)):
-        with st.expander(f"🔍 {search['timestamp']} - {search['vehicle']} ({search['services']} dịch vụ)"):
+    # Chỉ đọc một trang lượt lưu từ database
+    offset = page_offset(total, HISTORY_PAGE_SIZE, "history_page", f"Trang (tổng {total} lượt lưu)")
+    searches = db.searches(user_id, HISTORY, limit=HISTORY_PAGE_SIZE, offset=offset)
+    for search in searches.itertuples(index=False):
+        timestamp = search.created_at.strftime("%Y-%m-%d %H:%M:%S")
+        with st.expander(f"🔍 {timestamp} - {search.vehicle} ({search.services} dịch vụ)"):
             col1, col2 = st.columns(2)
             with col1:
-                st.write(f"**Xe:** {search['vehicle']}")
-                st.write(f"**Số dịch vụ:** {search['services']}")
+                st.write(f"**Xe:** {search.vehicle}")
+                st.write(f"**Số dịch vụ:** {search.services}")
             with col2:
-                st.write(f"**Tổng chi phí TB:** ${search['total_cost']:,}")
+                st.write(f"**Tổng chi phí TB:** ${search.total_cost:,}")
                 
             # Hiển thị kết quả
-            if st.button(f"👁️ Xem chi tiết", key=f"view_{i}"):
-                df = pd.DataFrame(search['results'])
+            # Checkbox (không phải button) để phần chi tiết còn mở khi chọn dịch vụ bên dưới
+            if st.checkbox(f"👁️ Xem chi tiết", key=f"view_{search.id}"):
+                df = db.quotes(user_id, HISTORY, limit=search.services, search_id=search.id)
                 st.dataframe(df[['service', 'avg_price', 'labor_time']])
 
+                # Báo giá đầy đủ chỉ được đọc cho dịch vụ đang chọn
+                services = dict(zip(df['id'], df['service']))
+                quote_id = st.selectbox("Dịch vụ", list(services), format_func=services.get,
+                                        key=f"detail_{search.id}")
+                detail = db.detail(int(quote_id)) if quote_id is not None else None
+                if detail is not None:
+                    service_details(detail)
+    
+    # Xu hướng giá tính bằng GROUP BY trong database
+    st.subheader("📈 Xu hướng giá")
+    col1, col2 = st.columns(2)
+    with col1:
+        by = st.selectbox("Theo", ["service", "make"], format_func={"service": "Dịch vụ", "make": "Hãng xe"}.get)
+    with col2:
+        period = st.selectbox("Khoảng", ["day", "week", "month"],
+                              format_func={"day": "Ngày", "week": "Tuần", "month": "Tháng"}.get)
+    trend = db.price_trend(by, period, user_id=user_id, kind=HISTORY)
+    fig = px.line(trend, x='period', y='avg_price', color=by, markers=True, hover_data=['quotes'],
+                  title="Giá trung bình theo thời gian")
+    st.plotly_chart(fig, use_container_width=True)
+
+def debug_panel():
+    """Sidebar debug: tỉ lệ cache hit, nguồn báo giá và độ trễ từng giai đoạn trong process"""
+    with st.sidebar.expander("🛠️ Debug: hiệu năng"):
+        hit_rate = cache_hit_rate()
+        lookups = sum(CACHE_LOOKUPS.values().values())
+        st.metric("Cache hit rate", f"{hit_rate:.0%}" if hit_rate is not None else "—", help=f"{lookups:.0f} lượt tra")
+        
+        sources = QUOTES.values()
+        if sources:
+            st.markdown("**Nguồn báo giá**")
+            st.dataframe(
+                pd.DataFrame([{"source": source, "quotes": int(count)} for (source,), count in sources.items()]),
+                hide_index=True, use_container_width=True
+            )
+        
+        stages = STAGE_SECONDS.summary()
+        if stages:
+            st.markdown("**Độ trễ theo giai đoạn (ms)**")
+            rows = [
+                {
+                    "stage": stage,
+                    "count": int(s["count"]),
+                    "avg": round(s["avg"] * 1000, 1),
+                    "p50 ≤": round(s["p50"] * 1000, 1),
+                    "p95 ≤": round(s["p95"] * 1000, 1),
+                }
+                for (stage,), s in sorted(stages.items())
+            ]
+            st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+
 def main():
     """Hàm chính"""
     init_session_state()
@@ -457,6 +597,7 @@ def main():
     # Sidebar
     vehicle_info = sidebar_vehicle_info()
     selected_year, selected_make, selected_model, zip_code = vehicle_info
+    debug_panel()
     
     # Main tabs
     tab1, tab2, tab3 = st.tabs(["🔍 Tìm kiếm giá", "📊 So sánh", "📚 Lịch sử"])
@@ -471,47 +612,57 @@ def main():
                 st.warning("⚠️ Vui lòng chọn ít nhất một dịch vụ!")
             else:
                 with st.spinner("🔄 Đang tìm kiếm giá từ YourMechanic..."):
-                    results = []
+                    results_by_index = {}
                     progress_bar = st.progress(0)
-                    
-                    for i, service in enumerate(selected_services):
-                        try:
-                            pricing_info = st.session_state.scraper.search_service_pricing(
-                                service, zip_code, str(selected_year), selected_make, selected_model
-                            )
-                            results.append(pricing_info)
-                            progress_bar.progress((i + 1) / len(selected_services))
-                            time.sleep(0.3)  # Tránh quá tải server
-                        except Exception as e:
-                            st.error(f"❌ Lỗi khi lấy giá cho {service}: {str(e)}")
-                    
+
+                    # Tra giá song song, progress bar chạy theo từng dịch vụ hoàn thành thực tế
+                    batch = st.session_state.scraper.search_services_pricing_batch(
+                        selected_services, zip_code, str(selected_year), selected_make, selected_model
+                    )
+                    usage_log = get_usage_log()
+                    for done, (i, service, pricing_info) in enumerate(batch, start=1):
+                        results_by_index[i] = pricing_info
+                        usage_log.record(service, zip_code, str(selected_year), selected_make, selected_model)
+                        progress_bar.progress(done / len(selected_services))
+
+                    # Giữ thứ tự dịch vụ như người dùng đã chọn
+                    results = [results_by_index[i] for i in sorted(results_by_index)]
+
                     if results:
                         st.success(f"✅ Tìm thấy {len(results)} báo giá!")
-                        price_analysis(results, vehicle_info)
+                        st.session_state.last_quote = (results, vehicle_info)
+        
+        # Kết quả lần tra gần nhất vẫn hiển thị khi rerun (vd. sau khi bấm lưu/so sánh)
+        if st.session_state.get('last_quote'):
+            price_analysis(*st.session_state.last_quote)
     
     with tab2:
         st.header("🔄 So sánh giá dịch vụ")
-        if st.session_state.comparison_list:
-            df_compare = pd.DataFrame(st.session_state.comparison_list)
-            
-            # Biểu đồ so sánh
+        db = get_history_db()
+        user_id = st.session_state.user_id
+        total = db.count_quotes(user_id, COMPARISON)
+        if total:
+            # Biểu đồ so sánh: một điểm cho mỗi (dịch vụ, xe), tổng hợp trong database
+            summary = db.summary(("service", "vehicle"), user_id=user_id, kind=COMPARISON)
             fig = px.scatter(
-                df_compare,
+                summary,
                 x='service',
                 y='avg_price',
                 size='max_price',
                 color='vehicle',
                 title="So sánh giá trung bình các dịch vụ",
-                hover_data=['min_price', 'max_price', 'labor_time']
+                hover_data=['min_price', 'max_price', 'quotes']
             )
             fig.update_xaxes(tickangle=45)
             st.plotly_chart(fig, use_container_width=True)
             
-            # Bảng so sánh
+            # Bảng so sánh (từng trang)
+            offset = page_offset(total, COMPARISON_PAGE_SIZE, "comparison_page", f"Trang (tổng {total} báo giá)")
+            df_compare = db.quotes(user_id, COMPARISON, limit=COMPARISON_PAGE_SIZE, offset=offset)
             st.dataframe(df_compare[['service', 'vehicle', 'avg_price', 'labor_time']])
             
             if st.button("🗑️ Xóa danh sách so sánh"):
-                st.session_state.comparison_list = []
+                db.clear(user_id, COMPARISON)
                 st.rerun()
         else:
             st.info("📝 Chưa có dữ liệu để so sánh. Hãy thực hiện tìm kiếm và thêm vào so sánh.")
@@ -0,0 +1,333 @@
+import asyncio
+import logging
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp là tùy chọn, chỉ cần khi dùng backend async
+    aiohttp = None
+
+from extraction import page_fingerprint
+import metrics
+from quote_cache import QuoteCache
+from quote_result import QuoteResult
+from scraper_advanced import YourMechanicAdvancedScraper
+from service_catalog import ServiceCatalog
+from singleflight import AsyncSingleFlight
+from snapshot_store import SnapshotStore
+from tier_router import TierRouter
+
+logger = logging.getLogger(__name__)
+
+class AsyncYourMechanicScraper(YourMechanicAdvancedScraper):
+    """Backend asyncio: một event loop xử lý hàng trăm request đồng thời trên connection pool dùng chung.
+
+    Các hàm mạng là coroutine cùng tên với bản đồng bộ và trả về cùng format dict;
+    phần phân tích HTML và ước tính giá được kế thừa từ YourMechanicAdvancedScraper.
+    Phân tích HTML (BeautifulSoup, tốn CPU) và cache SQLite (I/O đồng bộ) chạy trên thread
+    qua `asyncio.to_thread` để không chặn các request khác trên event loop; trang tải về được
+    xếp hàng cho thread ghi nền của kho snapshot.
+    """
+
+    def __init__(self, max_connections: int = 100, per_host_limit: int = 16,
+                 timeout: float = 15, connect_timeout: float = 5, keepalive_timeout: float = 30,
+                 cache: Optional[QuoteCache] = None, catalog: Optional[ServiceCatalog] = None,
+                 parser: Optional[str] = None, snapshots: Optional[SnapshotStore] = None,
+                 router: Optional[TierRouter] = None):
+        if aiohttp is None:
+            raise ImportError("AsyncYourMechanicScraper cần aiohttp: pip install aiohttp")
+
+        super().__init__(per_host_limit=per_host_limit, cache=cache, catalog=catalog, parser=parser,
+                         snapshots=snapshots, router=router)
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.keepalive_timeout = keepalive_timeout
+        self._client = None
+        self._async_flights = AsyncSingleFlight()
+
+    async def __aenter__(self):
+        await self._get_client()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def _get_client(self) -> "aiohttp.ClientSession":
+        """Tạo ClientSession (lazy) với connection pool và keep-alive đã tinh chỉnh"""
+        if self._client is None or self._client.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.per_host_limit,
+                ttl_dns_cache=300,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self._client = aiohttp.ClientSession(
+                connector=connector,
+                headers=dict(self.session.headers),
+                timeout=aiohttp.ClientTimeout(total=self.timeout, sock_connect=self.connect_timeout),
+            )
+        return self._client
+
+    async def close(self):
+        """Đóng connection pool"""
+        if self._client is not None and not self._client.closed:
+            await self._client.close()
+        self._client = None
+
+    async def _fetch(self, method: str, url: str, timeout: Optional[float] = None, **kwargs) -> Tuple[int, bytes]:
+        """Gửi request, trả về (status, body)"""
+        client = await self._get_client()
+        if timeout is not None:
+            kwargs['timeout'] = aiohttp.ClientTimeout(total=timeout, sock_connect=self.connect_timeout)
+        try:
+            with metrics.span('http_request'):
+                async with client.request(method, url, **kwargs) as response:
+                    content = await response.read() if method != 'HEAD' else b''
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            metrics.HTTP_REQUESTS.inc(method=method, status='error')
+            raise
+        metrics.HTTP_REQUESTS.inc(method=method, status=response.status)
+        if method == 'GET' and response.status == 200:
+            # Chỉ xếp hàng: nén và ghi đĩa chạy trên thread ghi nền của kho
+            self.snapshots.submit(str(response.url), content, self._snapshot_kind(url))
+        return response.status, content
+
+    async def get_service_categories_from_website(self, conditional: bool = True) -> Dict[str, List[str]]:
+        """Lấy danh sách dịch vụ thực tế từ website theo cấu trúc mới"""
+        try:
+            categories = await self.fetch_service_categories(conditional=conditional)
+            return categories or self._get_updated_fallback_categories()
+        except Exception as e:
+            logger.error(f"Error fetching service categories: {e}")
+            return self._get_updated_fallback_categories()
+
+    async def fetch_service_categories(self, conditional: bool = True) -> Optional[Dict[str, List[str]]]:
+        """Danh mục dịch vụ từ website, không dùng dự phòng: lỗi mạng ném exception, None nếu trang không có danh mục.
+
+        Backend async luôn tải trang đầy đủ; `conditional` giữ cùng chữ ký với bản đồng bộ.
+        """
+        status, content = await self._fetch('GET', f"{self.base_url}/services", timeout=15, raise_for_status=True)
+        return await asyncio.to_thread(self._extract_service_categories, content)
+
+    async def refresh_catalog(self, save: bool = True) -> int:
+        """Crawl lại /services và sitemap để dựng chỉ mục dịch vụ, trả về số dịch vụ trong chỉ mục"""
+        # Trang /services: get_service_categories_from_website cập nhật chỉ mục từ cùng soup
+        # (tải lại toàn bộ, vì phản hồi 304 không có soup để cập nhật chỉ mục)
+        await self.get_service_categories_from_website(conditional=False)
+
+        # Sitemap (có thể là sitemap index trỏ tới các sitemap con)
+        pending = [f"{self.base_url}/sitemap.xml"]
+        visited = set()
+        while pending and len(visited) < 50:
+            sitemap_url = pending.pop(0)
+            if sitemap_url in visited:
+                continue
+            visited.add(sitemap_url)
+            try:
+                status, content = await self._fetch('GET', sitemap_url, timeout=15, raise_for_status=True)
+                children = await asyncio.to_thread(self.catalog.update_from_sitemap, content)
+                pending.extend(url for url in children if 'service' in url.lower())
+            except Exception as e:
+                logger.error(f"Error fetching sitemap {sitemap_url}: {e}")
+
+        self.catalog.mark_built()
+        if save and self.catalog.path:
+            await asyncio.to_thread(self.catalog.save)
+        return len(self.catalog)
+
+    async def get_vehicle_makes(self) -> List[str]:
+        """Lấy danh sách hãng xe từ website"""
+        try:
+            makes = await self.fetch_vehicle_makes()
+            if makes:
+                return makes
+        except Exception as e:
+            logger.error(f"Error fetching vehicle makes: {e}")
+
+        return self._get_fallback_makes()
+
+    async def fetch_vehicle_makes(self) -> List[str]:
+        """Hãng xe từ trang chính, không dùng dự phòng: lỗi mạng ném exception, rỗng nếu không tìm thấy"""
+        status, content = await self._fetch('GET', self.base_url, timeout=10, raise_for_status=True)
+        return await asyncio.to_thread(self._parse_vehicle_makes, content)
+
+    async def search_services_pricing_batch(self, services: List[str], zip_code: str = "10001",
+                                            year: str = "2020", make: str = "Toyota", model: str = "Camry",
+                                            max_workers: Optional[int] = None) -> AsyncIterator[Tuple[int, str, QuoteResult]]:
+        """Tra giá nhiều dịch vụ đồng thời, trả về (index, service, result) ngay khi từng dịch vụ xong"""
+        limit = asyncio.Semaphore(max_workers or self.max_connections)
+
+        async def run(i: int, service: str) -> Tuple[int, str, Dict]:
+            async with limit:
+                try:
+                    result = await self.search_service_pricing(service, zip_code, year, make, model)
+                except Exception as e:
+                    logger.error(f"Error getting pricing for {service}: {e}")
+                    result = self._get_estimated_pricing(service, year, make, model)
+                return i, service, result
+
+        tasks = [asyncio.ensure_future(run(i, service)) for i, service in enumerate(services)]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def search_service_pricing(self, service_name: str, zip_code: str = "10001",
+                                     year: str = "2020", make: str = "Toyota", model: str = "Camry") -> QuoteResult:
+        """Tìm kiếm giá dịch vụ thực tế từ website"""
+
+        with metrics.span('quote'):
+            cache_key = self.cache.make_key(service_name, zip_code, year, make, model)
+            with metrics.span('cache_lookup'):
+                result = await asyncio.to_thread(self.cache.get, cache_key)
+            metrics.CACHE_LOOKUPS.inc(result='miss' if result is None else 'hit')
+
+            if result is None:
+                result = await self._async_flights.do(
+                    ('quote', cache_key),
+                    lambda: self._lookup_service_pricing(cache_key, service_name, zip_code, year, make, model)
+                )
+
+        metrics.QUOTES.inc(source=result.get('source', 'unknown'))
+        return result
+
+    async def _lookup_service_pricing(self, cache_key: str, service_name: str, zip_code: str,
+                                      year: str, make: str, model: str) -> QuoteResult:
+        """Tra giá qua các nguồn theo thứ tự ưu tiên và lưu vào cache"""
+        try:
+            tiers = self.router.plan(service_name)
+
+            # Method 1: Thử tìm trang dịch vụ cụ thể
+            if 'service_page' in tiers:
+                with metrics.span('tier_service_page'):
+                    service_url = await self._find_service_page(service_name)
+                    pricing_info = None
+                    if service_url:
+                        pricing_info = await self._extract_pricing_from_service_page(
+                            service_url, zip_code, year, make, model
+                        )
+                await asyncio.to_thread(self.router.record, service_name, 'service_page', bool(pricing_info))
+                if pricing_info:
+                    await asyncio.to_thread(self.cache.set, cache_key, pricing_info)
+                    return pricing_info
+
+            # Method 2: Thử sử dụng quote API
+            if 'estimate_page' in tiers:
+                with metrics.span('tier_estimate_page'):
+                    quote_info = await self._get_quote_via_api(service_name, zip_code, year, make, model,
+                                                               fallback_service_page='service_page' in tiers)
+                await asyncio.to_thread(self._record_quote_source, service_name, quote_info)
+                if quote_info:
+                    await asyncio.to_thread(self.cache.set, cache_key, quote_info)
+                    return quote_info
+
+            # Method 3: Fallback - estimated pricing
+            with metrics.span('tier_estimated'):
+                estimated_pricing = self._get_estimated_pricing(service_name, year, make, model)
+            await asyncio.to_thread(self.cache.set, cache_key, estimated_pricing)
+            return estimated_pricing
+
+        except Exception as e:
+            logger.error(f"Error getting pricing for {service_name}: {e}")
+            return self._get_estimated_pricing(service_name, year, make, model)
+
+    async def _find_service_page(self, service_name: str) -> Optional[str]:
+        """Tìm URL trang dịch vụ cụ thể theo cấu trúc thực tế của YourMechanic"""
+        in_catalog, url = self._catalog_service_page(service_name)
+        if in_catalog:
+            return url
+
+        slug = self._service_slug(service_name)
+        found, url = self.resolver.cached(slug)
+        if found:
+            return url
+
+        return await self._async_flights.do(('resolve', slug), lambda: self._resolve_service_page(slug, service_name))
+
+    async def _resolve_service_page(self, slug: str, service_name: str) -> Optional[str]:
+        """Probe các URL ứng viên và ghi nhớ kết quả theo slug"""
+        # Probe song song mọi ứng viên, chọn ứng viên ưu tiên cao nhất trả về 200
+        candidates = list(dict.fromkeys(self._candidate_service_urls(service_name)))
+        tasks = [asyncio.ensure_future(self._probe_service_url(candidate)) for candidate in candidates]
+        url = None
+        inconclusive = False
+        try:
+            for candidate, task in zip(candidates, tasks):
+                ok = await task
+                if ok:
+                    url = candidate
+                    break
+                if ok is None:
+                    inconclusive = True
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        if url or not inconclusive:
+            self.resolver.remember(slug, url)
+        if url:
+            logger.info(f"Found service page: {url}")
+        else:
+            logger.warning(f"Could not find service page for: {service_name}")
+        return url
+
+    async def _probe_service_url(self, url: str) -> Optional[bool]:
+        """HEAD request kiểm tra URL có tồn tại, None nếu lỗi mạng"""
+        try:
+            status, _ = await self._async_flights.do(
+                ('HEAD', url), lambda: self._fetch('HEAD', url, timeout=10, allow_redirects=False)
+            )
+            return status == 200
+        except Exception as e:
+            logger.debug(f"Failed to check {url}: {e}")
+            return None
+
+    async def _extract_pricing_from_service_page(self, url: str, zip_code: str, year: str, make: str, model: str) -> Optional[Dict]:
+        """Trích xuất thông tin giá từ trang dịch vụ"""
+        try:
+            status, content = await self._async_flights.do(
+                ('GET', url), lambda: self._fetch('GET', url, timeout=15, raise_for_status=True)
+            )
+            return await asyncio.to_thread(self._parse_service_page, content, url, zip_code, year, make, model,
+                                           fingerprint=page_fingerprint(content))
+        except Exception as e:
+            logger.error(f"Error extracting pricing from {url}: {e}")
+
+        return None
+
+    async def _get_quote_via_api(self, service_name: str, zip_code: str, year: str, make: str, model: str,
+                                 fallback_service_page: bool = True) -> Optional[Dict]:
+        """Thử lấy báo giá qua trang estimate của YourMechanic"""
+        try:
+            params = self._estimate_request_params(service_name, zip_code, year, make, model)
+            status, content = await self._fetch('GET', f"{self.base_url}/estimate", timeout=15, params=params)
+
+            if status == 200:
+                estimate = await asyncio.to_thread(
+                    self._parse_estimate_page, content, service_name, zip_code, year, make, model
+                )
+                if estimate:
+                    return estimate
+
+            # Fallback: thử tìm pricing info từ service page
+            service_url = await self._find_service_page(service_name) if fallback_service_page else None
+            if service_url:
+                return await self._extract_pricing_from_service_page(
+                    service_url, zip_code, year, make, model
+                )
+
+        except Exception as e:
+            logger.error(f"Error getting quote via API/estimate: {e}")
+
+        return None
+
+    async def health_check(self) -> bool:
+        """Kiểm tra kết nối tới website"""
+        try:
+            status, _ = await self._fetch('GET', self.base_url, timeout=10)
+            return status == 200
+        except Exception:
+            return False
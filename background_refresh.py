@@ -0,0 +1,73 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+class RefreshingValue:
+    """Giá trị được nạp lại định kỳ bởi một thread nền.
+
+    `get()` luôn trả về ngay giá trị gần nhất (hoặc giá trị dự phòng khi chưa nạp xong),
+    nên người đọc không bao giờ phải chờ network.
+    """
+
+    def __init__(self, name: str, loader: Callable[[], Any], fallback: Any = None,
+                 interval: float = 3600, retry_interval: float = 60):
+        self.name = name
+        self.loader = loader
+        self.interval = interval
+        self.retry_interval = retry_interval
+
+        self._value = fallback
+        self._loaded_at = None
+        self._lock = threading.Lock()
+        self._loaded = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> "RefreshingValue":
+        """Chạy thread nền (nạp ngay lần đầu, sau đó theo chu kỳ)"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=f"refresh-{self.name}", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            delay = self.interval if self.refresh() else self.retry_interval
+            self._stop.wait(delay)
+
+    def refresh(self) -> bool:
+        """Nạp lại giá trị ngay (đồng bộ), trả về True nếu thành công"""
+        try:
+            value = self.loader()
+        except Exception as e:
+            logger.error(f"Error refreshing {self.name}: {e}")
+            return False
+        if not value:
+            return False
+        with self._lock:
+            self._value = value
+            self._loaded_at = time.time()
+        self._loaded.set()
+        return True
+
+    def get(self) -> Any:
+        """Giá trị hiện tại, không chờ"""
+        with self._lock:
+            return self._value
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Chờ lần nạp đầu tiên hoàn tất (tối đa timeout giây)"""
+        return self._loaded.wait(timeout)
+
+    @property
+    def age(self) -> Optional[float]:
+        """Số giây kể từ lần nạp thành công gần nhất"""
+        with self._lock:
+            return None if self._loaded_at is None else time.time() - self._loaded_at
@@ -0,0 +1 @@
+"""Benchmark offline cho các hot path của scraper (chạy: python -m benchmarks.<tên>)"""
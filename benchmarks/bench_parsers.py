@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+So sánh các backend phân tích HTML: thời gian parse, thời gian trích xuất, bộ nhớ đỉnh,
+và kết quả có giống hệt html.parser hay không.
+
+    python -m benchmarks.bench_parsers [--pages DIR] [--repeat N]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from benchmarks.sample_pages import load_pages
+from extraction import service_page_engine
+from html_parsers import DEFAULT_PARSER, available_parsers, make_soup
+from quote_cache import QuoteCache
+from scraper_advanced import YourMechanicAdvancedScraper
+from snapshot_store import SnapshotStore
+
+URL = "https://www.yourmechanic.com/services/oil-change"
+
+def measure(scraper, content: bytes, repeat: int) -> dict:
+    """Đo parse, trích xuất và bộ nhớ đỉnh cho một trang"""
+    parse_times, extract_times = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        soup = make_soup(content, scraper.parser)
+        parsed = time.perf_counter()
+        service_page_engine.run(soup)
+        parse_times.append(parsed - start)
+        extract_times.append(time.perf_counter() - parsed)
+
+    tracemalloc.start()
+    result = scraper._parse_service_page(content, URL, "10001", "2020", "Toyota", "Camry")
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "parse_ms": min(parse_times) * 1000,
+        "extract_ms": min(extract_times) * 1000,
+        "peak_kb": peak / 1024,
+        "result": result,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark HTML parser backends",
+        epilog="html.parser: mặc định, thuần Python; lxml: nhanh nhất; "
+               "html5lib: chậm nhất nhưng chịu lỗi tốt nhất với HTML hỏng",
+    )
+    parser.add_argument("--pages", help="Thư mục chứa trang HTML đã lưu (mặc định: trang tổng hợp)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages)
+    backends = available_parsers()
+    scrapers = {
+        name: YourMechanicAdvancedScraper(cache=QuoteCache(path=None), snapshots=SnapshotStore(root=None), parser=name)
+        for name in backends
+    }
+
+    print(f"{'page':<16}{'backend':<13}{'parse ms':>10}{'extract ms':>12}{'peak KB':>10}  identical")
+    for page_name, content in pages.items():
+        baseline = None
+        for name in backends:
+            stats = measure(scrapers[name], content, args.repeat)
+            if name == DEFAULT_PARSER:
+                baseline = stats["result"]
+            identical = "-" if baseline is None else ("yes" if stats["result"] == baseline else "NO")
+            print(f"{page_name:<16}{name:<13}{stats['parse_ms']:>10.1f}{stats['extract_ms']:>12.1f}"
+                  f"{stats['peak_kb']:>10.0f}  {identical}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark bộ quét giá so với cách cũ (find_all với regex dựng inline + re.findall cho từng text node).
+
+    python -m benchmarks.bench_price_scanner [--pages DIR] [--repeat N]
+"""
+
+import argparse
+import re
+import timeit
+
+from benchmarks.sample_pages import load_pages
+from extraction import price_engine
+from html_parsers import make_soup
+from price_scanner import scan_price_values, scan_prices
+
+def legacy_prices(soup) -> list:
+    """Cách trích xuất giá trước khi có price_scanner"""
+    prices = []
+    for element in soup.find_all(string=re.compile(r'\$\d+')):
+        for match in re.findall(r'\$(\d+(?:,\d{3})*(?:\.\d{2})?)', str(element)):
+            price = int(match.replace(',', '').split('.')[0])
+            if 20 <= price <= 5000:
+                prices.append(price)
+    return prices
+
+def legacy_text_prices(strings: list) -> list:
+    prices = []
+    for text in strings:
+        if re.search(r'\$\d+', text):
+            for match in re.findall(r'\$(\d+(?:,\d{3})*(?:\.\d{2})?)', text):
+                price = int(match.replace(',', '').split('.')[0])
+                if 20 <= price <= 5000:
+                    prices.append(price)
+    return prices
+
+def scanner_text_prices(strings: list) -> list:
+    prices = []
+    for text in strings:
+        prices.extend(scan_price_values(text))
+    return prices
+
+def best_ms(fn, repeat: int) -> float:
+    return min(timeit.repeat(fn, number=1, repeat=repeat)) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark price scanning")
+    parser.add_argument("--pages", help="Thư mục chứa trang HTML đã lưu (mặc định: trang tổng hợp)")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'page':<16}{'tree legacy':>13}{'tree scanner':>14}{'text legacy':>13}{'text scanner':>14}"
+          f"{'with context':>14}{'prices':>8}  same")
+    for name, content in load_pages(args.pages).items():
+        soup = make_soup(content)
+        strings = [str(s) for s in soup.find_all(string=True)]
+        full_text = "\n".join(strings)
+
+        legacy = legacy_prices(soup)
+        scanned = price_engine.run(soup)["prices"]
+        same = legacy == scanned == scanner_text_prices(strings) == [t.value for t in scan_prices(full_text)]
+
+        print(f"{name:<16}"
+              f"{best_ms(lambda: legacy_prices(soup), args.repeat):>13.2f}"
+              f"{best_ms(lambda: price_engine.run(soup), args.repeat):>14.2f}"
+              f"{best_ms(lambda: legacy_text_prices(strings), args.repeat):>13.2f}"
+              f"{best_ms(lambda: scanner_text_prices(strings), args.repeat):>14.2f}"
+              f"{best_ms(lambda: scan_prices(full_text), args.repeat):>14.2f}"
+              f"{len(scanned):>8}  {'yes' if same else 'NO'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Benchmark các hot path của scraper trên response phát lại (không cần network): server HTTP
+cục bộ hoặc session giả lập trả về trang small/medium/large. Báo cáo percentile độ trễ,
+throughput và bộ nhớ đỉnh; so với baseline đã lưu để chặn regression.
+
+    python -m benchmarks.bench_replay [--mode server|mock] [--pages DIR] [--repeat N]
+    python -m benchmarks.bench_replay --save-baseline bench_baseline.json
+    python -m benchmarks.bench_replay --baseline bench_baseline.json --tolerance 0.25
+"""
+
+import argparse
+import json
+import logging
+import sys
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlparse
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from benchmarks.sample_pages import load_pages
+from quote_cache import QuoteCache
+from rate_limiter import RateLimiter
+from scraper_advanced import YourMechanicAdvancedScraper
+from service_catalog import ServiceCatalog
+from snapshot_store import SnapshotStore
+from tier_router import TierRouter
+
+VEHICLE = ("10001", "2020", "Toyota", "Camry")
+
+def services_index_page(path: str = "sample_data.json") -> bytes:
+    """Trang /services dựng từ danh mục trong sample_data.json"""
+    with open(path, encoding="utf-8") as f:
+        categories = json.load(f)["categories"]
+    parts = ["<html><body>"]
+    for category, services in categories.items():
+        parts.append(f"<h2>{category}</h2><ul>")
+        for service in services:
+            slug = service.lower().replace(" ", "-").replace("/", "-")
+            parts.append(f"<li><a href='/services/{slug}'>{service}</a></li>")
+        parts.append("</ul>")
+    parts.append("</body></html>")
+    return "".join(parts).encode("utf-8")
+
+class ReplayRoutes:
+    """Bảng response phát lại: /services, /services/<trang>, /estimate?service=<trang>"""
+
+    def __init__(self, pages: Dict[str, bytes], default_page: str):
+        self.pages = pages
+        self.default_page = default_page
+        self.index = services_index_page()
+
+    def respond(self, method: str, path: str, query: Dict[str, List[str]]) -> Tuple[int, bytes]:
+        path = path.rstrip("/")
+        if path == "/services":
+            body = self.index
+        elif path.startswith("/services/"):
+            # Mọi slug đều tồn tại; slug trùng tên trang (small/medium/large) trả về đúng trang đó
+            body = self.pages.get(path.rsplit("/", 1)[1], self.pages[self.default_page])
+        elif path == "/estimate":
+            body = self.pages.get(query.get("service", [""])[0], self.pages[self.default_page])
+        else:
+            return 404, b""
+        return 200, b"" if method == "HEAD" else body
+
+class ReplaySession(requests.Session):
+    """Session giả lập: trả response từ ReplayRoutes, không mở socket"""
+
+    def __init__(self, routes: ReplayRoutes):
+        super().__init__()
+        self.routes = routes
+
+    def request(self, method, url, params=None, **kwargs):
+        if params:
+            url = f"{url}?{urlencode(params)}"
+        parsed = urlparse(url)
+        status, body = self.routes.respond(method, parsed.path, parse_qs(parsed.query))
+        response = requests.Response()
+        response.status_code = status
+        response._content = body
+        response.url = url
+        response.encoding = "utf-8"
+        response.headers = CaseInsensitiveDict({"Content-Type": "text/html", "Content-Length": str(len(body))})
+        return response
+
+def start_server(routes: ReplayRoutes) -> ThreadingHTTPServer:
+    """Server HTTP cục bộ phát lại routes trên một cổng ngẫu nhiên"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True  # Header và body ghi riêng: tránh trễ 40ms do Nagle + delayed ACK
+
+        def log_message(self, *args):
+            pass
+
+        def _reply(self):
+            parsed = urlparse(self.path)
+            status, body = routes.respond(self.command, parsed.path, parse_qs(parsed.query))
+            self.send_response(status)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(body)
+
+        do_GET = do_HEAD = _reply
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def make_scraper(mode: str, routes: ReplayRoutes, base_url: Optional[str]) -> YourMechanicAdvancedScraper:
+    """Scraper cô lập: cache chỉ trong bộ nhớ, chỉ mục rỗng, không lưu snapshot/thống kê tier, không giới hạn tốc độ"""
+    scraper = YourMechanicAdvancedScraper(
+        max_workers=16, per_host_limit=16,
+        cache=QuoteCache(path=None),
+        catalog=ServiceCatalog(path=""),
+        snapshots=SnapshotStore(root=None),
+        rate_limiter=RateLimiter(rate=1e9, burst=1e9, initial_concurrency=16, max_concurrency=16),
+        router=TierRouter(path=None),
+    )
+    if mode == "mock":
+        headers = scraper.session.headers
+        scraper.session = ReplaySession(routes)
+        scraper.session.headers = headers
+    else:
+        scraper.base_url = base_url
+    return scraper
+
+def reset(scraper: YourMechanicAdvancedScraper):
+    """Xóa mọi trạng thái ghi nhớ để mỗi lần đo là một lượt tra "lạnh"."""
+    scraper.cache.clear()
+    scraper.resolver.clear()
+    scraper.router.clear()
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))]
+
+def measure(fn: Callable[[], object], setup: Callable[[], None], repeat: int, ops: int = 1) -> Dict:
+    """Đo độ trễ từng lần gọi (đã trừ setup), throughput và bộ nhớ đỉnh của một lần gọi"""
+    setup()
+    fn()  # Làm nóng: import lazy, connection pool, regex cache
+    latencies = []
+    for _ in range(repeat):
+        setup()
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+
+    setup()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    total = sum(latencies)
+    return {
+        "calls": repeat,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p90_ms": percentile(latencies, 0.9) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "ops_per_s": repeat * ops / total if total else 0.0,
+        "peak_kb": peak / 1024,
+    }
+
+def run_suite(scraper: YourMechanicAdvancedScraper, page_names: List[str], batch_sizes: List[int],
+              repeat: int, batch_repeat: int) -> Dict[str, Dict]:
+    """Chạy mọi kịch bản, trả về {tên kịch bản: số đo}"""
+    zip_code, year, make, model = VEHICLE
+    no_setup = lambda: None
+    results = {}
+
+    # Trang /services nạp luôn chỉ mục dịch vụ; các kịch bản sau chọn rõ chỉ mục đầy hay rỗng
+    results["categories"] = measure(scraper.get_service_categories_from_website, no_setup, repeat)
+    results["find_service_page[catalog]"] = measure(
+        lambda: scraper._find_service_page("Brake Pad Replacement"), lambda: reset(scraper), repeat
+    )
+    scraper.catalog = ServiceCatalog(path="")
+    results["find_service_page[probe]"] = measure(
+        lambda: scraper._find_service_page("Brake Pad Replacement"), lambda: reset(scraper), repeat
+    )
+    for name in page_names:
+        url = f"{scraper.base_url}/services/{name}"
+        results[f"service_page[{name}]"] = measure(
+            lambda: scraper._extract_pricing_from_service_page(url, zip_code, year, make, model),
+            lambda: reset(scraper), repeat
+        )
+        results[f"quote_api[{name}]"] = measure(
+            lambda: scraper._get_quote_via_api(name, zip_code, year, make, model), lambda: reset(scraper), repeat
+        )
+    results["estimated_pricing"] = measure(
+        lambda: scraper._get_estimated_pricing("Brake Pad Replacement", year, make, model), no_setup, repeat
+    )
+    for size in batch_sizes:
+        services = [f"Service {i} Replacement" for i in range(size)]
+        results[f"batch[{size}]"] = measure(
+            lambda: list(scraper.search_services_pricing_batch(services, zip_code, year, make, model)),
+            lambda: reset(scraper), batch_repeat, ops=size
+        )
+    return results
+
+def print_results(results: Dict[str, Dict]):
+    print(f"{'scenario':<28}{'calls':>6}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'ops/s':>11}{'peak KB':>10}")
+    for name, r in results.items():
+        print(f"{name:<28}{r['calls']:>6}{r['p50_ms']:>10.2f}{r['p90_ms']:>10.2f}{r['p99_ms']:>10.2f}"
+              f"{r['ops_per_s']:>11.1f}{r['peak_kb']:>10.1f}")
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    """Các kịch bản có p50 hoặc bộ nhớ đỉnh vượt baseline quá `tolerance`"""
+    regressions = []
+    for name, r in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for metric in ("p50_ms", "peak_kb"):
+            if base.get(metric) and r[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f"{name}: {metric} {base[metric]:.2f} -> {r[metric]:.2f}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay benchmark for the scraper hot paths")
+    parser.add_argument("--mode", choices=["server", "mock"], default="server",
+                        help="server: HTTP cục bộ qua socket; mock: session giả lập, chỉ đo CPU")
+    parser.add_argument("--pages", help="Thư mục chứa trang HTML đã lưu (mặc định: trang tổng hợp)")
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--batch-repeat", type=int, default=5)
+    parser.add_argument("--save-baseline", help="Lưu kết quả làm baseline (JSON)")
+    parser.add_argument("--baseline", help="So với baseline, thoát mã 1 nếu có regression")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Mức chậm hơn cho phép so với baseline")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.ERROR)
+
+    pages = load_pages(args.pages)
+    page_names = list(pages)
+    routes = ReplayRoutes(pages, default_page=page_names[len(page_names) // 2])
+    server = start_server(routes) if args.mode == "server" else None
+    base_url = f"http://127.0.0.1:{server.server_address[1]}" if server else None
+
+    try:
+        scraper = make_scraper(args.mode, routes, base_url)
+        results = run_suite(scraper, page_names, args.batch_sizes, args.repeat, args.batch_repeat)
+    finally:
+        if server:
+            server.shutdown()
+
+    print_results(results)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({"mode": args.mode, "results": results}, f, indent=2)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("mode") != args.mode:
+            print(f"⚠️ Baseline was recorded in {baseline.get('mode')} mode, current run is {args.mode}")
+        regressions = compare(results, baseline["results"], args.tolerance)
+        if regressions:
+            print("Regressions:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("No regressions")
+
+if __name__ == "__main__":
+    main()
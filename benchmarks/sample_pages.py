@@ -0,0 +1,46 @@
+"""
+Nguồn trang HTML cho benchmark: trang đã lưu trong một thư mục, hoặc trang tổng hợp
+mô phỏng cấu trúc trang dịch vụ YourMechanic theo kích thước small/medium/large.
+"""
+
+import os
+import random
+from typing import Dict, Optional
+
+# Số section trong trang tổng hợp theo kích thước
+PAGE_SIZES = {"small": 5, "medium": 80, "large": 800}
+
+def synthetic_service_page(sections: int, seed: int = 0) -> bytes:
+    """Trang dịch vụ tổng hợp: giá, đoạn mô tả, danh sách, đánh giá, script và comment"""
+    rng = random.Random(seed)
+    parts = [
+        "<!DOCTYPE html><html><head><title>Oil Change</title>",
+        "<script>var promo = '$45 off';</script><style>.price{color:red}</style></head><body>",
+        "<!-- cached price $99 -->",
+    ]
+    for i in range(sections):
+        lead_class = rng.choice(["description", "text", "overview lead", "content"])
+        lorem = "Lorem ipsum dolor sit amet " * rng.randint(1, 4)
+        parts.append(
+            f"<div class='section about-block s{i}'>"
+            f"<p class='{lead_class}'>{lorem} costs ${rng.randint(10, 6000):,}.{rng.randint(10, 99)} "
+            f"or ${rng.randint(20, 900)}</p>"
+            f"<ul><li>{rng.choice(['Includes', 'Service', 'Repair', 'Replacement', 'Other'])} item {i} details</li>"
+            f"<li>Short</li><li><a href='/services/item-{i}-replacement'>Item {i} replacement service</a></li></ul>"
+            f"<span class='rating-value'>4.{rng.randint(0, 9)}</span>"
+            f"<p>Price from ${rng.randint(20, 5000)} to ${rng.randint(1000, 9000)}</p></div>"
+        )
+    parts.append("</body></html>")
+    return "".join(parts).encode("utf-8")
+
+def load_pages(directory: Optional[str] = None) -> Dict[str, bytes]:
+    """Đọc mọi file .html trong thư mục; nếu không có thì sinh trang tổng hợp"""
+    pages = {}
+    if directory and os.path.isdir(directory):
+        for name in sorted(os.listdir(directory)):
+            if name.endswith((".html", ".htm")):
+                with open(os.path.join(directory, name), "rb") as f:
+                    pages[name] = f.read()
+    if not pages:
+        pages = {size: synthetic_service_page(sections, seed=sections) for size, sections in PAGE_SIZES.items()}
+    return pages
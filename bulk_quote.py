@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Tra giá hàng loạt không cần giao diện: đọc file xe × dịch vụ × ZIP (CSV hoặc JSONL),
+tra giá song song có giới hạn, ghi kết quả dạng stream ra JSONL hoặc Parquet
+và lưu checkpoint để chạy tiếp sau khi bị dừng.
+
+    python bulk_quote.py fleet.csv -o quotes.jsonl
+    python bulk_quote.py fleet.csv -o quotes.parquet --services "Oil Change;Brake Pad Replacement"
+    python bulk_quote.py fleet.csv -o quotes.jsonl --workers 32 --parse-workers 8
+
+Mỗi dòng đầu vào cần year, make, model; service/services và zip_code/zip_codes có thể
+chứa nhiều giá trị ngăn cách bởi ";" (mỗi tổ hợp là một lượt tra).
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow là tùy chọn, chỉ cần khi ghi Parquet
+    pa = None
+    pq = None
+
+from pipeline import QuotePipeline
+from quote_cache import QuoteCache
+from quote_result import as_dict
+from scraper_advanced import YourMechanicAdvancedScraper
+
+logger = logging.getLogger(__name__)
+
+LIST_SEPARATOR = ";"
+
+class QuoteJob(NamedTuple):
+    service: str
+    zip_code: str
+    year: str
+    make: str
+    model: str
+
+    @property
+    def key(self) -> str:
+        return QuoteCache.make_key(self.service, self.zip_code, self.year, self.make, self.model)
+
+def _split(value) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [str(item).strip() for item in value if str(item).strip()]
+    return [item.strip() for item in str(value).split(LIST_SEPARATOR) if item.strip()]
+
+def iter_rows(path: str) -> Iterator[Dict]:
+    """Đọc từng dòng đầu vào (JSONL nếu đuôi .jsonl/.ndjson, ngược lại CSV)"""
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.endswith((".jsonl", ".ndjson")):
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError as e:
+                    logger.warning(f"Skipping invalid JSON on line {line_number}: {e}")
+        else:
+            yield from csv.DictReader(f)
+
+def expand_jobs(rows: Iterable[Dict], services: Optional[List[str]] = None,
+                zip_codes: Optional[List[str]] = None) -> Iterator[QuoteJob]:
+    """Sinh lần lượt các lượt tra (không dựng toàn bộ tích Descartes trong bộ nhớ)"""
+    for row in rows:
+        year, make, model = (str(row.get(field) or "").strip() for field in ("year", "make", "model"))
+        if not (year and make and model):
+            logger.warning(f"Skipping row without year/make/model: {row}")
+            continue
+        row_services = _split(row.get("services") or row.get("service")) or services or []
+        row_zips = _split(row.get("zip_codes") or row.get("zip_code")) or zip_codes or []
+        for service in row_services:
+            for zip_code in row_zips:
+                yield QuoteJob(service, zip_code, year, make, model)
+
+class Checkpoint:
+    """Tập key đã ghi xong, lưu trong SQLite để bộ nhớ không tăng theo kích thước đầu vào.
+
+    Cùng bảng giữ cả key đã đưa vào hàng đợi trong lượt chạy hiện tại (`done = 0`) để bỏ job trùng;
+    các key này bị xóa khi mở lại checkpoint nên job chưa ghi xong được tra lại ở lượt sau.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS jobs (key TEXT PRIMARY KEY, done INTEGER NOT NULL)")
+        self._db.execute("DELETE FROM jobs WHERE done = 0")
+        self._db.commit()
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM jobs WHERE key = ? AND done = 1", (key,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM jobs WHERE done = 1").fetchone()[0]
+
+    def claim(self, key: str) -> bool:
+        """Đánh dấu key đã vào hàng đợi; False nếu key đã xong hoặc đã có trong lượt chạy này"""
+        with self._lock:
+            cursor = self._db.execute("INSERT OR IGNORE INTO jobs (key, done) VALUES (?, 0)", (key,))
+            return cursor.rowcount == 1
+
+    def mark(self, keys: Iterable[str]):
+        """Ghi nhận các key đã ghi xong (commit cùng các key đã claim)"""
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO jobs (key, done) VALUES (?, 1) ON CONFLICT (key) DO UPDATE SET done = 1",
+                ((key,) for key in keys),
+            )
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.commit()
+            self._db.close()
+
+def quote_record(job: QuoteJob, result: Dict, details: bool = False) -> Dict:
+    """Một dòng kết quả phẳng; `details` giữ toàn bộ dict báo giá dạng JSON"""
+    return {
+        "service": job.service,
+        "zip_code": job.zip_code,
+        "year": job.year,
+        "make": job.make,
+        "model": job.model,
+        "source": result.get("source"),
+        "min_price": result.get("min_price"),
+        "avg_price": result.get("avg_price"),
+        "max_price": result.get("max_price"),
+        "labor_time": result.get("labor_time"),
+        "quoted_at": time.time(),
+        "details": json.dumps(as_dict(result), ensure_ascii=False, default=str) if details else None,
+    }
+
+class JsonlWriter:
+    """Ghi kết quả ra JSON Lines (ghi nối thêm khi chạy tiếp)"""
+
+    def __init__(self, path: str, append: bool = False):
+        self._file = open(path, "a" if append else "w", encoding="utf-8")
+
+    def write_chunk(self, records: List[Dict]):
+        self._file.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+class ParquetWriter:
+    """Ghi kết quả ra Parquet, mỗi chunk là một row group.
+
+    File Parquet không ghi nối thêm được, nên khi chạy tiếp mà file đã tồn tại
+    kết quả mới được ghi ra file kế tiếp `<tên>.part<N>.parquet` bên cạnh.
+    """
+
+    def __init__(self, path: str, append: bool = False):
+        if pa is None:
+            raise ImportError("Ghi Parquet cần pyarrow: pip install pyarrow")
+        if append and os.path.exists(path):
+            path = self._next_part_path(path)
+        self.path = path
+        self.schema = pa.schema([
+            ("service", pa.string()),
+            ("zip_code", pa.string()),
+            ("year", pa.string()),
+            ("make", pa.string()),
+            ("model", pa.string()),
+            ("source", pa.string()),
+            ("min_price", pa.int64()),
+            ("avg_price", pa.int64()),
+            ("max_price", pa.int64()),
+            ("labor_time", pa.string()),
+            ("quoted_at", pa.float64()),
+            ("details", pa.string()),
+        ])
+        self._writer = pq.ParquetWriter(path, self.schema)
+
+    @staticmethod
+    def _next_part_path(path: str) -> str:
+        stem, ext = os.path.splitext(path)
+        part = 1
+        while os.path.exists(f"{stem}.part{part}{ext}"):
+            part += 1
+        return f"{stem}.part{part}{ext}"
+
+    def write_chunk(self, records: List[Dict]):
+        self._writer.write_table(pa.Table.from_pylist(records, schema=self.schema))
+
+    def close(self):
+        self._writer.close()
+
+def open_writer(path: str, output_format: Optional[str] = None, append: bool = False):
+    """Chọn writer theo --format hoặc đuôi file"""
+    output_format = output_format or ("parquet" if path.endswith(".parquet") else "jsonl")
+    if output_format == "parquet":
+        return ParquetWriter(path, append=append)
+    return JsonlWriter(path, append=append)
+
+def run_bulk(scraper: YourMechanicAdvancedScraper, jobs: Iterable[QuoteJob], writer, checkpoint: Checkpoint,
+             max_workers: int = 8, chunk_size: int = 500, details: bool = False,
+             log_every: int = 1000, parse_workers: int = 0) -> Dict[str, int]:
+    """Tra giá song song với số job đang chạy có giới hạn, ghi theo chunk rồi mới checkpoint.
+
+    `parse_workers` > 0: phân tích HTML trên process pool (pipeline.QuotePipeline) thay vì
+    ngay trong thread tải trang, để tra giá hàng loạt dùng được nhiều core.
+    """
+    stats = {"done": 0, "skipped": 0, "failed": 0}
+    chunk, chunk_keys = [], []
+    max_in_flight = max_workers * 4
+    started = time.monotonic()
+
+    def flush():
+        if chunk:
+            writer.write_chunk(chunk)
+            checkpoint.mark(chunk_keys)
+            chunk.clear()
+            chunk_keys.clear()
+
+    def add(job, result):
+        chunk.append(quote_record(job, result, details))
+        chunk_keys.append(job.key)
+        stats["done"] += 1
+        if stats["done"] % log_every == 0:
+            rate = stats["done"] / max(time.monotonic() - started, 1e-9)
+            logger.info(f"{stats['done']} quotes done ({rate:.1f}/s), {stats['skipped']} skipped")
+        if len(chunk) >= chunk_size:
+            flush()
+
+    def collect(futures):
+        for future in futures:
+            job = in_flight.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                # Không checkpoint để lần chạy sau thử lại
+                logger.error(f"Error quoting {job}: {e}")
+                stats["failed"] += 1
+                continue
+            add(job, result)
+
+    def pending():
+        for job in jobs:
+            # Key đã xong hoặc trùng trong lượt này: checkpoint tra trên đĩa, không giữ tập key trong bộ nhớ
+            if not checkpoint.claim(job.key):
+                stats["skipped"] += 1
+                continue
+            yield job
+
+    in_flight = {}
+    try:
+        if parse_workers:
+            with QuotePipeline(scraper, fetch_workers=max_workers, parse_workers=parse_workers,
+                               max_in_flight=max_in_flight) as pipeline:
+                for job, result in pipeline.run(pending()):
+                    add(job, result)
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for job in pending():
+                    if len(in_flight) >= max_in_flight:
+                        finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        collect(finished)
+                    future = executor.submit(
+                        scraper.search_service_pricing, job.service, job.zip_code, job.year, job.make, job.model
+                    )
+                    in_flight[future] = job
+
+                while in_flight:
+                    finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(finished)
+    finally:
+        # Kể cả khi bị ngắt (Ctrl+C), các kết quả đã xong vẫn được ghi và checkpoint
+        flush()
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless bulk quoting (CSV/JSONL in, JSONL/Parquet out)")
+    parser.add_argument("input", help="File CSV hoặc JSONL với các cột year, make, model, service(s), zip_code(s)")
+    parser.add_argument("-o", "--output", required=True, help="File kết quả .jsonl hoặc .parquet")
+    parser.add_argument("--format", choices=["jsonl", "parquet"], help="Mặc định theo đuôi file kết quả")
+    parser.add_argument("--services", help="Dịch vụ mặc định cho dòng không có cột service, ngăn cách bởi ';'")
+    parser.add_argument("--zips", help="ZIP mặc định cho dòng không có cột zip_code, ngăn cách bởi ';'")
+    parser.add_argument("--workers", type=int, default=8, help="Số lượt tra đồng thời")
+    parser.add_argument("--parse-workers", type=int, default=0,
+                        help="Số process phân tích HTML (0: phân tích ngay trong thread tải trang)")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Số dòng mỗi lần ghi/checkpoint")
+    parser.add_argument("--checkpoint", help="File checkpoint (mặc định <output>.checkpoint)")
+    parser.add_argument("--restart", action="store_true", help="Bỏ checkpoint cũ và ghi đè kết quả")
+    parser.add_argument("--details", action="store_true", help="Giữ toàn bộ báo giá (JSON) trong cột details")
+    args = parser.parse_args()
+
+    checkpoint_path = args.checkpoint or f"{args.output}.checkpoint"
+    if args.restart:
+        for path in (checkpoint_path, f"{checkpoint_path}-wal", f"{checkpoint_path}-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+    checkpoint = Checkpoint(checkpoint_path)
+    if len(checkpoint):
+        logger.info(f"Resuming: {len(checkpoint)} quotes already done")
+
+    jobs = expand_jobs(iter_rows(args.input), _split(args.services), _split(args.zips))
+    scraper = YourMechanicAdvancedScraper(max_workers=args.workers, per_host_limit=args.workers)
+    # Chưa có checkpoint: ghi đè file kết quả cũ thay vì nối thêm vào dữ liệu không thuộc lượt chạy này
+    writer = open_writer(args.output, args.format, append=bool(len(checkpoint)))
+    try:
+        stats = run_bulk(scraper, jobs, writer, checkpoint, max_workers=args.workers,
+                         chunk_size=args.chunk_size, details=args.details, parse_workers=args.parse_workers)
+    finally:
+        writer.close()
+        scraper.router.save()
+        checkpoint.close()
+    logger.info(f"Finished: {stats['done']} quoted, {stats['skipped']} skipped, {stats['failed']} failed")
+
+if __name__ == "__main__":
+    main()
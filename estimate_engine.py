@@ -0,0 +1,217 @@
+"""
+Engine ước tính giá: bảng giá tham khảo, chỉ mục từ khóa dựng sẵn theo tên dịch vụ,
+và API ước tính theo lô (vectorized bằng NumPy/pandas) cho hàng nghìn xe cùng lúc.
+"""
+
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Union
+
+import numpy as np
+import pandas as pd
+
+# Base pricing tham khảo từ thị trường (thứ tự có ý nghĩa: khóa đầu tiên khớp sẽ được dùng)
+BASE_PRICES = {
+    # Engine services
+    "oil change": {"min": 40, "max": 80, "avg": 60},
+    "air filter replacement": {"min": 25, "max": 60, "avg": 42},
+    "spark plug replacement": {"min": 80, "max": 200, "avg": 140},
+    "timing belt replacement": {"min": 400, "max": 800, "avg": 600},
+    "catalytic converter replacement": {"min": 800, "max": 2000, "avg": 1400},
+
+    # Brake services
+    "brake pad replacement": {"min": 120, "max": 250, "avg": 185},
+    "brake rotors replacement": {"min": 200, "max": 400, "avg": 300},
+    "brake system flush": {"min": 70, "max": 120, "avg": 95},
+    "brake caliper replacement": {"min": 300, "max": 600, "avg": 450},
+
+    # Battery services
+    "car battery replacement": {"min": 80, "max": 200, "avg": 140},
+    "battery cable replacement": {"min": 50, "max": 150, "avg": 100},
+
+    # Transmission services
+    "transmission fluid service": {"min": 80, "max": 150, "avg": 115},
+    "cv axle replacement": {"min": 300, "max": 600, "avg": 450},
+    "clutch replacement": {"min": 800, "max": 1500, "avg": 1150},
+
+    # Suspension services
+    "shock absorber replacement": {"min": 200, "max": 400, "avg": 300},
+    "strut assembly replacement": {"min": 300, "max": 600, "avg": 450},
+    "ball joint replacement": {"min": 150, "max": 350, "avg": 250},
+
+    # Diagnostics
+    "inspection": {"min": 80, "max": 150, "avg": 115},
+    "pre-purchase car inspection": {"min": 90, "max": 120, "avg": 105}
+}
+
+SERVICE_DESCRIPTIONS = {
+    "oil change": "Complete engine oil and filter replacement service. We drain old oil, replace filter, and refill with fresh oil suited for your vehicle.",
+    "brake pad replacement": "Professional brake pad replacement service including inspection of rotors, calipers, and brake system components.",
+    "battery replacement": "Complete battery replacement service with testing of charging system and electrical connections.",
+    "air filter replacement": "Engine air filter replacement to ensure optimal engine performance and fuel efficiency.",
+    "inspection": "Comprehensive vehicle inspection covering safety, performance, and maintenance items."
+}
+
+# (từ khóa, danh sách bao gồm) theo thứ tự ưu tiên
+SERVICE_INCLUDES = [
+    ("oil change", [
+        "✅ Up to 5 quarts of oil",
+        "✅ New oil filter",
+        "✅ Multi-point inspection",
+        "✅ Fluid level check",
+        "✅ Battery test"
+    ]),
+    ("brake", [
+        "✅ New brake pads/components",
+        "✅ Brake system inspection",
+        "✅ Rotor condition check",
+        "✅ Brake fluid level check",
+        "✅ Test drive verification"
+    ]),
+    ("battery", [
+        "✅ New battery installation",
+        "✅ Battery terminal cleaning",
+        "✅ Charging system test",
+        "✅ Electrical connection check",
+        "✅ Old battery disposal"
+    ]),
+]
+DEFAULT_INCLUDES = [
+    "✅ Professional service",
+    "✅ Quality parts/materials",
+    "✅ System inspection",
+    "✅ Performance testing",
+    "✅ Service documentation"
+]
+
+# (các từ khóa, thời gian) theo thứ tự ưu tiên
+SERVICE_DURATIONS = [
+    (("oil change",), "30-45 minutes"),
+    (("brake pad",), "1-2 hours"),
+    (("battery",), "30-60 minutes"),
+    (("inspection",), "45-90 minutes"),
+    (("timing belt", "clutch"), "4-8 hours"),
+    (("transmission",), "2-4 hours"),
+]
+DEFAULT_DURATION = "1-3 hours"
+
+LUXURY_BRANDS = ["BMW", "Mercedes-Benz", "Audi", "Lexus", "Acura", "Infiniti", "Jaguar", "Land Rover", "Porsche"]
+JAPANESE_BRANDS = ["Toyota", "Honda", "Nissan", "Mazda"]
+
+class ServiceProfile(NamedTuple):
+    min: int
+    max: int
+    avg: int
+    description: str
+    includes: List[str]
+    duration: str
+
+def _base_pricing(service_lower: str) -> Dict[str, int]:
+    """Giá gốc theo bảng tham khảo, nếu không có thì ước tính theo loại dịch vụ"""
+    for key, price in BASE_PRICES.items():
+        if key in service_lower:
+            return price
+
+    if "replacement" in service_lower:
+        if any(word in service_lower for word in ["engine", "transmission", "clutch"]):
+            return {"min": 500, "max": 1500, "avg": 1000}
+        if any(word in service_lower for word in ["brake", "suspension", "steering"]):
+            return {"min": 200, "max": 500, "avg": 350}
+        return {"min": 100, "max": 300, "avg": 200}
+    if "service" in service_lower or "flush" in service_lower:
+        return {"min": 60, "max": 120, "avg": 90}
+    if "inspection" in service_lower:
+        return {"min": 80, "max": 150, "avg": 115}
+    return {"min": 75, "max": 200, "avg": 137}
+
+@lru_cache(maxsize=4096)
+def service_profile(service_name: str) -> ServiceProfile:
+    """Chỉ mục từ khóa: giải một lần cho mỗi tên dịch vụ rồi ghi nhớ"""
+    service_lower = service_name.lower()
+    pricing = _base_pricing(service_lower)
+
+    description = next(
+        (desc for key, desc in SERVICE_DESCRIPTIONS.items() if key in service_lower),
+        f"Professional {service_lower} service performed by certified mechanics using quality parts."
+    )
+    includes = next((items for key, items in SERVICE_INCLUDES if key in service_lower), DEFAULT_INCLUDES)
+    duration = next(
+        (value for keys, value in SERVICE_DURATIONS if any(key in service_lower for key in keys)),
+        DEFAULT_DURATION
+    )
+    return ServiceProfile(pricing["min"], pricing["max"], pricing["avg"], description, includes, duration)
+
+def price_multiplier(year: str, make: str, model: str) -> float:
+    """Tính hệ số điều chỉnh giá theo xe"""
+    multiplier = 1.0
+
+    # Điều chỉnh theo năm
+    try:
+        year_int = int(year)
+        if year_int < 2000:
+            multiplier *= 0.9  # Xe rất cũ rẻ hơn
+        elif year_int < 2010:
+            multiplier *= 1.1  # Xe cũ đắt hơn do khó tìm phụ tùng
+        elif year_int > 2020:
+            multiplier *= 1.2  # Xe mới đắt hơn
+    except (TypeError, ValueError):
+        pass
+
+    # Điều chỉnh theo hãng
+    if make in LUXURY_BRANDS:
+        multiplier *= 1.4
+    elif make in JAPANESE_BRANDS:
+        multiplier *= 0.9  # Xe Nhật rẻ hơn
+
+    return multiplier
+
+def _parse_year(value) -> float:
+    try:
+        return float(int(value))
+    except (TypeError, ValueError):
+        return np.nan
+
+def price_multipliers(years: pd.Series, makes: pd.Series) -> np.ndarray:
+    """Bản vectorized của price_multiplier cho cả cột năm và hãng"""
+    # Mỗi giá trị năm khác nhau chỉ parse một lần (cùng quy tắc int() như bản từng dòng)
+    year_codes, year_uniques = pd.factorize(years, use_na_sentinel=False)
+    year_values = np.array([_parse_year(value) for value in year_uniques], dtype=float)[year_codes]
+    # Năm không hợp lệ (NaN) không khớp điều kiện nào -> hệ số 1.0
+    year_factor = np.select(
+        [year_values < 2000, year_values < 2010, year_values > 2020],
+        [0.9, 1.1, 1.2],
+        default=1.0
+    )
+    make_values = makes.to_numpy(dtype=object)
+    make_factor = np.where(
+        np.isin(make_values, LUXURY_BRANDS), 1.4,
+        np.where(np.isin(make_values, JAPANESE_BRANDS), 0.9, 1.0)
+    )
+    return 1.0 * year_factor * make_factor
+
+def estimate_batch(rows: Union[pd.DataFrame, Iterable]) -> pd.DataFrame:
+    """Ước tính giá cho cả bảng (service, year, make, model) cùng lúc.
+
+    Trả về DataFrame gồm các cột đầu vào cùng min_price, avg_price, max_price,
+    khớp với kết quả của YourMechanicAdvancedScraper._get_estimated_pricing cho từng dòng.
+    """
+    frame = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(
+        list(rows), columns=["service", "year", "make", "model"]
+    )
+    result = frame[["service", "year", "make", "model"]].copy()
+    if result.empty:
+        for column in ("min_price", "avg_price", "max_price"):
+            result[column] = pd.Series(dtype="int64")
+        return result
+
+    # Mỗi tên dịch vụ chỉ giải một lần, sau đó phát lại theo mã category
+    codes, uniques = pd.factorize(result["service"].astype(str))
+    profiles = [service_profile(name) for name in uniques]
+    base = np.array([(p.min, p.avg, p.max) for p in profiles], dtype=float)[codes]
+
+    multipliers = price_multipliers(result["year"], result["make"])
+    prices = np.floor(base * multipliers[:, None]).astype("int64")
+
+    result["min_price"] = prices[:, 0]
+    result["avg_price"] = prices[:, 1]
+    result["max_price"] = prices[:, 2]
+    return result
@@ -0,0 +1,263 @@
+"""
+Engine trích xuất một lượt: duyệt cây BeautifulSoup đúng một lần và chuyển từng node
+tới các field extractor đã đăng ký, thay vì gọi find_all riêng cho từng trường.
+"""
+
+import hashlib
+import json
+import re
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Type
+
+from bs4 import BeautifulSoup, NavigableString
+
+from price_scanner import scan_price_values
+
+DESCRIPTION_CLASS_PATTERN = re.compile(r'description|overview|about', re.I)
+NUMBER_PATTERN = re.compile(r'\d+(?:[.,]\d+)*')
+
+INCLUDE_KEYWORDS = ('include', 'service', 'repair', 'replacement')
+
+# Common service inclusions by type
+FALLBACK_INCLUDES = [
+    "✅ Diagnostic inspection",
+    "✅ Professional installation",
+    "✅ Quality parts",
+    "✅ Post-service testing",
+    "✅ Clean-up after service"
+]
+
+def page_fingerprint(content: bytes) -> int:
+    """Dấu vân tay ổn định của nội dung trang (tính một lần từ bytes response)"""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(content, digest_size=8).digest(), 'big')
+
+class FieldExtractor:
+    """Extractor cho một trường kết quả.
+
+    Khai báo `tags` (tên thẻ cần nhận) và/hoặc `wants_text` (nhận các text node);
+    đặt `done = True` khi đã đủ dữ liệu để engine không gửi thêm node.
+    """
+
+    field = ""
+    tags = ()
+    wants_text = False
+
+    def __init__(self):
+        self.done = False
+
+    def visit_tag(self, node):
+        pass
+
+    def visit_text(self, text: NavigableString):
+        pass
+
+    def result(self) -> Any:
+        raise NotImplementedError
+
+class PriceExtractor(FieldExtractor):
+    """Các giá ($) hợp lý xuất hiện trong text của trang"""
+
+    field = "prices"
+    wants_text = True
+
+    def __init__(self):
+        super().__init__()
+        self.prices = []
+
+    def visit_text(self, text):
+        self.prices.extend(scan_price_values(text))
+
+    def result(self) -> List[int]:
+        return self.prices
+
+class DescriptionExtractor(FieldExtractor):
+    """Đoạn mô tả đầu tiên trong các thẻ có class description/overview/about"""
+
+    field = "service_description"
+    tags = ('p', 'div')
+
+    def __init__(self):
+        super().__init__()
+        self.description = None
+
+    def visit_tag(self, node):
+        classes = node.get('class')
+        if not classes:
+            return
+        if isinstance(classes, str):
+            classes = [classes]
+        if not any(DESCRIPTION_CLASS_PATTERN.search(c) for c in classes) and \
+                not DESCRIPTION_CLASS_PATTERN.search(' '.join(classes)):
+            return
+        text = node.get_text(strip=True)
+        if 50 < len(text) < 500:
+            self.description = text
+            self.done = True
+
+    def result(self) -> str:
+        return self.description or "Detailed service information available"
+
+class IncludesExtractor(FieldExtractor):
+    """Tối đa 5 mục danh sách mô tả những gì dịch vụ bao gồm"""
+
+    field = "whats_included"
+    tags = ('ul', 'ol', 'li')
+    limit = 5
+
+    def __init__(self):
+        super().__init__()
+        self.includes = []
+
+    def visit_tag(self, node):
+        text = node.get_text(strip=True)
+        if not 10 < len(text) < 100:
+            return
+        text_lower = text.lower()
+        if any(word in text_lower for word in INCLUDE_KEYWORDS):
+            self.includes.append(f"✅ {text}")
+            if len(self.includes) >= self.limit:
+                self.done = True
+
+    def result(self) -> List[str]:
+        return self.includes or list(FALLBACK_INCLUDES)
+
+class RatingExtractor(FieldExtractor):
+    """Điểm và số lượng đánh giá từ markup schema.org (itemprop hoặc JSON-LD aggregateRating)"""
+
+    field = "rating"
+    tags = ('meta', 'span', 'div', 'script')
+
+    def __init__(self):
+        super().__init__()
+        self.rating_value = None
+        self.review_count = None
+
+    def visit_tag(self, node):
+        if node.name == 'script':
+            if node.get('type') == 'application/ld+json':
+                self._visit_json_ld(node.string or '')
+        else:
+            itemprop = node.get('itemprop')
+            if itemprop == 'ratingValue' and self.rating_value is None:
+                self.rating_value = self._number(node.get('content') or node.get_text(strip=True), float)
+            elif itemprop in ('reviewCount', 'ratingCount') and self.review_count is None:
+                self.review_count = self._number(node.get('content') or node.get_text(strip=True), int)
+        self.done = self.rating_value is not None and self.review_count is not None
+
+    def _visit_json_ld(self, text: str):
+        try:
+            data = json.loads(text)
+        except ValueError:
+            return
+        stack = [data]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, list):
+                stack.extend(item)
+            elif isinstance(item, dict):
+                aggregate = item.get('aggregateRating')
+                if isinstance(aggregate, dict):
+                    if self.rating_value is None:
+                        self.rating_value = self._number(aggregate.get('ratingValue'), float)
+                    if self.review_count is None:
+                        self.review_count = self._number(
+                            aggregate.get('reviewCount', aggregate.get('ratingCount')), int)
+                    return
+                stack.extend(item.values())
+
+    @staticmethod
+    def _number(value, cast):
+        if value is None:
+            return None
+        match = NUMBER_PATTERN.search(str(value))
+        if not match:
+            return None
+        try:
+            return cast(float(match.group().replace(',', '')))
+        except ValueError:
+            return None
+
+    def result(self) -> Optional[Dict]:
+        if self.rating_value is None:
+            return None
+        return {"average_rating": round(self.rating_value, 1), "total_reviews": self.review_count}
+
+DEFAULT_EXTRACTORS = [PriceExtractor, DescriptionExtractor, IncludesExtractor, RatingExtractor]
+
+class ExtractionEngine:
+    """Duyệt cây một lần, gửi node tới các extractor theo tên thẻ hoặc loại text"""
+
+    def __init__(self, extractors: Optional[List[Type[FieldExtractor]]] = None):
+        self._extractor_classes = list(extractors if extractors is not None else DEFAULT_EXTRACTORS)
+
+    def register(self, extractor_cls: Type[FieldExtractor]):
+        """Đăng ký thêm một extractor"""
+        self._extractor_classes.append(extractor_cls)
+
+    def run(self, soup: BeautifulSoup, timings: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """Trích xuất toàn bộ các trường trong một lượt duyệt.
+
+        Truyền dict `timings` để cộng dồn thời gian (giây) của từng extractor theo tên trường.
+        """
+        if timings is not None:
+            return self._run_timed(soup, timings)
+        extractors = [cls() for cls in self._extractor_classes]
+        by_tag = defaultdict(list)
+        text_extractors = []
+        for extractor in extractors:
+            for tag in extractor.tags:
+                by_tag[tag].append(extractor)
+            if extractor.wants_text:
+                text_extractors.append(extractor)
+
+        for node in soup.descendants:
+            if isinstance(node, NavigableString):
+                for extractor in text_extractors:
+                    if not extractor.done:
+                        extractor.visit_text(node)
+            else:
+                for extractor in by_tag.get(node.name, ()):
+                    if not extractor.done:
+                        extractor.visit_tag(node)
+
+        return {extractor.field: extractor.result() for extractor in extractors}
+
+    def _run_timed(self, soup: BeautifulSoup, timings: Dict[str, float]) -> Dict[str, Any]:
+        """Như run nhưng đo thời gian mỗi lần gọi extractor (chậm hơn, chỉ dùng khi lấy mẫu)"""
+        clock = time.perf_counter
+        extractors = [cls() for cls in self._extractor_classes]
+        by_tag = defaultdict(list)
+        text_extractors = []
+        for extractor in extractors:
+            timings.setdefault(extractor.field, 0.0)
+            for tag in extractor.tags:
+                by_tag[tag].append(extractor)
+            if extractor.wants_text:
+                text_extractors.append(extractor)
+
+        for node in soup.descendants:
+            if isinstance(node, NavigableString):
+                for extractor in text_extractors:
+                    if not extractor.done:
+                        start = clock()
+                        extractor.visit_text(node)
+                        timings[extractor.field] += clock() - start
+            else:
+                for extractor in by_tag.get(node.name, ()):
+                    if not extractor.done:
+                        start = clock()
+                        extractor.visit_tag(node)
+                        timings[extractor.field] += clock() - start
+
+        results = {}
+        for extractor in extractors:
+            start = clock()
+            results[extractor.field] = extractor.result()
+            timings[extractor.field] += clock() - start
+        return results
+
+service_page_engine = ExtractionEngine()
+price_engine = ExtractionEngine([PriceExtractor])
@@ -0,0 +1,233 @@
+"""
+Lịch sử tìm kiếm và danh sách so sánh lưu bền vững trong SQLite, dùng chung cho mọi người dùng
+(phân biệt theo `user_id`). Các cột lọc (xe, dịch vụ, ZIP, thời gian) có index; giao diện chỉ đọc
+từng trang kết quả và các bảng tổng hợp tính bằng GROUP BY trong database, không nạp hết dữ liệu.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Mapping, Optional, Tuple
+
+import pandas as pd
+
+from quote_result import QuoteResult
+
+logger = logging.getLogger(__name__)
+
+# Mount volume trong Docker để giữ lịch sử qua các lần restart; đặt rỗng để chỉ giữ trong bộ nhớ
+DEFAULT_HISTORY_DB_PATH = os.environ.get("YOURMECHANIC_HISTORY_DB", os.path.join("data", "history.sqlite"))
+
+# Loại danh sách: lịch sử tìm kiếm đã lưu, danh sách so sánh
+HISTORY = "history"
+COMPARISON = "comparison"
+
+# Cột nhóm và khoảng thời gian được phép trong truy vấn tổng hợp (không ghép chuỗi từ input)
+GROUP_COLUMNS = {"service": "service", "make": "make", "vehicle": "vehicle", "zip_code": "zip_code"}
+PERIODS = {
+    "day": "strftime('%Y-%m-%d', created_at, 'unixepoch')",
+    "week": "strftime('%Y-W%W', created_at, 'unixepoch')",
+    "month": "strftime('%Y-%m', created_at, 'unixepoch')",
+}
+
+# Cột được phép lọc trong `quotes`/`count_quotes`/`summary`/`price_trend` (since: created_at >= epoch giây)
+FILTER_COLUMNS = frozenset(("search_id", "service", "make", "model", "year", "zip_code", "since"))
+
+_QUOTE_COLUMNS = (
+    "id, search_id, created_at, service, vehicle, year, make, model, zip_code,"
+    " min_price, avg_price, max_price, labor_time, source"
+)
+
+class HistoryDB:
+    """Các lượt lưu báo giá theo người dùng: bảng `searches` (mỗi lượt lưu một dòng) và bảng `quotes`
+    (mỗi báo giá một dòng với các cột phẳng để lọc/tổng hợp, báo giá đầy đủ lưu JSON trong `detail`).
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_HISTORY_DB_PATH):
+        self.path = path or None
+        self._lock = threading.Lock()
+        self._db = None
+        if self.path:
+            try:
+                self._db = self._connect(self.path)
+            except sqlite3.Error as e:
+                logger.error(f"Cannot open history database at {self.path}, using memory only: {e}")
+        if self._db is None:
+            self._db = self._connect(":memory:")
+
+    def _connect(self, path: str) -> sqlite3.Connection:
+        """Mở (và khởi tạo nếu cần) database SQLite"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS searches ("
+            " id INTEGER PRIMARY KEY, user_id TEXT NOT NULL, kind TEXT NOT NULL, created_at REAL NOT NULL,"
+            " vehicle TEXT, year TEXT, make TEXT, model TEXT, zip_code TEXT,"
+            " services INTEGER NOT NULL, total_cost INTEGER NOT NULL)"
+        )
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS quotes ("
+            " id INTEGER PRIMARY KEY, search_id INTEGER NOT NULL REFERENCES searches (id),"
+            " user_id TEXT NOT NULL, kind TEXT NOT NULL, created_at REAL NOT NULL,"
+            " service TEXT, vehicle TEXT, year TEXT, make TEXT, model TEXT, zip_code TEXT,"
+            " min_price INTEGER, avg_price INTEGER, max_price INTEGER, labor_time TEXT, source TEXT,"
+            " detail TEXT NOT NULL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS idx_searches_user ON searches (user_id, kind, created_at)")
+        db.execute("CREATE INDEX IF NOT EXISTS idx_quotes_user ON quotes (user_id, kind, created_at)")
+        db.execute("CREATE INDEX IF NOT EXISTS idx_quotes_search ON quotes (search_id)")
+        db.execute("CREATE INDEX IF NOT EXISTS idx_quotes_vehicle ON quotes (make, model, year)")
+        db.execute("CREATE INDEX IF NOT EXISTS idx_quotes_service ON quotes (service, created_at)")
+        db.execute("CREATE INDEX IF NOT EXISTS idx_quotes_zip ON quotes (zip_code, created_at)")
+        db.execute("CREATE INDEX IF NOT EXISTS idx_quotes_created ON quotes (created_at)")
+        return db
+
+    def add(self, user_id: str, results: List[Mapping], kind: str = HISTORY, year: Optional[str] = None,
+            make: Optional[str] = None, model: Optional[str] = None, zip_code: Optional[str] = None,
+            created_at: Optional[float] = None) -> int:
+        """Lưu một lượt báo giá của người dùng, trả về id của lượt lưu"""
+        results = [QuoteResult.from_dict(result) for result in results]
+        created_at = created_at if created_at is not None else time.time()
+        vehicle = " ".join(str(part) for part in (year, make, model) if part) or None
+        total_cost = sum(result.get("avg_price") or 0 for result in results)
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                cursor = self._db.execute(
+                    "INSERT INTO searches (user_id, kind, created_at, vehicle, year, make, model, zip_code,"
+                    " services, total_cost) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (user_id, kind, created_at, vehicle, year, make, model, zip_code, len(results), total_cost),
+                )
+                search_id = cursor.lastrowid
+                self._db.executemany(
+                    "INSERT INTO quotes (search_id, user_id, kind, created_at, service, vehicle, year, make,"
+                    " model, zip_code, min_price, avg_price, max_price, labor_time, source, detail)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (search_id, user_id, kind, created_at, result.get("service"),
+                         result.get("vehicle") or vehicle, year, make, model, zip_code,
+                         result.get("min_price"), result.get("avg_price"), result.get("max_price"),
+                         result.get("labor_time"), result.get("source"),
+                         json.dumps(result.to_dict(), ensure_ascii=False))
+                        for result in results
+                    ],
+                )
+                self._db.execute("COMMIT")
+            except sqlite3.Error:
+                self._db.execute("ROLLBACK")
+                raise
+        return search_id
+
+    def _filters(self, user_id: Optional[str], kind: Optional[str], **columns) -> Tuple[str, list]:
+        """Mệnh đề WHERE (các cột có index) và tham số tương ứng"""
+        clauses, params = [], []
+        unknown = set(columns) - FILTER_COLUMNS
+        if unknown:
+            raise ValueError(f"Unknown history filters: {sorted(unknown)}")
+        for name, value in (("user_id", user_id), ("kind", kind), *columns.items()):
+            if value is None:
+                continue
+            if name == "since":
+                clauses.append("created_at >= ?")
+            else:
+                clauses.append(f"{name} = ?")
+            params.append(value)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _query(self, sql: str, params: list) -> pd.DataFrame:
+        with self._lock:
+            return pd.read_sql_query(sql, self._db, params=params)
+
+    def _scalar(self, sql: str, params: list):
+        with self._lock:
+            return self._db.execute(sql, params).fetchone()[0]
+
+    def count_searches(self, user_id: str, kind: str = HISTORY) -> int:
+        where, params = self._filters(user_id, kind)
+        return self._scalar(f"SELECT COUNT(*) FROM searches{where}", params)
+
+    def searches(self, user_id: str, kind: str = HISTORY, limit: int = 10, offset: int = 0) -> pd.DataFrame:
+        """Một trang các lượt lưu, mới nhất trước (cột created_at là datetime)"""
+        where, params = self._filters(user_id, kind)
+        df = self._query(
+            "SELECT id, created_at, vehicle, zip_code, services, total_cost FROM searches"
+            f"{where} ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+            params + [limit, offset],
+        )
+        df["created_at"] = pd.to_datetime(df["created_at"], unit="s")
+        return df
+
+    def count_quotes(self, user_id: Optional[str] = None, kind: Optional[str] = None, **filters) -> int:
+        where, params = self._filters(user_id, kind, **filters)
+        return self._scalar(f"SELECT COUNT(*) FROM quotes{where}", params)
+
+    def quotes(self, user_id: Optional[str] = None, kind: Optional[str] = None, limit: int = 50, offset: int = 0,
+               **filters) -> pd.DataFrame:
+        """Một trang báo giá phẳng, mới nhất trước.
+
+        Lọc theo search_id, service, make, model, year, zip_code hoặc since (epoch giây).
+        """
+        where, params = self._filters(user_id, kind, **filters)
+        df = self._query(
+            f"SELECT {_QUOTE_COLUMNS} FROM quotes{where} ORDER BY created_at DESC, id ASC LIMIT ? OFFSET ?",
+            params + [limit, offset],
+        )
+        df["created_at"] = pd.to_datetime(df["created_at"], unit="s")
+        return df
+
+    def detail(self, quote_id: int) -> Optional[QuoteResult]:
+        """Báo giá đầy đủ của một dòng trong bảng quotes"""
+        with self._lock:
+            row = self._db.execute("SELECT detail FROM quotes WHERE id = ?", (quote_id,)).fetchone()
+        return QuoteResult.from_dict(json.loads(row[0])) if row is not None else None
+
+    def summary(self, by: Tuple[str, ...] = ("service",), user_id: Optional[str] = None,
+                kind: Optional[str] = None, **filters) -> pd.DataFrame:
+        """Giá thấp nhất/trung bình/cao nhất và số báo giá theo nhóm (vd. dịch vụ x xe)"""
+        columns = ", ".join(GROUP_COLUMNS[name] for name in by)
+        where, params = self._filters(user_id, kind, **filters)
+        return self._query(
+            f"SELECT {columns}, COUNT(*) AS quotes, MIN(min_price) AS min_price,"
+            f" CAST(ROUND(AVG(avg_price)) AS INTEGER) AS avg_price, MAX(max_price) AS max_price"
+            f" FROM quotes{where} GROUP BY {columns} ORDER BY {columns}",
+            params,
+        )
+
+    def price_trend(self, by: str = "service", period: str = "day", user_id: Optional[str] = None,
+                    kind: Optional[str] = None, **filters) -> pd.DataFrame:
+        """Giá trung bình theo thời gian (ngày/tuần/tháng) cho từng dịch vụ hoặc hãng xe"""
+        column, bucket = GROUP_COLUMNS[by], PERIODS[period]
+        where, params = self._filters(user_id, kind, **filters)
+        return self._query(
+            f"SELECT {bucket} AS period, {column}, COUNT(*) AS quotes,"
+            f" CAST(ROUND(AVG(avg_price)) AS INTEGER) AS avg_price"
+            f" FROM quotes{where} GROUP BY period, {column} ORDER BY period, {column}",
+            params,
+        )
+
+    def clear(self, user_id: str, kind: Optional[str] = None):
+        """Xóa các lượt lưu của người dùng (một loại hoặc tất cả)"""
+        where, params = self._filters(user_id, kind)
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.execute(f"DELETE FROM quotes{where}", params)
+                self._db.execute(f"DELETE FROM searches{where}", params)
+                self._db.execute("COMMIT")
+            except sqlite3.Error:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def stats(self) -> Dict:
+        """Số lượt lưu, số báo giá và số người dùng trong database"""
+        with self._lock:
+            searches, users = self._db.execute("SELECT COUNT(*), COUNT(DISTINCT user_id) FROM searches").fetchone()
+            quotes = self._db.execute("SELECT COUNT(*) FROM quotes").fetchone()[0]
+        return {"searches": searches, "quotes": quotes, "users": users}
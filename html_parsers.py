@@ -0,0 +1,50 @@
+"""
+Chọn backend phân tích HTML cho BeautifulSoup (html.parser, lxml, html5lib).
+Mọi backend đều trả về cây BeautifulSoup nên các hàm trích xuất dùng chung không cần thay đổi.
+"""
+
+import logging
+import os
+from typing import List, Optional
+
+from bs4 import BeautifulSoup, FeatureNotFound
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PARSER = "html.parser"
+
+# Backend hỗ trợ -> tên feature của BeautifulSoup
+PARSER_BACKENDS = {
+    "html.parser": "html.parser",  # Thuần Python, luôn có sẵn
+    "lxml": "lxml",                # C (libxml2), cần: pip install lxml
+    "html5lib": "html5lib",        # Chậm nhất nhưng chịu lỗi tốt nhất (chuẩn HTML5), cần: pip install html5lib
+}
+
+def available_parsers() -> List[str]:
+    """Các backend đã cài đặt trong môi trường hiện tại"""
+    available = []
+    for name, feature in PARSER_BACKENDS.items():
+        try:
+            BeautifulSoup("", feature)
+            available.append(name)
+        except FeatureNotFound:
+            continue
+    return available
+
+def resolve_parser(name: Optional[str] = None) -> str:
+    """Chọn backend theo tham số hoặc biến môi trường YOURMECHANIC_HTML_PARSER, fallback html.parser"""
+    name = name or os.environ.get("YOURMECHANIC_HTML_PARSER", DEFAULT_PARSER)
+    feature = PARSER_BACKENDS.get(name)
+    if feature is None:
+        logger.warning(f"Unknown HTML parser '{name}', using {DEFAULT_PARSER}")
+        return DEFAULT_PARSER
+    try:
+        BeautifulSoup("", feature)
+    except FeatureNotFound:
+        logger.warning(f"HTML parser '{name}' is not installed, using {DEFAULT_PARSER}")
+        return DEFAULT_PARSER
+    return name
+
+def make_soup(content, parser: str = DEFAULT_PARSER) -> BeautifulSoup:
+    """Phân tích HTML bằng backend đã chọn"""
+    return BeautifulSoup(content, PARSER_BACKENDS.get(parser, DEFAULT_PARSER))
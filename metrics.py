@@ -0,0 +1,244 @@
+"""
+Đo thời gian theo từng giai đoạn của một lượt tra giá (HTTP, parse, extractor, cache, tier fallback)
+và xuất counter/histogram theo định dạng text của Prometheus qua endpoint /metrics.
+"""
+
+import bisect
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Cổng endpoint /metrics (0 hoặc rỗng để tắt)
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "9108") or 0)
+
+# Tỉ lệ trang dịch vụ được đo thời gian từng extractor (đo mọi node tốn thêm chi phí cho lượt duyệt)
+EXTRACTOR_SAMPLE_RATE = float(os.environ.get("YOURMECHANIC_EXTRACTOR_SAMPLE_RATE", "0.1"))
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _format_labels(self, values: LabelValues, extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(zip(self.labelnames, values))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    """Counter tăng dần theo nhãn"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def values(self) -> Dict[LabelValues, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for values, value in sorted(self.values().items()):
+            lines.append(f"{self.name}{self._format_labels(values)} {value}")
+        return lines
+
+class Histogram(_Metric):
+    """Histogram theo bucket cố định (giây), kèm tổng và số lần đo"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def summary(self) -> Dict[LabelValues, Dict[str, float]]:
+        """count, sum, avg và p50/p95 ước lượng (cận trên của bucket) cho từng nhãn"""
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        result = {}
+        for key, values in series.items():
+            counts, total = values[:-1], values[-1]
+            count = sum(counts)
+            result[key] = {
+                "count": count,
+                "sum": total,
+                "avg": total / count if count else 0.0,
+                "p50": self._quantile(counts, count, 0.5),
+                "p95": self._quantile(counts, count, 0.95),
+            }
+        return result
+
+    def _quantile(self, counts: List[int], count: int, q: float) -> float:
+        if not count:
+            return 0.0
+        target = q * count
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            if cumulative >= target:
+                return bound
+        return float("inf")
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        for key, values in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), values[:-1]):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{self._format_labels(key, ('le', le))} {cumulative}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {values[-1]}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    """Tập các metric của process, render ra text exposition format"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "yourmechanic_stage_seconds", "Thời gian theo giai đoạn của lượt tra giá", ["stage"]
+)
+CACHE_LOOKUPS = REGISTRY.counter(
+    "yourmechanic_cache_lookups_total", "Số lần tra cache báo giá theo kết quả", ["result"]
+)
+QUOTES = REGISTRY.counter(
+    "yourmechanic_quotes_total", "Số báo giá trả về theo nguồn", ["source"]
+)
+HTTP_REQUESTS = REGISTRY.counter(
+    "yourmechanic_http_requests_total", "Số request HTTP theo method và status", ["method", "status"]
+)
+
+@contextmanager
+def span(stage: str):
+    """Đo thời gian một khối code vào histogram giai đoạn"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+
+def observe_stage(stage: str, seconds: float):
+    STAGE_SECONDS.observe(seconds, stage=stage)
+
+def sample_extractors() -> bool:
+    """Trang hiện tại có được đo thời gian từng extractor không"""
+    return EXTRACTOR_SAMPLE_RATE > 0 and random.random() < EXTRACTOR_SAMPLE_RATE
+
+def cache_hit_rate() -> Optional[float]:
+    values = CACHE_LOOKUPS.values()
+    hits, misses = values.get(("hit",), 0), values.get(("miss",), 0)
+    return hits / (hits + misses) if hits + misses else None
+
+_server = None
+_server_lock = threading.Lock()
+
+def start_metrics_server(port: int = METRICS_PORT, host: str = "0.0.0.0",
+                         registry: MetricsRegistry = REGISTRY) -> Optional[ThreadingHTTPServer]:
+    """Chạy endpoint /metrics ở thread nền (mỗi process một lần); port 0 để tắt"""
+    global _server
+    if not port:
+        return None
+    with _server_lock:
+        if _server is not None:
+            return _server
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        try:
+            server = ThreadingHTTPServer((host, port), Handler)
+        except OSError as e:
+            logger.error(f"Cannot start metrics endpoint on port {port}: {e}")
+            return None
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+        logger.info(f"Metrics endpoint on http://{host}:{port}/metrics")
+        _server = server
+        return server
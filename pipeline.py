@@ -0,0 +1,298 @@
+"""
+Pipeline tra giá tách phần mạng khỏi phần phân tích HTML: các thread tải trang chuyển bytes thô
+sang process pool phân tích (không bị GIL giới hạn trong một core), thread gọi `run` dựng kết quả
+theo xe và chuyển job sang tier kế tiếp khi tier hiện tại thất bại.
+
+Backpressure: số job đang xử lý giới hạn bởi `max_in_flight` (hàng đợi tải trang không vượt quá
+con số này), số trang chờ phân tích giới hạn bởi `max_pending_parses` nên thread tải trang dừng lại
+khi process pool không theo kịp.
+"""
+
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# ---- Phần chạy trong process con (mỗi process có một scraper riêng, không dùng network) ----
+
+_worker_scraper = None
+
+def _init_worker(parser: Optional[str]):
+    global _worker_scraper
+    from quote_cache import QuoteCache
+    from scraper_advanced import YourMechanicAdvancedScraper
+    from service_catalog import ServiceCatalog
+    from snapshot_store import SnapshotStore
+    from tier_router import TierRouter
+
+    _worker_scraper = YourMechanicAdvancedScraper(
+        cache=QuoteCache(path=None), catalog=ServiceCatalog(path=""), snapshots=SnapshotStore(root=None),
+        router=TierRouter(path=None), parser=parser
+    )
+
+def parse_service_page(content: bytes) -> Dict:
+    """Các trường không phụ thuộc xe của trang dịch vụ (hàm top-level để gửi sang process con)"""
+    return _worker_scraper._service_page_fields(content)
+
+def parse_estimate_page(content: bytes, service_name: str, zip_code: str, year: str, make: str,
+                        model: str) -> Optional[Dict]:
+    """Kết quả báo giá từ trang /estimate (hàm top-level để gửi sang process con)"""
+    return _worker_scraper._parse_estimate_page(content, service_name, zip_code, year, make, model)
+
+# ---- Phần chạy trong process cha ----
+
+def _acquire(semaphore: threading.Semaphore, stop: threading.Event) -> bool:
+    """Chờ semaphore nhưng bỏ cuộc khi pipeline dừng"""
+    while not semaphore.acquire(timeout=0.2):
+        if stop.is_set():
+            return False
+    return True
+
+class QuotePipeline:
+    """Tra giá nhiều job qua ba tầng: tải trang (thread) -> phân tích (process) -> dựng kết quả.
+
+    Job là object có các thuộc tính service, zip_code, year, make, model (vd. bulk_quote.QuoteJob).
+    Thứ tự tier, cache, router và fallback giống `search_service_pricing`; trang dịch vụ dùng chung
+    cho nhiều xe chỉ được tải và phân tích một lần trong mỗi lượt `run`.
+    """
+
+    def __init__(self, scraper, fetch_workers: int = 8, parse_workers: Optional[int] = None,
+                 max_in_flight: Optional[int] = None, max_pending_parses: Optional[int] = None):
+        self.scraper = scraper
+        self.fetch_workers = fetch_workers
+        self.parse_workers = parse_workers or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight or fetch_workers * 4
+        self.max_pending_parses = max_pending_parses or self.parse_workers * 2
+        self._executor = None
+
+    def __enter__(self) -> "QuotePipeline":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.parse_workers, initializer=_init_worker, initargs=(self.scraper.parser,)
+            )
+        return self._executor
+
+    def close(self):
+        """Dừng process pool"""
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def run(self, jobs: Iterable[Any]) -> Iterator[Tuple[Any, Dict]]:
+        """Tra giá mọi job, trả về (job, kết quả) theo thứ tự hoàn thành"""
+        run = _PipelineRun(self, self._get_executor())
+        return run.results(jobs)
+
+class _PipelineRun:
+    """Trạng thái của một lượt `QuotePipeline.run`"""
+
+    def __init__(self, pipeline: QuotePipeline, executor: ProcessPoolExecutor):
+        self.scraper = pipeline.scraper
+        self.executor = executor
+        self.fetch_workers = pipeline.fetch_workers
+        self.fetch_queue = queue.Queue(maxsize=pipeline.max_in_flight)  # (job, tier còn lại hoặc None)
+        self.done_queue = queue.Queue()  # Không vượt quá max_in_flight job nhờ `window`
+        self.window = threading.Semaphore(pipeline.max_in_flight)
+        self.parse_slots = threading.Semaphore(pipeline.max_pending_parses)
+        self.stop = threading.Event()
+        self.pages = {}  # url -> Future các trường trang dịch vụ, dùng chung trong lượt chạy
+        self.pages_lock = threading.Lock()
+
+    def results(self, jobs: Iterable[Any]) -> Iterator[Tuple[Any, Dict]]:
+        threads = [threading.Thread(target=self._feed, args=(jobs,), name="pipeline-feed", daemon=True)]
+        threads += [
+            threading.Thread(target=self._fetch_loop, name=f"pipeline-fetch-{i}", daemon=True)
+            for i in range(self.fetch_workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        total, emitted = None, 0
+        try:
+            while total is None or emitted < total:
+                message = self.done_queue.get()
+                kind = message[0]
+                if kind == "fed":
+                    total = message[1]
+                elif kind == "error":
+                    raise message[1]
+                elif kind == "remember":
+                    self.scraper._remember_page(*message[1:])
+                else:
+                    job, result = self._collect(message)
+                    if result is None:
+                        continue
+                    emitted += 1
+                    metrics.QUOTES.inc(source=result.get('source', 'unknown'))
+                    self.window.release()
+                    yield job, result
+        finally:
+            self.stop.set()
+
+    def _feed(self, jobs: Iterable[Any]):
+        count = 0
+        try:
+            for job in jobs:
+                if not _acquire(self.window, self.stop):
+                    return
+                self.fetch_queue.put((job, None))
+                count += 1
+        except BaseException as e:
+            # Lỗi khi đọc job (kể cả KeyboardInterrupt từ generator đầu vào) được ném lại ở thread gọi run()
+            self.done_queue.put(("error", e))
+            return
+        self.done_queue.put(("fed", count))
+
+    def _fetch_loop(self):
+        while not self.stop.is_set():
+            try:
+                job, tiers = self.fetch_queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            try:
+                self._advance(job, tiers)
+            except Exception as e:
+                logger.error(f"Error getting pricing for {job.service}: {e}")
+                self.done_queue.put(("result", job, self._estimated(job, cache=False)))
+
+    def _advance(self, job: Any, tiers: Optional[list]):
+        """Chạy phần mạng của job cho đến khi cần phân tích HTML hoặc đã có kết quả"""
+        scraper = self.scraper
+        if tiers is None:
+            # Lượt đầu của job: tra cache, sau đó chọn các tier mạng theo thống kê của router
+            key = scraper.cache.make_key(job.service, job.zip_code, job.year, job.make, job.model)
+            with metrics.span('cache_lookup'):
+                cached = scraper.cache.get(key)
+            metrics.CACHE_LOOKUPS.inc(result='miss' if cached is None else 'hit')
+            if cached is not None:
+                self.done_queue.put(("result", job, cached))
+                return
+            tiers = scraper.router.plan(job.service)
+
+        while tiers:
+            tier, tiers = tiers[0], tiers[1:]
+            try:
+                if tier == 'service_page' and self._fetch_service_page(job, tiers):
+                    return
+                if tier == 'estimate_page' and self._fetch_estimate_page(job, tiers):
+                    return
+            except Exception as e:
+                logger.error(f"Error fetching {tier} for {job.service}: {e}")
+            scraper.router.record(job.service, tier, False)
+
+        self.done_queue.put(("result", job, self._estimated(job)))
+
+    def _fetch_service_page(self, job: Any, tiers: list) -> bool:
+        """Tải (hoặc dùng chung) trang dịch vụ; False nếu không có trang"""
+        url = self.scraper._find_service_page(job.service)
+        if not url:
+            return False
+
+        with self.pages_lock:
+            page = self.pages.get(url)
+            leader = page is None
+            if leader:
+                page = self.pages[url] = Future()
+        if leader:
+            self._load_page(url, page)
+        page.add_done_callback(lambda done: self.done_queue.put(("service_page", job, tiers, url, done)))
+        return True
+
+    def _load_page(self, url: str, page: Future):
+        """GET có điều kiện; 304 dùng lại trường đã lưu, 200 gửi bytes sang process pool"""
+        try:
+            entry, response = self.scraper._conditional_fetch(url)
+            if response is None:
+                page.set_result(entry["extracted"])
+                return
+            if not _acquire(self.parse_slots, self.stop):
+                raise RuntimeError("pipeline stopped")
+            parsed = self.executor.submit(parse_service_page, response.content)
+        except Exception as e:
+            self._forget_page(url, page, e)
+            return
+
+        def on_parsed(done: Future):
+            self.parse_slots.release()
+            try:
+                fields = done.result()
+            except Exception as e:
+                self._forget_page(url, page, e)
+                return
+            self.done_queue.put(("remember", url, response, fields))
+            page.set_result(fields)
+
+        parsed.add_done_callback(on_parsed)
+
+    def _forget_page(self, url: str, page: Future, error: Exception):
+        """Trang lỗi không được dùng chung để job sau trong lượt chạy thử tải lại"""
+        with self.pages_lock:
+            if self.pages.get(url) is page:
+                del self.pages[url]
+        page.set_exception(error)
+
+    def _fetch_estimate_page(self, job: Any, tiers: list) -> bool:
+        """Tải trang /estimate và gửi sang process pool; False nếu trang không trả về 200"""
+        scraper = self.scraper
+        params = scraper._estimate_request_params(job.service, job.zip_code, job.year, job.make, job.model)
+        response = scraper._request('GET', f"{scraper.base_url}/estimate", params=params, timeout=15)
+        if response.status_code != 200:
+            return False
+        if not _acquire(self.parse_slots, self.stop):
+            raise RuntimeError("pipeline stopped")
+        parsed = self.executor.submit(
+            parse_estimate_page, response.content, job.service, job.zip_code, job.year, job.make, job.model
+        )
+
+        def on_parsed(done: Future):
+            self.parse_slots.release()
+            self.done_queue.put(("estimate_page", job, tiers, done))
+
+        parsed.add_done_callback(on_parsed)
+        return True
+
+    def _collect(self, message: Tuple) -> Tuple[Any, Optional[Dict]]:
+        """Xử lý kết quả phân tích; tier thất bại thì trả job về tầng tải trang với các tier còn lại"""
+        kind, job = message[0], message[1]
+        if kind == "result":
+            return job, message[2]
+
+        scraper = self.scraper
+        tiers, done = message[2], message[-1]
+        try:
+            if kind == "service_page":
+                result = scraper._service_page_result(done.result(), message[3], job.zip_code, job.year,
+                                                      job.make, job.model)
+            else:
+                result = done.result()
+        except Exception as e:
+            logger.error(f"Error parsing {kind} for {job.service}: {e}")
+            result = None
+
+        scraper.router.record(job.service, kind, bool(result))
+        if result:
+            scraper.cache.set(scraper.cache.make_key(job.service, job.zip_code, job.year, job.make, job.model), result)
+            return job, result
+        self.fetch_queue.put((job, tiers))
+        return job, None
+
+    def _estimated(self, job: Any, cache: bool = True) -> Dict:
+        """Tier cuối: ước tính nội bộ"""
+        scraper = self.scraper
+        with metrics.span('tier_estimated'):
+            result = scraper._get_estimated_pricing(job.service, job.year, job.make, job.model)
+        if cache:
+            scraper.cache.set(scraper.cache.make_key(job.service, job.zip_code, job.year, job.make, job.model), result)
+        return result
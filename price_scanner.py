@@ -0,0 +1,59 @@
+"""
+Bộ quét giá dùng chung cho trang dịch vụ và trang estimate: pattern biên dịch sẵn,
+quét text đúng một lượt, trả về từng giá kèm ngữ cảnh xung quanh.
+"""
+
+import re
+from typing import Iterable, List, NamedTuple, Optional
+
+# Giá dạng $1,234.56 (dấu phẩy hàng nghìn và phần thập phân là tùy chọn)
+PRICE_PATTERN = re.compile(r'\$(\d+(?:,\d{3})*(?:\.\d{2})?)')
+
+# Khoảng giá hợp lý cho một dịch vụ sửa xe
+MIN_PRICE = 20
+MAX_PRICE = 5000
+
+class PriceToken(NamedTuple):
+    value: int      # Giá nguyên (bỏ phần cent)
+    raw: str        # Chuỗi gốc, ví dụ "$1,234.56"
+    start: int      # Vị trí trong text được quét
+    end: int
+    context: str    # Đoạn text xung quanh giá
+
+class PriceSummary(NamedTuple):
+    min_price: int
+    max_price: int
+    avg_price: int
+
+def _to_int(amount: str) -> int:
+    return int(amount.replace(',', '').split('.')[0])
+
+def scan_prices(text: str, context_chars: int = 40,
+                min_price: int = MIN_PRICE, max_price: int = MAX_PRICE) -> List[PriceToken]:
+    """Quét text một lượt, trả về mọi giá trong khoảng hợp lệ kèm ngữ cảnh"""
+    tokens = []
+    for match in PRICE_PATTERN.finditer(text):
+        value = _to_int(match.group(1))
+        if min_price <= value <= max_price:
+            start, end = match.span()
+            context = text[max(0, start - context_chars):end + context_chars].strip()
+            tokens.append(PriceToken(value, match.group(0), start, end, context))
+    return tokens
+
+def scan_price_values(text: str, min_price: int = MIN_PRICE, max_price: int = MAX_PRICE) -> List[int]:
+    """Như scan_prices nhưng chỉ trả về giá trị (đường nhanh cho hot path)"""
+    if '$' not in text:
+        return []
+    values = []
+    for amount in PRICE_PATTERN.findall(text):
+        value = _to_int(amount)
+        if min_price <= value <= max_price:
+            values.append(value)
+    return values
+
+def summarize_prices(prices: Iterable[int]) -> Optional[PriceSummary]:
+    """Giá thấp nhất, cao nhất và trung bình (chia nguyên); None nếu không có giá"""
+    prices = list(prices)
+    if not prices:
+        return None
+    return PriceSummary(min(prices), max(prices), sum(prices) // len(prices))
@@ -0,0 +1,205 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from quote_result import QuoteResult
+
+logger = logging.getLogger(__name__)
+
+# Đường dẫn mặc định cho tầng lưu trữ bền vững (mount volume trong Docker để giữ cache qua các lần restart)
+DEFAULT_CACHE_PATH = os.environ.get("YOURMECHANIC_CACHE_PATH", os.path.join("data", "quote_cache.sqlite"))
+
+# TTL (giây) theo nguồn báo giá: giá lấy từ website hết hạn sớm hơn giá ước tính
+DEFAULT_TTLS = {
+    "service_page": 6 * 3600,
+    "estimate_page": 6 * 3600,
+    "api": 6 * 3600,
+    "estimated": 7 * 24 * 3600,
+}
+
+class QuoteCache:
+    """Cache báo giá hai tầng: LRU trong bộ nhớ (giới hạn số entry) phía trước SQLite trên đĩa.
+
+    Mỗi entry có TTL theo `source` của kết quả. Tầng đĩa giúp cache còn "ấm" sau khi restart container.
+    Cùng database giữ validator HTTP (ETag/Last-Modified) và kết quả trích xuất của từng trang
+    để gửi conditional request và dùng lại kết quả khi server trả 304.
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_CACHE_PATH, max_entries: int = 2048,
+                 ttls: Optional[Dict[str, float]] = None, default_ttl: float = 6 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.default_ttl = default_ttl
+
+        self._memory = OrderedDict()  # key -> (expires_at, value)
+        self._pages = OrderedDict()   # url -> validator entry (chỉ dùng khi không có tầng đĩa)
+        self._lock = threading.RLock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "expired": 0, "evictions": 0, "writes": 0,
+                       "not_modified": 0}
+
+        self._db = None
+        if path:
+            try:
+                self._db = self._connect(path)
+            except sqlite3.Error as e:
+                logger.error(f"Cannot open quote cache at {path}, using memory only: {e}")
+
+    def _connect(self, path: str) -> sqlite3.Connection:
+        """Mở (và khởi tạo nếu cần) database SQLite"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS quotes ("
+            " key TEXT PRIMARY KEY, source TEXT, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS idx_quotes_expires ON quotes (expires_at)")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, extracted TEXT NOT NULL, fetched_at REAL NOT NULL)"
+        )
+        return db
+
+    @staticmethod
+    def make_key(service_name: str, zip_code: str, year: str, make: str, model: str) -> str:
+        """Tạo cache key chuẩn hóa cho một báo giá"""
+        parts = (service_name, zip_code, year, make, model)
+        return "|".join(str(part).strip().lower() for part in parts)
+
+    def ttl_for(self, value: Dict) -> float:
+        """TTL áp dụng cho một kết quả theo nguồn của nó"""
+        return self.ttls.get(value.get("source"), self.default_ttl)
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Lấy kết quả còn hạn, None nếu không có"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+                self._stats["expired"] += 1
+
+            if self._db is not None:
+                row = self._db.execute("SELECT value, expires_at FROM quotes WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    if row[1] > now:
+                        value = QuoteResult.from_dict(json.loads(row[0]))
+                        self._remember(key, row[1], value)
+                        self._stats["disk_hits"] += 1
+                        return value
+                    self._db.execute("DELETE FROM quotes WHERE key = ?", (key,))
+                    self._stats["expired"] += 1
+
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, key: str, value: Dict, ttl: Optional[float] = None):
+        """Lưu kết quả vào cả hai tầng (tầng bộ nhớ giữ dạng QuoteResult gọn nhẹ)"""
+        value = QuoteResult.from_dict(value)
+        expires_at = time.time() + (ttl if ttl is not None else self.ttl_for(value))
+        with self._lock:
+            self._remember(key, expires_at, value)
+            self._stats["writes"] += 1
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO quotes (key, source, value, expires_at) VALUES (?, ?, ?, ?)",
+                        (key, value.get("source"), json.dumps(value.to_dict(), ensure_ascii=False), expires_at),
+                    )
+                except sqlite3.Error as e:
+                    logger.error(f"Error writing quote cache: {e}")
+
+    def _remember(self, key: str, expires_at: float, value: Dict):
+        """Đưa entry vào tầng LRU, loại bỏ entry cũ nhất khi vượt giới hạn"""
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def get_page(self, url: str) -> Optional[Dict]:
+        """Validator và kết quả trích xuất đã lưu của một trang (etag, last_modified, extracted)"""
+        with self._lock:
+            if self._db is None:
+                entry = self._pages.get(url)
+                if entry is not None:
+                    self._pages.move_to_end(url)
+                return entry
+            row = self._db.execute(
+                "SELECT etag, last_modified, extracted FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"etag": row[0], "last_modified": row[1], "extracted": json.loads(row[2])}
+
+    def set_page(self, url: str, etag: Optional[str], last_modified: Optional[str], extracted):
+        """Lưu validator và kết quả trích xuất của một trang"""
+        with self._lock:
+            if self._db is None:
+                self._pages[url] = {"etag": etag, "last_modified": last_modified, "extracted": extracted}
+                self._pages.move_to_end(url)
+                while len(self._pages) > self.max_entries:
+                    self._pages.popitem(last=False)
+                return
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO pages (url, etag, last_modified, extracted, fetched_at)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (url, etag, last_modified, json.dumps(extracted, ensure_ascii=False), time.time()),
+                )
+            except sqlite3.Error as e:
+                logger.error(f"Error writing page validators: {e}")
+
+    def record_not_modified(self):
+        """Đếm một lần server trả 304 (dùng lại kết quả trích xuất)"""
+        with self._lock:
+            self._stats["not_modified"] += 1
+
+    def purge_expired(self) -> int:
+        """Xóa các entry đã hết hạn trên đĩa, trả về số entry đã xóa"""
+        if self._db is None:
+            return 0
+        with self._lock:
+            cursor = self._db.execute("DELETE FROM quotes WHERE expires_at <= ?", (time.time(),))
+            return cursor.rowcount
+
+    def clear(self):
+        """Xóa toàn bộ cache"""
+        with self._lock:
+            self._memory.clear()
+            self._pages.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM quotes")
+                self._db.execute("DELETE FROM pages")
+
+    def stats(self) -> Dict:
+        """Thống kê hit/miss của cache"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+            if self._db is not None:
+                stats["disk_entries"] = self._db.execute("SELECT COUNT(*) FROM quotes").fetchone()[0]
+                stats["page_entries"] = self._db.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+            else:
+                stats["page_entries"] = len(self._pages)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 3) if lookups else 0.0
+        return stats
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._memory)
@@ -0,0 +1,171 @@
+"""
+Kết quả báo giá gọn nhẹ thay cho dict lồng nhau: các trường nằm trong `__slots__`, các phần
+lặp lại giữa nhiều báo giá (bảo hành, thợ máy, phí, lịch hẹn, đánh giá...) được intern thành
+một bản chỉ đọc dùng chung (dict -> MappingProxyType, list -> tuple). Là một `Mapping` chỉ đọc
+(`result['avg_price']`, `get`, `in`, `keys`/`values`/`items`, `dict(result)`) nhưng không phải dict:
+dùng `to_dict()` (hoặc `as_dict`) khi serialize (JSON, file, database) hay cần dict/list lồng nhau thật.
+"""
+
+import sys
+import threading
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, Optional
+
+# Thứ tự khóa giống dict báo giá cũ (cột DataFrame, JSON giữ nguyên thứ tự)
+FIELDS = (
+    "service", "vehicle", "location", "min_price", "max_price", "avg_price", "labor_time",
+    "parts_included", "source", "service_description", "whats_included", "warranty_info",
+    "customer_rating", "mechanic_info", "cost_breakdown", "additional_fees", "availability",
+)
+
+# Các trường chuỗi có ít giá trị khác nhau: dùng sys.intern
+_STRING_FIELDS = frozenset(("vehicle", "location", "labor_time", "parts_included", "source"))
+
+# Giới hạn số phần được intern (các phần phụ thuộc giá như cost_breakdown có nhiều giá trị)
+MAX_INTERNED = 10000
+
+_MISSING = object()
+_set = object.__setattr__
+
+_interned = {}
+_interned_ids = set()  # id của các bản đã intern (sống suốt process): bỏ qua việc freeze lại
+_interned_lock = threading.Lock()
+
+_MAPPINGS = (dict, MappingProxyType)
+_SEQUENCES = (list, tuple)
+
+def _key(value: Any):
+    """Khóa hash được theo nội dung của một giá trị JSON"""
+    kind = type(value)
+    if kind is str:
+        return value
+    if kind in _MAPPINGS or kind in _SEQUENCES:
+        if id(value) in _interned_ids:
+            # Phần đã intern sống suốt process nên id của nó là khóa ổn định
+            return ("i", id(value))
+        if kind in _MAPPINGS:
+            return ("d",) + tuple((name, _key(item)) for name, item in value.items())
+        return ("l",) + tuple(_key(item) for item in value)
+    return (kind.__name__, value)
+
+def _freeze(value: Any) -> Any:
+    """Bản chỉ đọc của một giá trị JSON: dict -> MappingProxyType, list -> tuple"""
+    if type(value) in _MAPPINGS:
+        return MappingProxyType({name: intern_section(item) for name, item in value.items()})
+    return tuple(intern_section(item) for item in value)
+
+def intern_section(value: Any) -> Any:
+    """Bản chỉ đọc dùng chung của một phần báo giá (cùng nội dung -> cùng object)"""
+    kind = type(value)
+    if (kind not in _MAPPINGS and kind not in _SEQUENCES) or id(value) in _interned_ids:
+        return value
+    key = _key(value)
+    shared = _interned.get(key)
+    if shared is not None:
+        return shared
+    frozen = _freeze(value)
+    with _interned_lock:
+        shared = _interned.get(key)
+        if shared is not None:
+            return shared
+        if len(_interned) < MAX_INTERNED:
+            _interned[key] = frozen
+            _interned_ids.add(id(frozen))
+    return frozen
+
+def _thaw(value: Any) -> Any:
+    """Chuyển bản chỉ đọc về dict/list thường"""
+    kind = type(value)
+    if kind in _MAPPINGS:
+        return {name: _thaw(item) for name, item in value.items()}
+    if kind in _SEQUENCES:
+        return [_thaw(item) for item in value]
+    return value
+
+class QuoteResult(Mapping):
+    """Một báo giá; các trường không có mặt thì không xuất hiện trong `to_dict()` hay `in`"""
+
+    __slots__ = FIELDS + ("extra",)
+
+    def __init__(self, **fields):
+        extra = None
+        for name, value in fields.items():
+            if name not in _FIELD_SET:
+                if extra is None:
+                    extra = {}
+                extra[name] = intern_section(value)
+                continue
+            if name in _STRING_FIELDS and type(value) is str:
+                value = sys.intern(value)
+            _set(self, name, intern_section(value))
+        _set(self, "extra", extra)
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "QuoteResult":
+        if isinstance(data, cls):
+            return data
+        return cls(**data)
+
+    def to_dict(self) -> Dict:
+        """Dict thường (có thể sửa, serialize JSON) với cùng khóa và thứ tự như dict báo giá cũ"""
+        return {name: _thaw(value) for name, value in self._items()}
+
+    def __reduce__(self):
+        # MappingProxyType không pickle được: gửi dạng dict, intern lại ở process nhận
+        return (QuoteResult.from_dict, (self.to_dict(),))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("QuoteResult is read-only")
+
+    def __getitem__(self, name: str) -> Any:
+        value = getattr(self, name, _MISSING) if name in _FIELD_SET else _MISSING
+        if value is _MISSING:
+            if self.extra is not None and name in self.extra:
+                return self.extra[name]
+            raise KeyError(name)
+        return value
+
+    def get(self, name: str, default: Optional[Any] = None) -> Any:
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    def __contains__(self, name: str) -> bool:
+        try:
+            self[name]
+        except KeyError:
+            return False
+        return True
+
+    def _items(self) -> Iterator:
+        for name in FIELDS:
+            value = getattr(self, name, _MISSING)
+            if value is not _MISSING:
+                yield name, value
+        if self.extra is not None:
+            yield from self.extra.items()
+
+    def __iter__(self) -> Iterator[str]:
+        return (name for name, _ in self._items())
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self._items())
+
+    def __eq__(self, other) -> bool:
+        # So theo nội dung: phần chỉ đọc (MappingProxyType/tuple) bằng dict/list tương ứng
+        if isinstance(other, Mapping):
+            return self.to_dict() == _thaw(dict(other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"QuoteResult({self.get('service')!r}, {self.get('vehicle')!r}, source={self.get('source')!r})"
+
+_FIELD_SET = frozenset(FIELDS)
+
+def as_dict(result: Mapping) -> Dict:
+    """Dict thường của một báo giá (QuoteResult hoặc dict)"""
+    return result.to_dict() if isinstance(result, QuoteResult) else dict(result)
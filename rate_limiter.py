@@ -0,0 +1,245 @@
+"""
+Giới hạn tốc độ theo host: token bucket (số request mỗi giây) kết hợp giới hạn số request
+đồng thời tự điều chỉnh (AIMD), cùng lịch retry có jitter và deadline cho từng request.
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Status coi là site đang quá tải -> giảm song song và retry
+OVERLOAD_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+DEFAULT_RATE = float(os.environ.get("YOURMECHANIC_RATE_LIMIT", "10"))       # request/giây mỗi host
+DEFAULT_DEADLINE = float(os.environ.get("YOURMECHANIC_REQUEST_DEADLINE", "30"))  # giây cho mỗi request (kể cả retry)
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """Hết deadline của request trong lúc chờ lượt hoặc chờ retry"""
+
+class TokenBucket:
+    """Token bucket thread-safe: trung bình `rate` lượt/giây, cho phép dồn tối đa `burst` lượt"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def pause(self, seconds: float):
+        """Không cấp token trong `seconds` giây (ví dụ theo header Retry-After)"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def acquire(self, deadline: Optional[float] = None) -> bool:
+        """Chờ tới khi lấy được một token; False nếu quá deadline (theo time.monotonic)"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = max(self._paused_until - now, (1 - self._tokens) / self.rate if self.rate > 0 else 0.05)
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+class AdaptiveConcurrency:
+    """Giới hạn số request đồng thời kiểu AIMD.
+
+    Mỗi request thành công với độ trễ bình thường tăng giới hạn thêm 1/limit (≈ +1 mỗi vòng);
+    429/5xx/timeout nhân giới hạn với `backoff`, tối đa một lần cho mỗi khoảng độ trễ
+    để nhiều lỗi cùng lúc không làm giới hạn sụp về mức tối thiểu.
+    """
+
+    def __init__(self, initial: int = 4, min_limit: int = 1, max_limit: int = 32,
+                 backoff: float = 0.5, latency_tolerance: float = 2.0):
+        self.min_limit = min_limit
+        self.max_limit = max(max_limit, min_limit)
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+
+        self._limit = float(min(max(initial, min_limit), self.max_limit))
+        self._in_flight = 0
+        self._baseline = None     # Độ trễ nền (trung bình trượt chậm của các lần nhanh)
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def acquire(self, deadline: Optional[float] = None) -> bool:
+        """Chờ tới khi số request đang chạy dưới giới hạn; False nếu quá deadline"""
+        with self._cond:
+            while self._in_flight >= int(self._limit):
+                timeout = None if deadline is None else deadline - time.monotonic()
+                if timeout is not None and timeout <= 0:
+                    return False
+                self._cond.wait(timeout)
+            self._in_flight += 1
+            return True
+
+    def release(self, ok: bool, latency: Optional[float] = None):
+        """Trả lượt và điều chỉnh giới hạn theo kết quả request"""
+        with self._cond:
+            self._in_flight -= 1
+            now = time.monotonic()
+            if ok:
+                if latency is not None:
+                    healthy = self._baseline is None or latency <= self._baseline * self.latency_tolerance
+                    if self._baseline is None or latency < self._baseline:
+                        self._baseline = latency
+                    else:
+                        self._baseline += (latency - self._baseline) * 0.05
+                else:
+                    healthy = True
+                if healthy:
+                    self._limit = min(self.max_limit, self._limit + 1.0 / self._limit)
+            elif now - self._last_decrease > (self._baseline or 1.0):
+                self._limit = max(self.min_limit, self._limit * self.backoff)
+                self._last_decrease = now
+                logger.info(f"Backing off: concurrency limit now {int(self._limit)}")
+            self._cond.notify_all()
+
+class RetryPolicy:
+    """Retry với exponential backoff và full jitter"""
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0,
+                 retry_statuses=OVERLOAD_STATUSES):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_statuses = frozenset(retry_statuses)
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Thời gian chờ trước lần thử thứ `attempt + 1` (attempt tính từ 1)"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+class HostLimiter:
+    """Token bucket + giới hạn đồng thời cho một host"""
+
+    def __init__(self, rate: float, burst: Optional[float], initial: int, max_limit: int):
+        self.bucket = TokenBucket(rate, burst)
+        self.concurrency = AdaptiveConcurrency(initial=initial, max_limit=max_limit)
+
+class RateLimiter:
+    """Lập lịch request dùng chung: mọi request tới một host đi qua limiter của host đó"""
+
+    def __init__(self, rate: float = DEFAULT_RATE, burst: Optional[float] = None,
+                 initial_concurrency: int = 4, max_concurrency: int = 32,
+                 retry: Optional[RetryPolicy] = None, deadline: float = DEFAULT_DEADLINE):
+        self.rate = rate
+        self.burst = burst
+        self.initial_concurrency = initial_concurrency
+        self.max_concurrency = max_concurrency
+        self.retry = retry or RetryPolicy()
+        self.deadline = deadline
+
+        self._hosts = {}
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "retries": 0, "overloads": 0, "deadline_exceeded": 0}
+
+    def host(self, url: str) -> HostLimiter:
+        """Limiter của host trong URL (tạo lazy)"""
+        host = urlparse(url).netloc
+        with self._lock:
+            limiter = self._hosts.get(host)
+            if limiter is None:
+                limiter = HostLimiter(self.rate, self.burst, self.initial_concurrency, self.max_concurrency)
+                self._hosts[host] = limiter
+            return limiter
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def call(self, url: str, send: Callable[[Optional[float]], requests.Response],
+             timeout: Optional[float] = None, deadline: Optional[float] = None) -> requests.Response:
+        """Gọi `send(timeout)` dưới giới hạn của host, retry khi lỗi mạng hoặc site quá tải.
+
+        Trả về response cuối cùng (kể cả status lỗi sau khi hết lượt retry); ném lỗi mạng
+        cuối cùng hoặc DeadlineExceeded nếu không còn thời gian.
+        """
+        limiter = self.host(url)
+        expires = time.monotonic() + (deadline if deadline is not None else self.deadline)
+
+        for attempt in range(1, self.retry.max_attempts + 1):
+            if not (limiter.bucket.acquire(expires) and limiter.concurrency.acquire(expires)):
+                self._count("deadline_exceeded")
+                raise DeadlineExceeded(f"Deadline exceeded waiting for a slot: {url}")
+
+            remaining = expires - time.monotonic()
+            attempt_timeout = remaining if timeout is None else min(timeout, remaining)
+            started = time.monotonic()
+            self._count("requests")
+            try:
+                response = send(attempt_timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                limiter.concurrency.release(ok=False)
+                self._count("overloads")
+                error, response = e, None
+            except Exception:
+                limiter.concurrency.release(ok=True)
+                raise
+            else:
+                overloaded = response.status_code in OVERLOAD_STATUSES
+                limiter.concurrency.release(ok=not overloaded, latency=time.monotonic() - started)
+                if not overloaded:
+                    return response
+                self._count("overloads")
+                error = None
+
+            retry_after = _retry_after(response) if response is not None else None
+            if response is not None and response.status_code == 429 and retry_after:
+                limiter.bucket.pause(retry_after)
+
+            retryable = response is None or response.status_code in self.retry.retry_statuses
+            if attempt == self.retry.max_attempts or not retryable:
+                break
+            delay = self.retry.delay(attempt, retry_after)
+            if time.monotonic() + delay >= expires:
+                break
+            self._count("retries")
+            logger.debug(f"Retrying {url} in {delay:.2f}s (attempt {attempt})")
+            time.sleep(delay)
+
+        if response is not None:
+            return response
+        raise error
+
+    def stats(self) -> Dict:
+        """Thống kê request và giới hạn đồng thời hiện tại của từng host"""
+        with self._lock:
+            stats = dict(self._stats)
+            hosts = dict(self._hosts)
+        stats["hosts"] = {
+            host: {"limit": limiter.concurrency.limit, "in_flight": limiter.concurrency.in_flight}
+            for host, limiter in hosts.items()
+        }
+        return stats
@@ -3,8 +3,23 @@ from bs4 import BeautifulSoup
 import json
 import time
 import re
-from typing import Dict, List, Optional
-from urllib.parse import urljoin, quote
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Tuple
+from urllib.parse import urljoin, quote, urlparse
+from requests.adapters import HTTPAdapter
+from estimate_engine import price_multiplier, service_profile
+from extraction import page_fingerprint, price_engine, service_page_engine
+from html_parsers import make_soup, resolve_parser
+import metrics
+from quote_cache import QuoteCache
+from quote_result import QuoteResult, intern_section
+from rate_limiter import RateLimiter
+from service_catalog import ServiceCatalog
+from service_resolver import ServicePageResolver
+from singleflight import SingleFlight
+from snapshot_store import SnapshotStore
+from tier_router import TierRouter
+from price_scanner import summarize_prices
 # Removed fake_useragent import to fix linter error
 import logging
 
@@ -12,11 +27,76 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Pattern biên dịch sẵn
+SERVICE_LINK_PATTERN = re.compile(r'/services/[^/]+$')
+MAKES_SECTION_PATTERN = re.compile(r'We service most makes', re.I)
+SLUG_STOPWORDS_PATTERN = re.compile(r'\b(car|auto|vehicle)\b')
+SLUG_SPECIAL_CHARS_PATTERN = re.compile(r'[^\w\s-]')
+SLUG_SEPARATOR_PATTERN = re.compile(r'[-\s]+')
+
+# Các phần báo giá giống nhau giữa mọi dịch vụ: intern một lần, mọi QuoteResult dùng chung một bản
+WARRANTY_INFO = intern_section({
+    "parts_warranty": "12 months or 12,000 miles",
+    "labor_warranty": "12 months or 12,000 miles",
+    "coverage": "Nationwide warranty coverage",
+    "details": "Warranty covers defects in parts and workmanship"
+})
+MECHANIC_INFO = intern_section({
+    "certified_mechanics": True,
+    "average_experience": "8+ years",
+    "certifications": ["ASE Certified", "Manufacturer Trained"],
+    "background_checked": True,
+    "mobile_service": True,
+    "service_locations": ["At your location", "Home", "Office", "Parking lot"]
+})
+ADDITIONAL_FEES = intern_section({
+    "diagnostic_fee": 0,  # Usually waived if service is performed
+    "disposal_fee": 5,    # Environmental disposal fee
+    "service_fee": 0,     # No additional service fees
+    "travel_fee": 0,      # No travel fees within service area
+    "note": "All fees included in quoted price"
+})
+PAGE_AVAILABILITY = intern_section({
+    "same_day_available": True,
+    "typical_booking_time": "2-4 hours advance notice",
+    "service_hours": "7 AM - 7 PM",
+    "weekend_available": True,
+    "emergency_service": False,
+    "estimated_duration": "1-3 hours depending on service"
+})
+PAGE_RATING_BREAKDOWN = intern_section({"5_star": "68%", "4_star": "22%", "3_star": "7%", "2_star": "2%", "1_star": "1%"})
+ESTIMATED_RATING = intern_section({
+    "average_rating": 4.5,
+    "total_reviews": 234,
+    "rating_breakdown": {"5_star": "72%", "4_star": "20%", "3_star": "5%", "2_star": "2%", "1_star": "1%"}
+})
+
 class YourMechanicAdvancedScraper:
-    def __init__(self):
+    def __init__(self, max_workers: int = 8, per_host_limit: int = 4, cache: Optional[QuoteCache] = None,
+                 catalog: Optional[ServiceCatalog] = None, parser: Optional[str] = None,
+                 rate_limiter: Optional[RateLimiter] = None, snapshots: Optional[SnapshotStore] = None,
+                 router: Optional[TierRouter] = None):
         self.base_url = "https://www.yourmechanic.com"
+        
+        # Backend phân tích HTML (html.parser, lxml, html5lib); mặc định theo YOURMECHANIC_HTML_PARSER
+        self.parser = resolve_parser(parser)
         self.session = requests.Session()
         
+        # Giới hạn song song: số worker cho batch và số kết nối đồng thời ban đầu tới mỗi host
+        self.max_workers = max_workers
+        self.per_host_limit = per_host_limit
+        max_concurrency = max(max_workers, per_host_limit)
+        
+        # Mọi request đi qua rate limiter: token bucket + song song tự điều chỉnh, retry có jitter
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter(
+            initial_concurrency=per_host_limit, max_concurrency=max_concurrency
+        )
+        
+        # Connection pool đủ lớn để các worker tái sử dụng kết nối keep-alive
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_concurrency)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
         # Thiết lập headers để giống trình duyệt thật
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
@@ -27,18 +107,56 @@ class YourMechanicAdvancedScraper:
             'Upgrade-Insecure-Requests': '1',
         })
         
-        # Cache để tránh request liên tục
-        self.cache = {}
+        # Cache để tránh request liên tục (LRU trong bộ nhớ + SQLite trên đĩa, TTL theo nguồn)
+        self.cache = cache if cache is not None else QuoteCache()
+        
+        # Gộp các lượt tra/request trùng nhau đang chạy (theo cache key, slug, URL)
+        self._flights = SingleFlight()
+        
+        # Ghi nhớ slug -> URL trang dịch vụ (kể cả kết quả không tìm thấy)
+        self.resolver = ServicePageResolver(max_workers=per_host_limit)
+        
+        # Chỉ mục dịch vụ dựng sẵn từ /services và sitemap: tra cứu trực tiếp, không cần HEAD probe
+        self.catalog = catalog if catalog is not None else ServiceCatalog()
         
-    def get_service_categories_from_website(self) -> Dict[str, List[str]]:
+        # Lưu HTML thô của mọi trang đã tải (nén, theo sha256) để trích xuất lại offline
+        self.snapshots = snapshots if snapshots is not None else SnapshotStore()
+        
+        # Thống kê thành công theo (dịch vụ, tier nguồn) để bỏ qua các tier mạng luôn thất bại
+        self.router = router if router is not None else TierRouter()
+        
+    def get_service_categories_from_website(self, conditional: bool = True) -> Dict[str, List[str]]:
         """Lấy danh sách dịch vụ thực tế từ website theo cấu trúc mới"""
         try:
-            response = self.session.get(f"{self.base_url}/services", timeout=15)
-            response.raise_for_status()
+            categories = self.fetch_service_categories(conditional=conditional)
+            return categories or self._get_updated_fallback_categories()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+        except Exception as e:
+            logger.error(f"Error fetching service categories: {e}")
+            return self._get_updated_fallback_categories()
+    
+    def fetch_service_categories(self, conditional: bool = True) -> Optional[Dict[str, List[str]]]:
+        """Danh mục dịch vụ từ website, không dùng dự phòng: lỗi mạng ném exception, None nếu trang không có danh mục"""
+        # 304 chỉ trả lại danh mục đã lưu, không nạp chỉ mục dịch vụ: chỉ mục còn rỗng (vd. sau khi khởi động lại)
+        # thì tải trang đầy đủ để update_from_soup chạy lại
+        return self._conditional_get(
+            f"{self.base_url}/services", self._extract_service_categories,
+            conditional=conditional and len(self.catalog) > 0
+        )
+    
+    def _parse_service_categories(self, content: bytes) -> Dict[str, List[str]]:
+        """Phân tích HTML trang /services thành danh mục dịch vụ"""
+        return self._extract_service_categories(content) or self._get_updated_fallback_categories()
+    
+    def _extract_service_categories(self, content: bytes) -> Optional[Dict[str, List[str]]]:
+        """Danh mục dịch vụ tìm thấy trong trang /services, None nếu không tìm thấy"""
+        try:
+            soup = self._make_soup(content)
             categories = {}
             
+            # Cập nhật chỉ mục dịch vụ từ cùng soup
+            self.catalog.update_from_soup(soup, self.base_url)
+            
             # Tìm các heading h2 chứa tên danh mục (## Battery, ## Brakes, etc.)
             category_headings = soup.find_all('h2')
             
@@ -79,7 +197,7 @@ class YourMechanicAdvancedScraper:
             # Nếu không tìm thấy categories theo cách trên, thử cách khác
             if not categories:
                 # Tìm tất cả links có pattern /services/
-                all_service_links = soup.find_all('a', href=re.compile(r'/services/[^/]+$'))
+                all_service_links = soup.find_all('a', href=SERVICE_LINK_PATTERN)
                 general_services = []
                 
                 for link in all_service_links:
@@ -91,11 +209,38 @@ class YourMechanicAdvancedScraper:
                     # Nhóm services theo từ khóa chính
                     categories = self._group_services_by_keywords(general_services[:50])
             
-            return categories if categories else self._get_updated_fallback_categories()
+            return categories or None
             
         except Exception as e:
-            logger.error(f"Error fetching service categories: {e}")
-            return self._get_updated_fallback_categories()
+            logger.error(f"Error parsing service categories: {e}")
+            return None
+    
+    def refresh_catalog(self, save: bool = True) -> int:
+        """Crawl lại /services và sitemap để dựng chỉ mục dịch vụ, trả về số dịch vụ trong chỉ mục"""
+        # Trang /services: get_service_categories_from_website cập nhật chỉ mục từ cùng soup
+        # (tải lại toàn bộ, vì phản hồi 304 không có soup để cập nhật chỉ mục)
+        self.get_service_categories_from_website(conditional=False)
+        
+        # Sitemap (có thể là sitemap index trỏ tới các sitemap con)
+        pending = [f"{self.base_url}/sitemap.xml"]
+        visited = set()
+        while pending and len(visited) < 50:
+            sitemap_url = pending.pop(0)
+            if sitemap_url in visited:
+                continue
+            visited.add(sitemap_url)
+            try:
+                response = self._request('GET', sitemap_url, timeout=15)
+                response.raise_for_status()
+                children = self.catalog.update_from_sitemap(response.content)
+                pending.extend(url for url in children if 'service' in url.lower())
+            except Exception as e:
+                logger.error(f"Error fetching sitemap {sitemap_url}: {e}")
+        
+        self.catalog.mark_built()
+        if save and self.catalog.path:
+            self.catalog.save()
+        return len(self.catalog)
     
     def _group_services_by_keywords(self, services: List[str]) -> Dict[str, List[str]]:
         """Nhóm các dịch vụ theo từ khóa chính"""
@@ -231,29 +376,44 @@ class YourMechanicAdvancedScraper:
     def get_vehicle_makes(self) -> List[str]:
         """Lấy danh sách hãng xe từ website"""
         try:
-            # Thử lấy từ trang chính
-            response = self.session.get(self.base_url, timeout=10)
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Tìm section "We service most makes and models"
-            makes_section = soup.find(text=re.compile(r'We service most makes', re.I))
-            if makes_section:
-                parent = makes_section.find_parent()
-                if parent:
-                    # Tìm các link hoặc text chứa tên hãng xe
-                    make_elements = parent.find_all(['a', 'div', 'span'])
-                    makes = []
-                    for elem in make_elements:
-                        text = elem.get_text(strip=True)
-                        # Kiểm tra nếu text là tên hãng xe (chữ cái đầu viết hoa, độ dài hợp lý)
-                        if text and text[0].isupper() and 3 <= len(text) <= 20 and not any(char.isdigit() for char in text):
-                            makes.append(text)
-                    
-                    if makes:
-                        return list(set(makes))  # Remove duplicates
+            makes = self.fetch_vehicle_makes()
+            if makes:
+                return makes
         except Exception as e:
             logger.error(f"Error fetching vehicle makes: {e}")
         
+        return self._get_fallback_makes()
+    
+    def fetch_vehicle_makes(self) -> List[str]:
+        """Hãng xe từ trang chính, không dùng dự phòng: lỗi mạng ném exception, rỗng nếu không tìm thấy"""
+        response = self._request('GET', self.base_url, timeout=10)
+        response.raise_for_status()
+        return self._parse_vehicle_makes(response.content)
+    
+    def _parse_vehicle_makes(self, content: bytes) -> List[str]:
+        """Phân tích HTML trang chủ để lấy danh sách hãng xe"""
+        soup = self._make_soup(content)
+        
+        # Tìm section "We service most makes and models"
+        makes_section = soup.find(text=MAKES_SECTION_PATTERN)
+        if makes_section:
+            parent = makes_section.find_parent()
+            if parent:
+                # Tìm các link hoặc text chứa tên hãng xe
+                make_elements = parent.find_all(['a', 'div', 'span'])
+                makes = []
+                for elem in make_elements:
+                    text = elem.get_text(strip=True)
+                    # Kiểm tra nếu text là tên hãng xe (chữ cái đầu viết hoa, độ dài hợp lý)
+                    if text and text[0].isupper() and 3 <= len(text) <= 20 and not any(char.isdigit() for char in text):
+                        makes.append(text)
+                
+                if makes:
+                    return list(set(makes))  # Remove duplicates
+        return []
+    
+    def _get_fallback_makes(self) -> List[str]:
+        """Danh sách hãng xe dự phòng"""
         # Enhanced fallback list based on actual YourMechanic supported makes
         return [
             "Acura", "Audi", "BMW", "Buick", "Cadillac", "Chevrolet", "Chrysler", 
@@ -263,34 +423,133 @@ class YourMechanicAdvancedScraper:
             "Subaru", "Toyota", "Volkswagen", "Volvo"
         ]
     
+    def _make_soup(self, content) -> BeautifulSoup:
+        """Phân tích HTML bằng backend đã cấu hình"""
+        with metrics.span('parse'):
+            return make_soup(content, self.parser)
+    
+    def _request(self, method: str, url: str, deadline: Optional[float] = None, **kwargs) -> requests.Response:
+        """Gửi request qua session dưới rate limiter của host (retry khi lỗi mạng hoặc 429/5xx)"""
+        timeout = kwargs.pop('timeout', None)
+        with metrics.span('http_request'):
+            response = self.rate_limiter.call(
+                url,
+                lambda attempt_timeout: self._send(method, url, attempt_timeout, **kwargs),
+                timeout=timeout,
+                deadline=deadline,
+            )
+        if method == 'GET' and response.status_code == 200:
+            self.snapshots.submit(response.url, response.content, self._snapshot_kind(url))
+        return response
+    
+    def _send(self, method: str, url: str, timeout: Optional[float], **kwargs) -> requests.Response:
+        """Một lần gửi request: đo connect + TTFB (response.elapsed) và thời gian tải body"""
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, timeout=timeout, **kwargs)
+        except requests.RequestException:
+            metrics.HTTP_REQUESTS.inc(method=method, status='error')
+            raise
+        total = time.perf_counter() - start
+        # requests không tách riêng DNS/connect: elapsed tính từ lúc gửi tới khi nhận xong header
+        ttfb = response.elapsed.total_seconds()
+        metrics.observe_stage('http_connect_ttfb', ttfb)
+        metrics.observe_stage('http_download', max(0.0, total - ttfb))
+        metrics.HTTP_REQUESTS.inc(method=method, status=response.status_code)
+        return response
+    
+    def _snapshot_kind(self, url: str) -> str:
+        """Loại trang theo đường dẫn, dùng để lọc khi trích xuất lại từ kho snapshot"""
+        path = urlparse(url).path.rstrip('/')
+        if not path:
+            return 'homepage'
+        if path == '/services':
+            return 'services_index'
+        if path.startswith('/services/'):
+            return 'service_page'
+        if path == '/estimate':
+            return 'estimate'
+        if path.endswith('.xml'):
+            return 'sitemap'
+        return 'other'
+    
+    def search_services_pricing_batch(self, services: List[str], zip_code: str = "10001",
+                                      year: str = "2020", make: str = "Toyota", model: str = "Camry",
+                                      max_workers: Optional[int] = None) -> Iterator[Tuple[int, str, QuoteResult]]:
+        """Tra giá nhiều dịch vụ song song, trả về (index, service, result) ngay khi từng dịch vụ xong"""
+        if not services:
+            return
+        
+        workers = min(max_workers or self.max_workers, len(services))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="quote") as executor:
+            futures = {
+                executor.submit(self.search_service_pricing, service, zip_code, year, make, model): (i, service)
+                for i, service in enumerate(services)
+            }
+            for future in as_completed(futures):
+                i, service = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"Error getting pricing for {service}: {e}")
+                    result = self._get_estimated_pricing(service, year, make, model)
+                yield i, service, result
+    
     def search_service_pricing(self, service_name: str, zip_code: str = "10001", 
-                              year: str = "2020", make: str = "Toyota", model: str = "Camry") -> Dict:
+                              year: str = "2020", make: str = "Toyota", model: str = "Camry") -> QuoteResult:
         """Tìm kiếm giá dịch vụ thực tế từ website"""
         
-        cache_key = f"{service_name}_{zip_code}_{year}_{make}_{model}"
-        if cache_key in self.cache:
-            return self.cache[cache_key]
+        with metrics.span('quote'):
+            cache_key = self.cache.make_key(service_name, zip_code, year, make, model)
+            with metrics.span('cache_lookup'):
+                result = self.cache.get(cache_key)
+            metrics.CACHE_LOOKUPS.inc(result='miss' if result is None else 'hit')
+            
+            if result is None:
+                # Các lượt tra cùng key đang chạy dùng chung một kết quả
+                result = self._flights.do(
+                    ('quote', cache_key),
+                    lambda: self._lookup_service_pricing(cache_key, service_name, zip_code, year, make, model)
+                )
         
+        metrics.QUOTES.inc(source=result.get('source', 'unknown'))
+        return result
+    
+    def _lookup_service_pricing(self, cache_key: str, service_name: str, zip_code: str,
+                                year: str, make: str, model: str) -> QuoteResult:
+        """Tra giá qua các nguồn theo thứ tự ưu tiên và lưu vào cache"""
         try:
+            # Bỏ qua các tier mạng luôn thất bại với dịch vụ này (thỉnh thoảng vẫn thử lại)
+            tiers = self.router.plan(service_name)
+            
             # Method 1: Thử tìm trang dịch vụ cụ thể
-            service_url = self._find_service_page(service_name)
-            if service_url:
-                pricing_info = self._extract_pricing_from_service_page(
-                    service_url, zip_code, year, make, model
-                )
+            if 'service_page' in tiers:
+                with metrics.span('tier_service_page'):
+                    service_url = self._find_service_page(service_name)
+                    pricing_info = None
+                    if service_url:
+                        pricing_info = self._extract_pricing_from_service_page(
+                            service_url, zip_code, year, make, model
+                        )
+                self.router.record(service_name, 'service_page', bool(pricing_info))
                 if pricing_info:
-                    self.cache[cache_key] = pricing_info
+                    self.cache.set(cache_key, pricing_info)
                     return pricing_info
             
             # Method 2: Thử sử dụng quote API
-            quote_info = self._get_quote_via_api(service_name, zip_code, year, make, model)
-            if quote_info:
-                self.cache[cache_key] = quote_info
-                return quote_info
+            if 'estimate_page' in tiers:
+                with metrics.span('tier_estimate_page'):
+                    quote_info = self._get_quote_via_api(service_name, zip_code, year, make, model,
+                                                         fallback_service_page='service_page' in tiers)
+                self._record_quote_source(service_name, quote_info)
+                if quote_info:
+                    self.cache.set(cache_key, quote_info)
+                    return quote_info
             
             # Method 3: Fallback - estimated pricing
-            estimated_pricing = self._get_estimated_pricing(service_name, year, make, model)
-            self.cache[cache_key] = estimated_pricing
+            with metrics.span('tier_estimated'):
+                estimated_pricing = self._get_estimated_pricing(service_name, year, make, model)
+            self.cache.set(cache_key, estimated_pricing)
             return estimated_pricing
             
         except Exception as e:
@@ -299,14 +558,59 @@ class YourMechanicAdvancedScraper:
     
     def _find_service_page(self, service_name: str) -> Optional[str]:
         """Tìm URL trang dịch vụ cụ thể theo cấu trúc thực tế của YourMechanic"""
-        # Chuẩn hóa tên dịch vụ thành URL slug theo format YourMechanic
+        in_catalog, url = self._catalog_service_page(service_name)
+        if in_catalog:
+            return url
+        
+        # Resolver ghi nhớ kết quả theo slug và probe các ứng viên song song
+        slug = self._service_slug(service_name)
+        url = self._flights.do(('resolve', slug), lambda: self.resolver.resolve(
+            slug,
+            self._candidate_service_urls(service_name),
+            self._probe_service_url,
+        ))
+        if url:
+            logger.info(f"Found service page: {url}")
+        else:
+            logger.warning(f"Could not find service page for: {service_name}")
+        return url
+    
+    def _catalog_service_page(self, service_name: str) -> Tuple[bool, Optional[str]]:
+        """Tra URL trong chỉ mục dịch vụ; trả về (chỉ mục có dữ liệu, url)"""
+        if not len(self.catalog):
+            return False, None
+        
+        entry = self.catalog.lookup(service_name)
+        if entry:
+            return True, entry["url"]
+        logger.warning(f"Service not in catalog: {service_name}")
+        return True, None
+    
+    def _probe_service_url(self, url: str) -> Optional[bool]:
+        """HEAD request kiểm tra URL có tồn tại, None nếu lỗi mạng"""
+        try:
+            status_code = self._flights.do(
+                ('HEAD', url),
+                lambda: self._request('HEAD', url, timeout=10, allow_redirects=False).status_code
+            )
+            return status_code == 200
+        except Exception as e:
+            logger.debug(f"Failed to check {url}: {e}")
+            return None
+    
+    def _service_slug(self, service_name: str) -> str:
+        """Chuẩn hóa tên dịch vụ thành URL slug theo format YourMechanic"""
         slug = service_name.lower()
         
         # Loại bỏ các từ không cần thiết và chuẩn hóa
-        slug = re.sub(r'\b(car|auto|vehicle)\b', '', slug)  # Remove common prefixes
-        slug = re.sub(r'[^\w\s-]', '', slug)  # Remove special characters
-        slug = re.sub(r'[-\s]+', '-', slug)   # Replace spaces with hyphens
-        slug = slug.strip('-')  # Remove leading/trailing hyphens
+        slug = SLUG_STOPWORDS_PATTERN.sub('', slug)  # Remove common prefixes
+        slug = SLUG_SPECIAL_CHARS_PATTERN.sub('', slug)  # Remove special characters
+        slug = SLUG_SEPARATOR_PATTERN.sub('-', slug)  # Replace spaces with hyphens
+        return slug.strip('-')  # Remove leading/trailing hyphens
+    
+    def _candidate_service_urls(self, service_name: str) -> List[str]:
+        """Sinh danh sách URL có thể là trang dịch vụ, theo thứ tự ưu tiên"""
+        slug = self._service_slug(service_name)
         
         # YourMechanic sử dụng format /services/service-name-replacement
         potential_urls = [
@@ -332,48 +636,93 @@ class YourMechanicAdvancedScraper:
                 f"{self.base_url}/services/{slug}"
             ])
         
-        for url in potential_urls:
-            try:
-                response = self.session.head(url, timeout=10)
-                if response.status_code == 200:
-                    logger.info(f"Found service page: {url}")
-                    return url
-            except Exception as e:
-                logger.debug(f"Failed to check {url}: {e}")
-                continue
-        
-        logger.warning(f"Could not find service page for: {service_name}")
-        return None
+        return potential_urls
+    
+    def _conditional_get(self, url: str, extract: Callable[[bytes], Any], conditional: bool = True,
+                         timeout: float = 15) -> Any:
+        """GET trang kèm validator đã lưu; server trả 304 thì dùng lại kết quả trích xuất, không phân tích lại"""
+        entry, response = self._conditional_fetch(url, conditional, timeout)
+        if response is None:
+            return entry["extracted"]
+        
+        extracted = extract(response.content)
+        self._remember_page(url, response, extracted)
+        return extracted
+    
+    def _conditional_fetch(self, url: str, conditional: bool = True,
+                           timeout: float = 15) -> Tuple[Optional[Dict], Optional[requests.Response]]:
+        """Phần mạng của _conditional_get: (entry đã lưu, None) khi 304, ngược lại (None, response 200)"""
+        entry = self.cache.get_page(url) if conditional else None
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers['If-None-Match'] = entry["etag"]
+            if entry.get("last_modified"):
+                headers['If-Modified-Since'] = entry["last_modified"]
+        
+        response = self._request('GET', url, headers=headers, timeout=timeout)
+        if response.status_code == 304 and entry:
+            self.cache.record_not_modified()
+            logger.debug(f"Not modified: {url}")
+            return entry, None
+        response.raise_for_status()
+        return None, response
+    
+    def _remember_page(self, url: str, response: requests.Response, extracted: Any):
+        """Lưu kết quả trích xuất cùng validator của response để lần sau gửi GET có điều kiện"""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if extracted is not None and (etag or last_modified):
+            self.cache.set_page(url, etag, last_modified, extracted)
     
     def _extract_pricing_from_service_page(self, url: str, zip_code: str, year: str, make: str, model: str) -> Optional[Dict]:
         """Trích xuất thông tin giá từ trang dịch vụ"""
         try:
-            response = self.session.get(url, timeout=15)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Tìm thông tin giá
-            price_elements = soup.find_all(text=re.compile(r'\$\d+'))
-            prices = []
-            
-            for element in price_elements:
-                # Extract numeric values from price strings
-                price_matches = re.findall(r'\$(\d+(?:,\d{3})*(?:\.\d{2})?)', element)
-                for match in price_matches:
-                    price = int(match.replace(',', '').split('.')[0])
-                    if 20 <= price <= 5000:  # Reasonable price range
-                        prices.append(price)
-            
-            if prices:
-                min_price = min(prices)
-                max_price = max(prices)
-                avg_price = sum(prices) // len(prices)
+            # Nhiều xe cùng dịch vụ chỉ tải và phân tích trang một lần, mỗi caller dựng kết quả theo xe của mình
+            page = self._flights.do(('GET', url), lambda: self._conditional_get(url, self._service_page_fields))
+            return self._service_page_result(page, url, zip_code, year, make, model)
+        
+        except Exception as e:
+            logger.error(f"Error extracting pricing from {url}: {e}")
+        
+        return None
+    
+    def _parse_service_page(self, content: bytes, url: str, zip_code: str, year: str, make: str, model: str,
+                            fingerprint: Optional[int] = None) -> Optional[Dict]:
+        """Phân tích HTML trang dịch vụ thành kết quả báo giá"""
+        try:
+            page = self._service_page_fields(content, fingerprint)
+        except Exception as e:
+            logger.error(f"Error parsing service page {url}: {e}")
+            return None
+        return self._service_page_result(page, url, zip_code, year, make, model)
+    
+    def _service_page_fields(self, content: bytes, fingerprint: Optional[int] = None) -> Dict:
+        """Các trường không phụ thuộc xe của trang dịch vụ (lưu được dạng JSON cùng validator)"""
+        soup = self._make_soup(content)
+        
+        # Một lượt duyệt cây cho mọi trường: giá, mô tả, danh sách bao gồm
+        # (lấy mẫu một phần trang để đo thời gian từng extractor)
+        timings = {} if metrics.sample_extractors() else None
+        with metrics.span('extract'):
+            fields = service_page_engine.run(soup, timings)
+        for field, seconds in (timings or {}).items():
+            metrics.observe_stage(f'extract_{field}', seconds)
+        fields['fingerprint'] = fingerprint if fingerprint is not None else page_fingerprint(content)
+        return fields
+    
+    def _service_page_result(self, page: Dict, url: str, zip_code: str, year: str, make: str,
+                             model: str) -> Optional[QuoteResult]:
+        """Dựng kết quả báo giá cho một xe từ các trường đã trích xuất của trang dịch vụ"""
+        try:
+            summary = summarize_prices(page['prices'])
+            if summary:
+                min_price, max_price, avg_price = summary
                 
                 # Extract detailed information
-                detailed_info = self._extract_detailed_service_info(soup, url)
+                detailed_info = self._extract_detailed_service_info(None, url, page, page['fingerprint'])
                 
-                return {
+                return QuoteResult.from_dict({
                     "service": self._extract_service_name_from_url(url),
                     "vehicle": f"{year} {make} {model}",
                     "location": zip_code,
@@ -384,39 +733,34 @@ class YourMechanicAdvancedScraper:
                     "parts_included": "Varies by service",
                     "source": "service_page",
                     **detailed_info
-                }
+                })
         
         except Exception as e:
-            logger.error(f"Error extracting pricing from {url}: {e}")
+            logger.error(f"Error parsing service page {url}: {e}")
         
         return None
     
-    def _extract_detailed_service_info(self, soup: BeautifulSoup, url: str) -> Dict:
+    def _extract_detailed_service_info(self, soup: Optional[BeautifulSoup], url: str, fields: Optional[Dict] = None,
+                                       fingerprint: Optional[int] = None) -> Dict:
         """Trích xuất thông tin chi tiết về dịch vụ"""
         details = {}
         
         try:
+            # Các trường lấy từ cây HTML (dùng lại kết quả của lượt duyệt trước nếu có)
+            if fields is None:
+                fields = service_page_engine.run(soup)
+            
             # Service description
-            desc_elements = soup.find_all(['p', 'div'], class_=re.compile(r'description|overview|about', re.I))
-            descriptions = []
-            for elem in desc_elements:
-                if hasattr(elem, 'get_text'):
-                    text = elem.get_text(strip=True)
-                    if len(text) > 50 and len(text) < 500:
-                        descriptions.append(text)
-            details['service_description'] = descriptions[0] if descriptions else "Detailed service information available"
+            details['service_description'] = fields['service_description']
             
             # What's included/excluded
-            included_elements = soup.find_all(text=re.compile(r'include|what.s included', re.I))
-            details['whats_included'] = self._extract_service_includes(soup)
+            details['whats_included'] = fields['whats_included']
             
             # Warranty information
-            warranty_elements = soup.find_all(text=re.compile(r'warranty|guarantee', re.I))
             details['warranty_info'] = self._extract_warranty_info(soup)
             
             # Customer ratings
-            rating_elements = soup.find_all(['span', 'div'], class_=re.compile(r'rating|star|review', re.I))
-            details['customer_rating'] = self._extract_rating_info(soup)
+            details['customer_rating'] = self._extract_rating_info(fields.get('rating'), fingerprint)
             
             # Mechanic information
             details['mechanic_info'] = self._extract_mechanic_info(soup)
@@ -435,67 +779,31 @@ class YourMechanicAdvancedScraper:
             
         return details
     
-    def _extract_service_includes(self, soup: BeautifulSoup) -> List[str]:
-        """Trích xuất thông tin những gì được bao gồm trong dịch vụ"""
-        includes = []
-        
-        # Common service inclusions by type
-        fallback_includes = [
-            "✅ Diagnostic inspection",
-            "✅ Professional installation", 
-            "✅ Quality parts",
-            "✅ Post-service testing",
-            "✅ Clean-up after service"
-        ]
-        
-        try:
-            # Look for bullet points or lists
-            list_elements = soup.find_all(['ul', 'ol', 'li'])
-            for elem in list_elements:
-                if hasattr(elem, 'get_text'):
-                    text = elem.get_text(strip=True)
-                    if any(word in text.lower() for word in ['include', 'service', 'repair', 'replacement']):
-                        if len(text) > 10 and len(text) < 100:
-                            includes.append(f"✅ {text}")
-            
-            return includes[:5] if includes else fallback_includes
-            
-        except:
-            return fallback_includes
-    
-    def _extract_warranty_info(self, soup: BeautifulSoup) -> Dict:
+    def _extract_warranty_info(self, soup: BeautifulSoup) -> Mapping:
         """Trích xuất thông tin bảo hành"""
-        return {
-            "parts_warranty": "12 months or 12,000 miles",
-            "labor_warranty": "12 months or 12,000 miles", 
-            "coverage": "Nationwide warranty coverage",
-            "details": "Warranty covers defects in parts and workmanship"
-        }
+        return WARRANTY_INFO
     
-    def _extract_rating_info(self, soup: BeautifulSoup) -> Dict:
+    def _extract_rating_info(self, page_rating: Optional[Dict] = None, fingerprint: Optional[int] = None) -> Dict:
         """Trích xuất thông tin đánh giá"""
+        if page_rating:
+            # Đánh giá thực tế từ markup của trang
+            average_rating = page_rating["average_rating"]
+            total_reviews = page_rating.get("total_reviews") or 0
+        else:
+            # Simulated realistic rating, ổn định theo dấu vân tay nội dung trang
+            fingerprint = fingerprint or 0
+            average_rating = round(4.2 + (fingerprint % 8) / 10, 1)
+            total_reviews = 150 + ((fingerprint >> 8) % 500)
+        
         return {
-            "average_rating": round(4.2 + (hash(str(soup)[:50]) % 8) / 10, 1),  # Simulated realistic rating
-            "total_reviews": 150 + (hash(str(soup)[:30]) % 500),
-            "rating_breakdown": {
-                "5_star": "68%",
-                "4_star": "22%", 
-                "3_star": "7%",
-                "2_star": "2%",
-                "1_star": "1%"
-            }
+            "average_rating": average_rating,
+            "total_reviews": total_reviews,
+            "rating_breakdown": PAGE_RATING_BREAKDOWN
         }
     
-    def _extract_mechanic_info(self, soup: BeautifulSoup) -> Dict:
+    def _extract_mechanic_info(self, soup: BeautifulSoup) -> Mapping:
         """Trích xuất thông tin về thợ máy"""
-        return {
-            "certified_mechanics": True,
-            "average_experience": "8+ years",
-            "certifications": ["ASE Certified", "Manufacturer Trained"],
-            "background_checked": True,
-            "mobile_service": True,
-            "service_locations": ["At your location", "Home", "Office", "Parking lot"]
-        }
+        return MECHANIC_INFO
     
     def _estimate_cost_breakdown(self, total_price: int) -> Dict:
         """Ước tính phân tích chi phí parts vs labor"""
@@ -514,78 +822,44 @@ class YourMechanicAdvancedScraper:
             "taxes": int(total_price * 0.08)  # 8% estimated tax
         }
     
-    def _extract_additional_fees(self, soup: BeautifulSoup) -> Dict:
+    def _extract_additional_fees(self, soup: BeautifulSoup) -> Mapping:
         """Trích xuất thông tin phí bổ sung"""
-        return {
-            "diagnostic_fee": 0,  # Usually waived if service is performed
-            "disposal_fee": 5,    # Environmental disposal fee
-            "service_fee": 0,     # No additional service fees
-            "travel_fee": 0,      # No travel fees within service area
-            "note": "All fees included in quoted price"
-        }
+        return ADDITIONAL_FEES
     
-    def _extract_availability_info(self, soup: BeautifulSoup) -> Dict:
+    def _extract_availability_info(self, soup: BeautifulSoup) -> Mapping:
         """Trích xuất thông tin về lịch hẹn"""
-        return {
-            "same_day_available": True,
-            "typical_booking_time": "2-4 hours advance notice",
-            "service_hours": "7 AM - 7 PM",
-            "weekend_available": True,
-            "emergency_service": False,
-            "estimated_duration": "1-3 hours depending on service"
-        }
+        return PAGE_AVAILABILITY
+    
+    def _record_quote_source(self, service_name: str, quote_info: Optional[Dict]):
+        """Ghi nhận tier estimate_page theo nguồn thực tế: kết quả từ fallback trang dịch vụ tính cho service_page"""
+        source = quote_info.get('source') if quote_info else None
+        self.router.record(service_name, 'estimate_page', source == 'estimate_page')
+        if source == 'service_page':
+            self.router.record(service_name, 'service_page', True)
     
-    def _get_quote_via_api(self, service_name: str, zip_code: str, year: str, make: str, model: str) -> Optional[Dict]:
-        """Thử lấy báo giá qua API hoặc quote form của YourMechanic"""
+    def _get_quote_via_api(self, service_name: str, zip_code: str, year: str, make: str, model: str,
+                           fallback_service_page: bool = True) -> Optional[Dict]:
+        """Thử lấy báo giá qua API hoặc quote form của YourMechanic.
+        
+        `fallback_service_page=False` khi router đã bỏ tier service_page: không thử lại trang dịch vụ.
+        """
         try:
             # YourMechanic sử dụng estimate system, thử truy cập trang estimate
             estimate_url = f"{self.base_url}/estimate"
             
             # Chuẩn bị parameters cho estimate request
-            params = {
-                'zip_code': zip_code,
-                'year': year,
-                'make': make,
-                'model': model,
-                'service': service_name
-            }
+            params = self._estimate_request_params(service_name, zip_code, year, make, model)
             
             # Thử GET request với parameters
-            response = self.session.get(estimate_url, params=params, timeout=15)
+            response = self._request('GET', estimate_url, params=params, timeout=15)
             
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Tìm thông tin giá trong trang estimate
-                price_elements = soup.find_all(text=re.compile(r'\$\d+'))
-                prices = []
-                
-                for element in price_elements:
-                    price_matches = re.findall(r'\$(\d+(?:,\d{3})*(?:\.\d{2})?)', str(element))
-                    for match in price_matches:
-                        try:
-                            price = int(match.replace(',', '').split('.')[0])
-                            if 20 <= price <= 5000:  # Reasonable price range
-                                prices.append(price)
-                        except:
-                            continue
-                
-                if prices:
-                    avg_price = sum(prices) // len(prices)
-                    return {
-                        "service": service_name,
-                        "vehicle": f"{year} {make} {model}",
-                        "location": zip_code,
-                        "min_price": min(prices),
-                        "max_price": max(prices),
-                        "avg_price": avg_price,
-                        "labor_time": self._estimate_labor_time(avg_price),
-                        "parts_included": "Varies by service",
-                        "source": "estimate_page"
-                    }
+                estimate = self._parse_estimate_page(response.content, service_name, zip_code, year, make, model)
+                if estimate:
+                    return estimate
             
             # Fallback: thử tìm pricing info từ service page
-            service_url = self._find_service_page(service_name)
+            service_url = self._find_service_page(service_name) if fallback_service_page else None
             if service_url:
                 return self._extract_pricing_from_service_page(
                     service_url, zip_code, year, make, model
@@ -596,226 +870,73 @@ class YourMechanicAdvancedScraper:
         
         return None
     
-    def _get_estimated_pricing(self, service_name: str, year: str, make: str, model: str) -> Dict:
-        """Ước tính giá dựa trên logic nghiệp vụ"""
-        
-        # Base pricing tham khảo từ thị trường
-        base_prices = {
-            # Engine services
-            "oil change": {"min": 40, "max": 80, "avg": 60},
-            "air filter replacement": {"min": 25, "max": 60, "avg": 42},
-            "spark plug replacement": {"min": 80, "max": 200, "avg": 140},
-            "timing belt replacement": {"min": 400, "max": 800, "avg": 600},
-            "catalytic converter replacement": {"min": 800, "max": 2000, "avg": 1400},
-            
-            # Brake services  
-            "brake pad replacement": {"min": 120, "max": 250, "avg": 185},
-            "brake rotors replacement": {"min": 200, "max": 400, "avg": 300},
-            "brake system flush": {"min": 70, "max": 120, "avg": 95},
-            "brake caliper replacement": {"min": 300, "max": 600, "avg": 450},
-            
-            # Battery services
-            "car battery replacement": {"min": 80, "max": 200, "avg": 140},
-            "battery cable replacement": {"min": 50, "max": 150, "avg": 100},
-            
-            # Transmission services
-            "transmission fluid service": {"min": 80, "max": 150, "avg": 115},
-            "cv axle replacement": {"min": 300, "max": 600, "avg": 450},
-            "clutch replacement": {"min": 800, "max": 1500, "avg": 1150},
-            
-            # Suspension services
-            "shock absorber replacement": {"min": 200, "max": 400, "avg": 300},
-            "strut assembly replacement": {"min": 300, "max": 600, "avg": 450},
-            "ball joint replacement": {"min": 150, "max": 350, "avg": 250},
-            
-            # Diagnostics
-            "inspection": {"min": 80, "max": 150, "avg": 115},
-            "pre-purchase car inspection": {"min": 90, "max": 120, "avg": 105}
+    def _estimate_request_params(self, service_name: str, zip_code: str, year: str, make: str, model: str) -> Dict:
+        """Tham số truy vấn cho trang estimate"""
+        return {
+            'zip_code': zip_code,
+            'year': year,
+            'make': make,
+            'model': model,
+            'service': service_name
         }
+    
+    def _parse_estimate_page(self, content: bytes, service_name: str, zip_code: str, year: str, make: str, model: str) -> Optional[QuoteResult]:
+        """Phân tích HTML trang estimate thành kết quả báo giá"""
+        soup = self._make_soup(content)
+        
+        # Tìm thông tin giá trong trang estimate (cùng bộ quét giá với trang dịch vụ)
+        with metrics.span('extract'):
+            summary = summarize_prices(price_engine.run(soup)['prices'])
+        
+        if summary:
+            min_price, max_price, avg_price = summary
+            return QuoteResult.from_dict({
+                "service": service_name,
+                "vehicle": f"{year} {make} {model}",
+                "location": zip_code,
+                "min_price": min_price,
+                "max_price": max_price,
+                "avg_price": avg_price,
+                "labor_time": self._estimate_labor_time(avg_price),
+                "parts_included": "Varies by service",
+                "source": "estimate_page"
+            })
+        return None
+    
+    def _get_estimated_pricing(self, service_name: str, year: str, make: str, model: str) -> QuoteResult:
+        """Ước tính giá dựa trên logic nghiệp vụ"""
         
-        # Tìm giá tương ứng
-        service_lower = service_name.lower()
-        pricing = None
-        
-        for key, price in base_prices.items():
-            if key in service_lower:
-                pricing = price
-                break
-        
-        # Nếu không tìm thấy, ước tính dựa trên loại dịch vụ
-        if not pricing:
-            if "replacement" in service_lower:
-                if any(word in service_lower for word in ["engine", "transmission", "clutch"]):
-                    pricing = {"min": 500, "max": 1500, "avg": 1000}
-                elif any(word in service_lower for word in ["brake", "suspension", "steering"]):
-                    pricing = {"min": 200, "max": 500, "avg": 350}
-                else:
-                    pricing = {"min": 100, "max": 300, "avg": 200}
-            elif "service" in service_lower or "flush" in service_lower:
-                pricing = {"min": 60, "max": 120, "avg": 90}
-            elif "inspection" in service_lower:
-                pricing = {"min": 80, "max": 150, "avg": 115}
-            else:
-                pricing = {"min": 75, "max": 200, "avg": 137}
+        # Giá gốc, mô tả, danh sách bao gồm và thời gian theo chỉ mục từ khóa (ghi nhớ theo tên dịch vụ)
+        profile = service_profile(service_name)
         
         # Điều chỉnh giá theo năm và hãng xe
-        multiplier = self._get_price_multiplier(year, make, model)
+        multiplier = price_multiplier(year, make, model)
         
-        final_avg = int(pricing["avg"] * multiplier)
+        final_avg = int(profile.avg * multiplier)
         
-        return {
+        return QuoteResult.from_dict({
             "service": service_name,
             "vehicle": f"{year} {make} {model}",
             "location": "Estimated",
-            "min_price": int(pricing["min"] * multiplier),
-            "max_price": int(pricing["max"] * multiplier),
+            "min_price": int(profile.min * multiplier),
+            "max_price": int(profile.max * multiplier),
             "avg_price": final_avg,
-            "labor_time": self._estimate_labor_time(pricing["avg"]),
+            "labor_time": self._estimate_labor_time(profile.avg),
             "parts_included": "Varies by service",
             "source": "estimated",
             # Enhanced detailed information
-            "service_description": self._get_service_description(service_name),
-            "whats_included": self._get_service_includes_by_type(service_name),
-            "warranty_info": {
-                "parts_warranty": "12 months or 12,000 miles",
-                "labor_warranty": "12 months or 12,000 miles", 
-                "coverage": "Nationwide warranty coverage",
-                "details": "Warranty covers defects in parts and workmanship"
-            },
-            "customer_rating": {
-                "average_rating": 4.5,
-                "total_reviews": 234,
-                "rating_breakdown": {
-                    "5_star": "72%",
-                    "4_star": "20%", 
-                    "3_star": "5%",
-                    "2_star": "2%",
-                    "1_star": "1%"
-                }
-            },
-            "mechanic_info": {
-                "certified_mechanics": True,
-                "average_experience": "8+ years",
-                "certifications": ["ASE Certified", "Manufacturer Trained"],
-                "background_checked": True,
-                "mobile_service": True,
-                "service_locations": ["At your location", "Home", "Office", "Parking lot"]
-            },
+            "service_description": profile.description,
+            "whats_included": profile.includes,
+            "warranty_info": WARRANTY_INFO,
+            "customer_rating": ESTIMATED_RATING,
+            "mechanic_info": MECHANIC_INFO,
             "cost_breakdown": self._estimate_cost_breakdown(final_avg),
-            "additional_fees": {
-                "diagnostic_fee": 0,
-                "disposal_fee": 5,
-                "service_fee": 0,
-                "travel_fee": 0,
-                "note": "All fees included in quoted price"
-            },
+            "additional_fees": ADDITIONAL_FEES,
             "availability": {
-                "same_day_available": True,
-                "typical_booking_time": "2-4 hours advance notice",
-                "service_hours": "7 AM - 7 PM",
-                "weekend_available": True,
-                "emergency_service": False,
-                "estimated_duration": self._get_service_duration(service_name)
+                **PAGE_AVAILABILITY,
+                "estimated_duration": profile.duration
             }
-        }
-    
-    def _get_service_description(self, service_name: str) -> str:
-        """Lấy mô tả chi tiết về dịch vụ"""
-        descriptions = {
-            "oil change": "Complete engine oil and filter replacement service. We drain old oil, replace filter, and refill with fresh oil suited for your vehicle.",
-            "brake pad replacement": "Professional brake pad replacement service including inspection of rotors, calipers, and brake system components.",
-            "battery replacement": "Complete battery replacement service with testing of charging system and electrical connections.",
-            "air filter replacement": "Engine air filter replacement to ensure optimal engine performance and fuel efficiency.",
-            "inspection": "Comprehensive vehicle inspection covering safety, performance, and maintenance items."
-        }
-        
-        service_lower = service_name.lower()
-        for key, desc in descriptions.items():
-            if key in service_lower:
-                return desc
-        
-        return f"Professional {service_name.lower()} service performed by certified mechanics using quality parts."
-    
-    def _get_service_includes_by_type(self, service_name: str) -> List[str]:
-        """Lấy danh sách những gì được bao gồm theo loại dịch vụ"""
-        service_lower = service_name.lower()
-        
-        if "oil change" in service_lower:
-            return [
-                "✅ Up to 5 quarts of oil",
-                "✅ New oil filter",
-                "✅ Multi-point inspection",
-                "✅ Fluid level check",
-                "✅ Battery test"
-            ]
-        elif "brake" in service_lower:
-            return [
-                "✅ New brake pads/components",
-                "✅ Brake system inspection",
-                "✅ Rotor condition check",
-                "✅ Brake fluid level check",
-                "✅ Test drive verification"
-            ]
-        elif "battery" in service_lower:
-            return [
-                "✅ New battery installation",
-                "✅ Battery terminal cleaning",
-                "✅ Charging system test",
-                "✅ Electrical connection check",
-                "✅ Old battery disposal"
-            ]
-        else:
-            return [
-                "✅ Professional service",
-                "✅ Quality parts/materials",
-                "✅ System inspection",
-                "✅ Performance testing",
-                "✅ Service documentation"
-            ]
-    
-    def _get_service_duration(self, service_name: str) -> str:
-        """Ước tính thời gian hoàn thành dịch vụ"""
-        service_lower = service_name.lower()
-        
-        if "oil change" in service_lower:
-            return "30-45 minutes"
-        elif "brake pad" in service_lower:
-            return "1-2 hours"
-        elif "battery" in service_lower:
-            return "30-60 minutes"
-        elif "inspection" in service_lower:
-            return "45-90 minutes"
-        elif "timing belt" in service_lower or "clutch" in service_lower:
-            return "4-8 hours"
-        elif "transmission" in service_lower:
-            return "2-4 hours"
-        else:
-            return "1-3 hours"
-    
-    def _get_price_multiplier(self, year: str, make: str, model: str) -> float:
-        """Tính hệ số điều chỉnh giá theo xe"""
-        multiplier = 1.0
-        
-        # Điều chỉnh theo năm
-        try:
-            year_int = int(year)
-            if year_int < 2000:
-                multiplier *= 0.9  # Xe rất cũ rẻ hơn
-            elif year_int < 2010:
-                multiplier *= 1.1  # Xe cũ đắt hơn do khó tìm phụ tùng
-            elif year_int > 2020:
-                multiplier *= 1.2  # Xe mới đắt hơn
-        except:
-            pass
-        
-        # Điều chỉnh theo hãng
-        luxury_brands = ["BMW", "Mercedes-Benz", "Audi", "Lexus", "Acura", "Infiniti", "Jaguar", "Land Rover", "Porsche"]
-        if make in luxury_brands:
-            multiplier *= 1.4
-        elif make in ["Toyota", "Honda", "Nissan", "Mazda"]:
-            multiplier *= 0.9  # Xe Nhật rẻ hơn
-        
-        return multiplier
+        })
     
     def _estimate_labor_time(self, avg_price: float) -> str:
         """Ước tính thời gian làm việc dựa trên giá"""
@@ -832,11 +953,11 @@ class YourMechanicAdvancedScraper:
             return name
         return "Unknown Service"
     
-    def _parse_api_response(self, data: Dict, service_name: str, year: str, make: str, model: str, zip_code: str) -> Dict:
+    def _parse_api_response(self, data: Dict, service_name: str, year: str, make: str, model: str, zip_code: str) -> QuoteResult:
         """Parse API response thành format chuẩn"""
         price = data.get('price', data.get('cost', 0))
         
-        return {
+        return QuoteResult.from_dict({
             "service": service_name,
             "vehicle": f"{year} {make} {model}",
             "location": zip_code,
@@ -846,12 +967,12 @@ class YourMechanicAdvancedScraper:
             "labor_time": data.get('labor_time', self._estimate_labor_time(price)),
             "parts_included": data.get('parts_included', "Varies by service"),
             "source": "api"
-        }
+        })
     
     def health_check(self) -> bool:
         """Kiểm tra kết nối tới website"""
         try:
-            response = self.session.get(self.base_url, timeout=10)
+            response = self._request('GET', self.base_url, timeout=10)
             return response.status_code == 200
         except:
             return False 
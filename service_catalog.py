@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Chỉ mục dịch vụ YourMechanic: tên dịch vụ chuẩn hóa -> URL trang dịch vụ và danh mục.
+Chạy trực tiếp để crawl lại /services và sitemap rồi ghi ra file JSON.
+"""
+
+import difflib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urljoin, urlparse
+
+from bs4 import BeautifulSoup
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATALOG_PATH = os.environ.get("YOURMECHANIC_CATALOG_PATH", "service_catalog.json")
+
+SERVICE_PATH_PATTERN = re.compile(r'^/services/[^/]+/?$')
+SITEMAP_LOC_PATTERN = re.compile(r'<loc>\s*([^<\s]+)\s*</loc>', re.I)
+
+def normalize_service_name(name: str) -> str:
+    """Chuẩn hóa tên dịch vụ để so khớp (chữ thường, bỏ 'car/auto/vehicle' và ký tự đặc biệt)"""
+    name = name.lower().replace('-', ' ')
+    name = re.sub(r'\b(car|auto|vehicle)\b', ' ', name)
+    name = re.sub(r'[^\w\s]', ' ', name)
+    return re.sub(r'\s+', ' ', name).strip()
+
+def service_name_from_url(url: str) -> str:
+    """Tên dịch vụ đọc được từ slug của URL"""
+    slug = urlparse(url).path.rstrip('/').split('/')[-1]
+    return slug.replace('-', ' ').title()
+
+class ServiceCatalog:
+    """Chỉ mục dịch vụ dựng sẵn, tra cứu O(1) theo tên chuẩn hóa với fallback so khớp gần đúng"""
+
+    def __init__(self, path: Optional[str] = DEFAULT_CATALOG_PATH, fuzzy_cutoff: float = 0.85):
+        self.path = path
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.built_at = None
+
+        self._entries = {}  # normalized name -> {"name", "url", "category"}
+        self._fuzzy_memo = {}
+        self._lock = threading.Lock()
+
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, name: str, url: str, category: Optional[str] = None):
+        """Thêm (hoặc bổ sung danh mục cho) một dịch vụ"""
+        key = normalize_service_name(name)
+        if not key:
+            return
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._entries[key] = {"name": name, "url": url, "category": category}
+                self._fuzzy_memo.clear()
+            elif category and not entry.get("category"):
+                entry["category"] = category
+
+    def lookup(self, service_name: str) -> Optional[Dict]:
+        """Tra cứu dịch vụ: khớp chính xác theo tên chuẩn hóa, sau đó so khớp gần đúng"""
+        key = normalize_service_name(service_name)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                return entry
+            if key in self._fuzzy_memo:
+                match = self._fuzzy_memo[key]
+            else:
+                matches = difflib.get_close_matches(key, self._entries.keys(), n=1, cutoff=self.fuzzy_cutoff)
+                match = matches[0] if matches else None
+                self._fuzzy_memo[key] = match
+            return self._entries[match] if match else None
+
+    def update_from_soup(self, soup: BeautifulSoup, base_url: str) -> int:
+        """Bổ sung chỉ mục từ soup của trang /services, trả về số dịch vụ mới"""
+        before = len(self)
+
+        # Dịch vụ nằm dưới các heading h2 được gán danh mục theo heading
+        for heading in soup.find_all('h2'):
+            category = heading.get_text(strip=True)
+            if not category:
+                continue
+            element = heading.find_next_sibling()
+            while element is not None and element.name != 'h2':
+                if element.name in ('ul', 'div'):
+                    for link in element.find_all('a', href=True):
+                        self._add_link(link, base_url, category)
+                element = element.find_next_sibling()
+
+        # Mọi link /services/<slug> còn lại
+        for link in soup.find_all('a', href=True):
+            self._add_link(link, base_url, None)
+
+        return len(self) - before
+
+    def _add_link(self, link, base_url: str, category: Optional[str]):
+        url = urljoin(base_url, link['href'])
+        if not SERVICE_PATH_PATTERN.match(urlparse(url).path):
+            return
+        name = link.get_text(strip=True)
+        if name and len(name) > 5:
+            self.add(name, url.rstrip('/'), category)
+
+    def update_from_sitemap(self, content: bytes) -> List[str]:
+        """Bổ sung chỉ mục từ sitemap XML, trả về các sitemap con (nếu là sitemap index)"""
+        text = content.decode('utf-8', errors='replace')
+        locations = SITEMAP_LOC_PATTERN.findall(text)
+        if '<sitemapindex' in text:
+            return locations
+
+        for url in locations:
+            if SERVICE_PATH_PATTERN.match(urlparse(url).path):
+                self.add(service_name_from_url(url), url.rstrip('/'))
+        return []
+
+    def save(self, path: Optional[str] = None):
+        """Ghi chỉ mục ra file JSON"""
+        path = path or self.path
+        with self._lock:
+            data = {"built_at": self.built_at, "entries": list(self._entries.values())}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def load(self, path: Optional[str] = None):
+        """Nạp chỉ mục từ file JSON"""
+        path = path or self.path
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Cannot load service catalog from {path}: {e}")
+            return
+        self.built_at = data.get("built_at")
+        for entry in data.get("entries", []):
+            self.add(entry["name"], entry["url"], entry.get("category"))
+
+    def mark_built(self):
+        """Ghi nhận thời điểm chỉ mục được crawl lại"""
+        self.built_at = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+if __name__ == "__main__":
+    from scraper_advanced import YourMechanicAdvancedScraper
+
+    scraper = YourMechanicAdvancedScraper()
+    count = scraper.refresh_catalog(save=True)
+    print(f"✅ Catalog: {count} dịch vụ -> {scraper.catalog.path}")
@@ -0,0 +1,104 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class ServicePageResolver:
+    """Ghi nhớ kết quả tìm URL trang dịch vụ theo slug.
+
+    Kết quả tìm thấy (positive) được giữ suốt vòng đời cache (mặc định không hết hạn);
+    kết quả không tìm thấy (negative) hết hạn sau `negative_ttl` giây. Các URL ứng viên
+    được kiểm tra song song, dừng ngay khi xác định được ứng viên ưu tiên cao nhất trả về 200.
+    """
+
+    def __init__(self, max_workers: int = 8, positive_ttl: Optional[float] = None, negative_ttl: float = 3600):
+        self.max_workers = max_workers
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+
+        self._entries = {}  # key -> (expires_at hoặc None, url hoặc None)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._stats = {"hits": 0, "negative_hits": 0, "misses": 0, "probes": 0}
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Thread pool dùng chung cho các HEAD probe (tạo lazy)"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="resolve")
+            return self._executor
+
+    def cached(self, key: str) -> Tuple[bool, Optional[str]]:
+        """Trả về (có trong cache, url); url là None với kết quả negative"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, url = entry
+                if expires_at is None or expires_at > time.time():
+                    self._stats["hits" if url else "negative_hits"] += 1
+                    return True, url
+                del self._entries[key]
+            self._stats["misses"] += 1
+            return False, None
+
+    def remember(self, key: str, url: Optional[str]):
+        """Lưu kết quả positive hoặc negative cho slug"""
+        ttl = self.positive_ttl if url else self.negative_ttl
+        expires_at = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires_at, url)
+
+    def resolve(self, key: str, candidates: List[str], probe: Callable[[str], Optional[bool]]) -> Optional[str]:
+        """Tìm URL đầu tiên (theo thứ tự ưu tiên) mà `probe` xác nhận tồn tại.
+
+        `probe(url)` trả về True/False, hoặc None khi lỗi mạng; nếu có lỗi và không tìm thấy
+        URL nào thì kết quả không được ghi nhớ để lần sau thử lại.
+        """
+        found, url = self.cached(key)
+        if found:
+            return url
+
+        candidates = list(dict.fromkeys(candidates))  # Bỏ URL trùng, giữ thứ tự ưu tiên
+        with self._lock:
+            self._stats["probes"] += len(candidates)
+
+        executor = self._get_executor()
+        futures = [executor.submit(probe, candidate) for candidate in candidates]
+        url = None
+        inconclusive = False
+        try:
+            # Duyệt theo thứ tự ưu tiên: ứng viên đầu tiên trả về True thắng,
+            # các probe còn lại vẫn chạy song song nhưng không cần chờ nữa
+            for candidate, future in zip(candidates, futures):
+                try:
+                    ok = future.result()
+                except Exception as e:
+                    logger.debug(f"Failed to check {candidate}: {e}")
+                    ok = None
+                if ok:
+                    url = candidate
+                    break
+                if ok is None:
+                    inconclusive = True
+        finally:
+            for future in futures:
+                future.cancel()
+
+        if url or not inconclusive:
+            self.remember(key, url)
+        return url
+
+    def stats(self) -> Dict:
+        """Thống kê cache của resolver"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        return stats
+
+    def clear(self):
+        """Xóa toàn bộ kết quả đã ghi nhớ"""
+        with self._lock:
+            self._entries.clear()
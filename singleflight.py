@@ -0,0 +1,78 @@
+"""
+Gộp các lời gọi trùng nhau đang chạy (single-flight): caller đầu tiên thực hiện,
+các caller cùng key đến trong lúc đó chờ và dùng chung kết quả (hoặc lỗi) của nó.
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Single-flight cho thread"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "shared": 0}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Chạy fn() nếu chưa có lời gọi cùng key đang chạy, ngược lại chờ kết quả của lời gọi đó"""
+        with self._lock:
+            self._stats["calls"] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self._stats["shared"] += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(self._stats, in_flight=len(self._calls))
+
+class AsyncSingleFlight:
+    """Single-flight cho coroutine trong cùng một event loop"""
+
+    def __init__(self):
+        self._calls = {}
+        self._stats = {"calls": 0, "shared": 0}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Như SingleFlight.do; caller bị hủy không hủy lời gọi dùng chung"""
+        self._stats["calls"] += 1
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._calls.pop(key, None) if self._calls.get(key) is done else None)
+        else:
+            self._stats["shared"] += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict:
+        return dict(self._stats, in_flight=len(self._calls))
@@ -0,0 +1,384 @@
+"""
+Kho lưu HTML thô của mọi trang đã tải: nén gzip, định địa chỉ theo nội dung (sha256)
+nên trang không đổi chỉ lưu một lần, kèm chỉ mục SQLite (url, loại trang, thời điểm).
+Scraper chỉ xếp trang vào hàng đợi; thread ghi nền nén và ghi đĩa. Snapshot quá hạn và
+blob cũ nhất khi kho vượt dung lượng được dọn định kỳ.
+Có thể chạy lại phần trích xuất offline, song song trên toàn bộ kho:
+
+    python snapshot_store.py stats
+    python snapshot_store.py prune --max-age-days 30 --max-mb 500
+    python snapshot_store.py reextract -o fields.jsonl --workers 4 --kind service_page
+"""
+
+import argparse
+import atexit
+import gzip
+import hashlib
+import json
+import logging
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from quote_result import as_dict
+
+logger = logging.getLogger(__name__)
+
+# Đặt YOURMECHANIC_SNAPSHOT_DIR="" để tắt việc lưu trang
+DEFAULT_SNAPSHOT_DIR = os.environ.get("YOURMECHANIC_SNAPSHOT_DIR", os.path.join("data", "snapshots"))
+
+# Giới hạn lưu giữ (0 = không giới hạn): tuổi snapshot theo lần thấy cuối và tổng dung lượng đã nén
+DEFAULT_MAX_AGE_DAYS = float(os.environ.get("YOURMECHANIC_SNAPSHOT_MAX_AGE_DAYS", "30"))
+DEFAULT_MAX_MB = float(os.environ.get("YOURMECHANIC_SNAPSHOT_MAX_MB", "500"))
+PRUNE_INTERVAL = 3600  # giây giữa hai lần tự dọn kho khi lưu trang
+MAX_PENDING = 256      # số trang tối đa chờ ghi; hàng đợi đầy thì bỏ snapshot thay vì chặn request
+
+def _blob_path(root: str, sha: str) -> str:
+    return os.path.join(root, "objects", sha[:2], f"{sha}.gz")
+
+def _read_blob(root: str, sha: str) -> bytes:
+    with open(_blob_path(root, sha), "rb") as f:
+        return gzip.decompress(f.read())
+
+class SnapshotStore:
+    """Kho trang nén, định địa chỉ theo sha256; `root=None` là kho tắt (không lưu gì).
+
+    `put()` ghi ngay trên thread gọi; `submit()` chỉ xếp trang vào hàng đợi cho thread ghi nền
+    (dùng trên đường request), `flush()` chờ hàng đợi ghi xong.
+    """
+
+    def __init__(self, root: Optional[str] = DEFAULT_SNAPSHOT_DIR, compresslevel: int = 6,
+                 max_age_days: float = DEFAULT_MAX_AGE_DAYS, max_mb: float = DEFAULT_MAX_MB,
+                 prune_interval: float = PRUNE_INTERVAL, max_pending: int = MAX_PENDING):
+        self.root = root or None
+        self.compresslevel = compresslevel
+        self.max_age = max_age_days * 86400
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.prune_interval = prune_interval
+        self._next_prune = time.monotonic()
+        self._lock = threading.Lock()
+        self._db = None
+
+        self._pending = queue.Queue(maxsize=max_pending)
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        self._dropped = 0
+        if self.root:
+            try:
+                self._db = self._connect(os.path.join(self.root, "index.sqlite"))
+            except (OSError, sqlite3.Error) as e:
+                logger.error(f"Cannot open snapshot store at {self.root}, snapshots disabled: {e}")
+                self.root = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._db is not None
+
+    def _connect(self, path: str) -> sqlite3.Connection:
+        """Mở (và khởi tạo nếu cần) chỉ mục SQLite"""
+        os.makedirs(os.path.join(self.root, "objects"), exist_ok=True)
+        db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS blobs ("
+            " sha256 TEXT PRIMARY KEY, size INTEGER NOT NULL, stored_size INTEGER NOT NULL)"
+        )
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS snapshots ("
+            " url TEXT NOT NULL, kind TEXT, sha256 TEXT NOT NULL, status INTEGER,"
+            " first_seen REAL NOT NULL, last_seen REAL NOT NULL, PRIMARY KEY (url, sha256))"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_url ON snapshots (url, last_seen)")
+        db.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_kind ON snapshots (kind)")
+        return db
+
+    def submit(self, url: str, content: bytes, kind: Optional[str] = None, status: int = 200) -> bool:
+        """Xếp trang vào hàng đợi ghi nền, không chặn; False nếu kho tắt hoặc hàng đợi đầy (bỏ snapshot)"""
+        if self._db is None or not content:
+            return False
+        self._start_writer()
+        try:
+            self._pending.put_nowait((url, content, kind, status))
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+            logger.debug(f"Snapshot queue full, dropping {url}")
+            return False
+        return True
+
+    def flush(self):
+        """Chờ tới khi mọi trang đã xếp hàng được ghi xong"""
+        if self._writer is not None:
+            self._pending.join()
+
+    def _start_writer(self):
+        """Khởi động thread ghi nền (lazy, một lần)"""
+        if self._writer is not None:
+            return
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_pending, name="snapshot-writer", daemon=True)
+                self._writer.start()
+                # Thread daemon: ghi nốt hàng đợi trước khi tiến trình thoát
+                atexit.register(self.flush)
+
+    def _write_pending(self):
+        while True:
+            url, content, kind, status = self._pending.get()
+            try:
+                self.put(url, content, kind, status)
+            except Exception as e:
+                logger.error(f"Error saving snapshot of {url}: {e}")
+            finally:
+                self._pending.task_done()
+
+    def put(self, url: str, content: bytes, kind: Optional[str] = None, status: int = 200) -> Optional[str]:
+        """Lưu một trang đã tải, trả về sha256 của nội dung (None nếu kho tắt hoặc lỗi)"""
+        if self._db is None or not content:
+            return None
+        sha = hashlib.sha256(content).hexdigest()
+        now = time.time()
+        try:
+            path = _blob_path(self.root, sha)
+            # Nén ngoài lock; ghi file và chỉ mục trong lock để prune không xóa blob giữa chừng
+            data = gzip.compress(content, compresslevel=self.compresslevel) if not os.path.exists(path) else None
+            with self._lock:
+                if not os.path.exists(path):
+                    if data is None:
+                        data = gzip.compress(content, compresslevel=self.compresslevel)
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+                    with os.fdopen(fd, "wb") as f:
+                        f.write(data)
+                    os.replace(tmp_path, path)
+                self._db.execute(
+                    "INSERT OR IGNORE INTO blobs (sha256, size, stored_size) VALUES (?, ?, ?)",
+                    (sha, len(content), len(data) if data is not None else os.path.getsize(path)),
+                )
+                self._db.execute(
+                    "INSERT INTO snapshots (url, kind, sha256, status, first_seen, last_seen)"
+                    " VALUES (?, ?, ?, ?, ?, ?)"
+                    " ON CONFLICT (url, sha256) DO UPDATE SET last_seen = excluded.last_seen",
+                    (url, kind, sha, status, now, now),
+                )
+        except (OSError, sqlite3.Error) as e:
+            logger.error(f"Error saving snapshot of {url}: {e}")
+            return None
+        self._maybe_prune()
+        return sha
+
+    def _maybe_prune(self):
+        """Dọn kho theo giới hạn lưu giữ, nhiều nhất một lần mỗi `prune_interval` giây"""
+        if not (self.max_age or self.max_bytes) or time.monotonic() < self._next_prune:
+            return
+        self._next_prune = time.monotonic() + self.prune_interval
+        try:
+            self.prune()
+        except (OSError, sqlite3.Error) as e:
+            logger.error(f"Error pruning snapshot store: {e}")
+
+    def prune(self, max_age: Optional[float] = None, max_bytes: Optional[int] = None) -> Dict:
+        """Xóa snapshot thấy lần cuối quá `max_age` giây, rồi xóa blob ít dùng gần đây nhất tới khi
+        tổng dung lượng nén không quá `max_bytes`; mặc định theo giới hạn của kho (0 = không giới hạn)"""
+        if self._db is None:
+            return {"snapshots": 0, "blobs": 0, "stored_bytes": 0}
+        max_age = self.max_age if max_age is None else max_age
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                removed = 0
+                if max_age:
+                    removed += self._db.execute(
+                        "DELETE FROM snapshots WHERE last_seen < ?", (time.time() - max_age,)
+                    ).rowcount
+                orphans = self._db.execute(
+                    "SELECT sha256, stored_size FROM blobs WHERE sha256 NOT IN (SELECT sha256 FROM snapshots)"
+                ).fetchall()
+                if max_bytes:
+                    total = self._db.execute("SELECT COALESCE(SUM(stored_size), 0) FROM blobs").fetchone()[0]
+                    total -= sum(size for _, size in orphans)
+                    if total > max_bytes:
+                        rows = self._db.execute(
+                            "SELECT b.sha256, b.stored_size FROM blobs b JOIN snapshots s ON s.sha256 = b.sha256"
+                            " GROUP BY b.sha256 ORDER BY MAX(s.last_seen)"
+                        ).fetchall()
+                        oldest = []
+                        for sha, size in rows:
+                            if total <= max_bytes:
+                                break
+                            oldest.append((sha, size))
+                            total -= size
+                        removed += self._db.executemany(
+                            "DELETE FROM snapshots WHERE sha256 = ?", [(sha,) for sha, _ in oldest]
+                        ).rowcount
+                        orphans += oldest
+                self._db.executemany("DELETE FROM blobs WHERE sha256 = ?", [(sha,) for sha, _ in orphans])
+                self._db.execute("COMMIT")
+            except sqlite3.Error:
+                self._db.execute("ROLLBACK")
+                raise
+            for sha, _ in orphans:
+                try:
+                    os.remove(_blob_path(self.root, sha))
+                except FileNotFoundError:
+                    pass
+        if orphans:
+            logger.info(f"Pruned {len(orphans)} snapshot blobs")
+        return {"snapshots": removed, "blobs": len(orphans), "stored_bytes": sum(size for _, size in orphans)}
+
+    def get(self, sha: str) -> bytes:
+        """Nội dung gốc của một blob"""
+        return _read_blob(self.root, sha)
+
+    def latest(self, url: str) -> Optional[Dict]:
+        """Snapshot mới nhất của một URL"""
+        if self._db is None:
+            return None
+        with self._lock:
+            row = self._db.execute(
+                "SELECT url, kind, sha256, status, last_seen FROM snapshots WHERE url = ?"
+                " ORDER BY last_seen DESC LIMIT 1", (url,)
+            ).fetchone()
+        return self._row(row) if row else None
+
+    def iter_snapshots(self, kind: Optional[str] = None, latest_only: bool = True) -> Iterator[Dict]:
+        """Duyệt các snapshot (mặc định chỉ bản mới nhất của mỗi URL)"""
+        if self._db is None:
+            return
+        query = "SELECT url, kind, sha256, status, last_seen FROM snapshots s WHERE (? IS NULL OR kind = ?)"
+        if latest_only:
+            query += " AND last_seen = (SELECT MAX(last_seen) FROM snapshots WHERE url = s.url)"
+        with self._lock:
+            rows = self._db.execute(query + " ORDER BY url", (kind, kind)).fetchall()
+        for row in rows:
+            yield self._row(row)
+
+    @staticmethod
+    def _row(row: Tuple) -> Dict:
+        return {"url": row[0], "kind": row[1], "sha256": row[2], "status": row[3], "last_seen": row[4]}
+
+    def stats(self) -> Dict:
+        """Số URL, số snapshot, số blob, dung lượng trước/sau nén và số trang đang chờ ghi/đã bỏ"""
+        if self._db is None:
+            return {"enabled": False}
+        with self._lock:
+            dropped = self._dropped
+            urls, snapshots = self._db.execute("SELECT COUNT(DISTINCT url), COUNT(*) FROM snapshots").fetchone()
+            blobs, size, stored = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(stored_size), 0) FROM blobs"
+            ).fetchone()
+            kinds = dict(self._db.execute("SELECT kind, COUNT(DISTINCT url) FROM snapshots GROUP BY kind").fetchall())
+        return {
+            "enabled": True, "urls": urls, "snapshots": snapshots, "blobs": blobs,
+            "bytes": size, "stored_bytes": stored, "kinds": kinds,
+            "pending": self._pending.qsize(), "dropped": dropped,
+        }
+
+# ---- Trích xuất lại offline (mỗi process có một scraper riêng, không dùng network) ----
+
+_worker_scraper = None
+
+def _init_worker(parser: Optional[str]):
+    global _worker_scraper
+    from quote_cache import QuoteCache
+    from scraper_advanced import YourMechanicAdvancedScraper
+    from service_catalog import ServiceCatalog
+    from tier_router import TierRouter
+
+    # Trích xuất lại offline không ghi gì: cache, chỉ mục dịch vụ, thống kê tier và kho snapshot chỉ trong bộ nhớ
+    _worker_scraper = YourMechanicAdvancedScraper(
+        cache=QuoteCache(path=None), catalog=ServiceCatalog(path=""), snapshots=SnapshotStore(root=None),
+        router=TierRouter(path=None), parser=parser
+    )
+
+def extract_snapshot(task: Tuple[str, Dict, Optional[Tuple[str, str, str, str]]]) -> Dict:
+    """Chạy lại phần trích xuất cho một snapshot (hàm top-level để gửi sang process con)"""
+    root, snapshot, vehicle = task
+    scraper = _worker_scraper
+    url, kind = snapshot["url"], snapshot["kind"]
+    record = dict(snapshot)
+    try:
+        content = _read_blob(root, snapshot["sha256"])
+        if kind == "service_page":
+            fields = scraper._service_page_fields(content)
+            record["fields"] = fields
+            if vehicle:
+                zip_code, year, make, model = vehicle
+                result = scraper._service_page_result(fields, url, zip_code, year, make, model)
+                record["result"] = as_dict(result) if result is not None else None
+        elif kind == "estimate":
+            params = {key: values[0] for key, values in parse_qs(urlparse(url).query).items()}
+            result = scraper._parse_estimate_page(
+                content, params.get("service", ""), params.get("zip_code", ""),
+                params.get("year", ""), params.get("make", ""), params.get("model", "")
+            )
+            record["result"] = as_dict(result) if result is not None else None
+        elif kind == "services_index":
+            record["categories"] = scraper._extract_service_categories(content)
+        elif kind == "homepage":
+            record["makes"] = scraper._parse_vehicle_makes(content)
+    except Exception as e:
+        record["error"] = str(e)
+    return record
+
+def reextract(store: SnapshotStore, kinds: Optional[List[str]] = None, workers: Optional[int] = None,
+              vehicle: Optional[Tuple[str, str, str, str]] = None, parser: Optional[str] = None,
+              chunksize: int = 16) -> Iterator[Dict]:
+    """Trích xuất lại song song trên process pool cho snapshot mới nhất của mỗi URL"""
+    snapshots = [
+        snapshot
+        for kind in (kinds or [None])
+        for snapshot in store.iter_snapshots(kind)
+    ]
+    tasks = [(store.root, snapshot, vehicle) for snapshot in snapshots]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(parser,)) as executor:
+        yield from executor.map(extract_snapshot, tasks, chunksize=chunksize)
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshot store: stats and offline re-extraction")
+    parser.add_argument("--root", default=DEFAULT_SNAPSHOT_DIR, help="Thư mục kho snapshot")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("stats", help="Thống kê kho")
+    prune = commands.add_parser("prune", help="Dọn snapshot quá hạn và blob cũ khi kho vượt dung lượng")
+    prune.add_argument("--max-age-days", type=float, default=DEFAULT_MAX_AGE_DAYS,
+                       help="Xóa snapshot không thấy lại quá số ngày này (0 = không giới hạn)")
+    prune.add_argument("--max-mb", type=float, default=DEFAULT_MAX_MB,
+                       help="Dung lượng nén tối đa của kho (0 = không giới hạn)")
+    rerun = commands.add_parser("reextract", help="Trích xuất lại offline từ kho")
+    rerun.add_argument("-o", "--output", required=True, help="File kết quả JSONL")
+    rerun.add_argument("--kind", action="append",
+                       choices=["service_page", "estimate", "services_index", "homepage"],
+                       help="Loại trang (lặp lại để chọn nhiều loại; mặc định tất cả)")
+    rerun.add_argument("--workers", type=int, default=None, help="Số process (mặc định số CPU)")
+    rerun.add_argument("--vehicle", nargs=4, metavar=("ZIP", "YEAR", "MAKE", "MODEL"),
+                       help="Dựng cả kết quả báo giá trang dịch vụ cho xe này")
+    rerun.add_argument("--parser", help="Backend phân tích HTML (html.parser, lxml, html5lib)")
+    args = parser.parse_args()
+
+    store = SnapshotStore(args.root)
+    if args.command == "stats":
+        print(json.dumps(store.stats(), indent=2))
+        return
+    if args.command == "prune":
+        print(json.dumps(store.prune(args.max_age_days * 86400, int(args.max_mb * 1024 * 1024)), indent=2))
+        return
+
+    started = time.monotonic()
+    count = 0
+    with open(args.output, "w", encoding="utf-8") as f:
+        for record in reextract(store, args.kind, args.workers, tuple(args.vehicle) if args.vehicle else None,
+                                args.parser):
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+    print(f"✅ {count} snapshots re-extracted in {time.monotonic() - started:.1f}s -> {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import os
+import sys
+from urllib.parse import parse_qs, urlencode, urlparse
+
+import pytest
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Các module nằm phẳng ở thư mục gốc của repo
+sys.path.insert(0, ROOT)
+
+from quote_cache import QuoteCache  # noqa: E402
+from rate_limiter import RateLimiter  # noqa: E402
+from scraper_advanced import YourMechanicAdvancedScraper  # noqa: E402
+from service_catalog import ServiceCatalog  # noqa: E402
+from snapshot_store import SnapshotStore  # noqa: E402
+from tier_router import TierRouter  # noqa: E402
+
+class FakeSession(requests.Session):
+    """Session giả lập, không mở socket: trả response theo đường dẫn và ghi lại mọi request.
+
+    Route là bytes (200) hoặc hàm `(method, path, query, headers) -> (status, body, headers)`;
+    đường dẫn không có route dùng `default` (mặc định 404).
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.routes = {}
+        self.default = lambda method, path, query, headers: (404, b"", {})
+        self.calls = []
+
+    def request(self, method, url, params=None, headers=None, **kwargs):
+        if params:
+            url = f"{url}?{urlencode(params)}"
+        parsed = urlparse(url)
+        path = parsed.path.rstrip("/") or "/"
+        query = {name: values[0] for name, values in parse_qs(parsed.query).items()}
+        self.calls.append((method, path))
+        route = self.routes.get(path, self.default)
+        if callable(route):
+            status, body, extra_headers = route(method, path, query, headers or {})
+        else:
+            status, body, extra_headers = 200, route, {}
+        response = requests.Response()
+        response.status_code = status
+        response._content = b"" if method == "HEAD" else body
+        response.url = url
+        response.encoding = "utf-8"
+        response.headers.update({"Content-Type": "text/html", **extra_headers})
+        return response
+
+@pytest.fixture
+def pages():
+    """Đọc trang HTML mẫu trong tests/fixtures theo tên file"""
+    return fixture_page
+
+@pytest.fixture
+def site():
+    """Website giả lập dùng chung cho các scraper trong một test"""
+    return FakeSession()
+
+@pytest.fixture
+def make_scraper():
+    """Tạo scraper cô lập gửi request qua session giả lập: cache, chỉ mục và thống kê tier chỉ trong bộ nhớ,
+    không lưu snapshot, rate limiter không chờ token (giữ giới hạn đồng thời mặc định của scraper)"""
+
+    def factory(session=None, scraper_class=YourMechanicAdvancedScraper, **options):
+        options.setdefault("cache", QuoteCache(path=None))
+        options.setdefault("catalog", ServiceCatalog(path=""))
+        options.setdefault("snapshots", SnapshotStore(root=None))
+        options.setdefault("router", TierRouter(path=None))
+        scraper = scraper_class(**options)
+        if "rate_limiter" not in options:
+            default = scraper.rate_limiter
+            scraper.rate_limiter = RateLimiter(rate=1e9, burst=1e9,
+                                               initial_concurrency=default.initial_concurrency,
+                                               max_concurrency=default.max_concurrency)
+        if session is not None:
+            scraper.session = session
+        return scraper
+
+    return factory
+
+def fixture_page(name):
+    """Nội dung một trang HTML mẫu trong tests/fixtures"""
+    with open(os.path.join(ROOT, "tests", "fixtures", name), "rb") as f:
+        return f.read()
@@ -0,0 +1,70 @@
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from async_scraper import AsyncYourMechanicScraper  # noqa: E402
+
+SERVICE_PATH = "/services/brake-pad-replacement"
+
+def serve_from(site, scraper):
+    """Thay phần mạng của backend async bằng session giả lập"""
+
+    async def fetch(method, url, timeout=None, raise_for_status=False, **kwargs):
+        response = site.request(method, url, **kwargs)
+        if raise_for_status:
+            response.raise_for_status()
+        return response.status_code, response.content
+
+    scraper._fetch = fetch
+    return scraper
+
+def test_async_backend_returns_same_results_as_sync(make_scraper, site, pages):
+    site.routes[SERVICE_PATH] = pages("service_page.html")
+    sync = make_scraper(site)
+    backend = serve_from(site, make_scraper(scraper_class=AsyncYourMechanicScraper))
+
+    for service in ("Brake Pad Replacement", "Oil Change"):
+        expected = sync.search_service_pricing(service, "10001", "2020", "Toyota", "Camry")
+        actual = asyncio.run(backend.search_service_pricing(service, "10001", "2020", "Toyota", "Camry"))
+        assert actual == expected
+
+def test_async_backend_parses_pages_off_the_event_loop(make_scraper, site, pages):
+    site.routes[SERVICE_PATH] = pages("service_page.html")
+    site.routes["/estimate"] = pages("estimate_page.html")
+    backend = serve_from(site, make_scraper(scraper_class=AsyncYourMechanicScraper))
+    parse_threads = []
+    for name in ("_parse_service_page", "_parse_estimate_page"):
+        parse = getattr(backend, name)
+
+        def recording(*args, parse=parse, **kwargs):
+            parse_threads.append(threading.current_thread())
+            return parse(*args, **kwargs)
+
+        setattr(backend, name, recording)
+
+    async def lookup():
+        url = f"{backend.base_url}{SERVICE_PATH}"
+        page = await backend._extract_pricing_from_service_page(url, "10001", "2020", "Toyota", "Camry")
+        estimate = await backend._get_quote_via_api("Brake Pad Replacement", "10001", "2020", "Toyota", "Camry")
+        return page, estimate, threading.current_thread()
+
+    page, estimate, loop_thread = asyncio.run(lookup())
+
+    assert page["source"] == "service_page" and estimate["source"] == "estimate_page"
+    assert len(parse_threads) == 2 and loop_thread not in parse_threads
+
+def test_async_refresh_catalog_crawls_services_and_sitemaps(make_scraper, site, pages):
+    site.routes["/services"] = pages("services_page.html")
+    site.routes["/sitemap.xml"] = pages("sitemap_index.xml")
+    site.routes["/sitemap-services.xml"] = pages("sitemap_services.xml")
+    sync = make_scraper(site)
+    backend = serve_from(site, make_scraper(scraper_class=AsyncYourMechanicScraper))
+
+    count = asyncio.run(backend.refresh_catalog(save=False))
+
+    assert count == sync.refresh_catalog(save=False)
+    assert backend.catalog.lookup("Timing Belt Replacement") is not None
+    assert backend.catalog.built_at is not None
@@ -0,0 +1,51 @@
+import pytest
+
+from background_refresh import RefreshingValue
+
+def test_get_returns_fallback_until_first_successful_load():
+    results = iter([ConnectionError("offline"), {}, {"Brakes": ["Brake Pad Replacement"]}])
+
+    def loader():
+        result = next(results)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    value = RefreshingValue("categories", loader, fallback={"Fallback": []})
+
+    assert value.refresh() is False and value.get() == {"Fallback": []}
+    assert value.refresh() is False and value.age is None  # Rỗng cũng được thử lại
+    assert value.refresh() is True
+    assert value.get() == {"Brakes": ["Brake Pad Replacement"]}
+    assert value.wait(0) and value.age is not None
+
+def test_background_thread_retries_after_failure():
+    calls = []
+
+    def loader():
+        calls.append(len(calls))
+        if len(calls) < 3:
+            raise ConnectionError("offline")
+        return ["Toyota"]
+
+    value = RefreshingValue("makes", loader, fallback=["Fallback"], interval=3600, retry_interval=0.01).start()
+    try:
+        assert value.wait(timeout=2)
+    finally:
+        value.stop()
+
+    assert value.get() == ["Toyota"] and len(calls) == 3
+
+def test_fetch_loaders_raise_instead_of_falling_back(make_scraper, site, pages):
+    site.routes["/"] = lambda method, path, query, headers: (503, b"", {})
+    site.routes["/services"] = b"<html><body><p>Maintenance</p></body></html>"
+    scraper = make_scraper(site)
+
+    with pytest.raises(Exception):
+        scraper.fetch_vehicle_makes()
+    assert scraper.fetch_service_categories() is None
+    assert scraper.get_vehicle_makes() == scraper._get_fallback_makes()
+    assert scraper.get_service_categories_from_website() == scraper._get_updated_fallback_categories()
+
+    site.routes["/services"] = pages("services_page.html")
+    assert scraper.fetch_service_categories()["Brakes"] == ["Brake Pad Replacement", "Brake Rotor Replacement"]
@@ -0,0 +1,38 @@
+import threading
+import time
+
+from rate_limiter import RateLimiter
+
+SERVICES = ["Brake Pad Replacement", "Oil Change", "Battery Replacement", "Alternator Replacement",
+            "Starter Replacement", "Spark Plug Replacement"]
+
+def test_batch_streams_every_service_and_caps_requests_per_host(make_scraper, site):
+    lock = threading.Lock()
+    in_flight, peak = [0], [0]
+
+    def slow_missing_page(method, path, query, headers):
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        time.sleep(0.005)
+        with lock:
+            in_flight[0] -= 1
+        return 404, b"", {}
+
+    site.default = slow_missing_page
+    # Giới hạn đồng thời cố định 2 (không tự tăng) dù batch chạy 6 worker
+    limiter = RateLimiter(rate=1e9, burst=1e9, initial_concurrency=2, max_concurrency=2)
+    scraper = make_scraper(site, max_workers=6, per_host_limit=2, rate_limiter=limiter)
+
+    results = list(scraper.search_services_pricing_batch(SERVICES))
+
+    assert sorted(i for i, _, _ in results) == list(range(len(SERVICES)))
+    assert all(service == SERVICES[i] and result["service"] == service for i, service, result in results)
+    assert all(result["source"] == "estimated" for _, _, result in results)
+    assert peak[0] == 2
+
+def test_default_limiter_starts_at_per_host_limit_and_grows_to_worker_count(make_scraper):
+    scraper = make_scraper(max_workers=6, per_host_limit=2)
+
+    assert scraper.rate_limiter.initial_concurrency == 2
+    assert scraper.rate_limiter.max_concurrency == 6
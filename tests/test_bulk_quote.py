@@ -0,0 +1,143 @@
+import csv
+import json
+import sys
+from collections import Counter
+
+import pytest
+
+import bulk_quote
+from bulk_quote import Checkpoint, JsonlWriter, QuoteJob, run_bulk
+
+SERVICES = ["Oil Change", "Brake Pad Replacement", "Spark Plug Replacement", "Car Battery Replacement"]
+YEARS = ["2012", "2016", "2019", "2021", "2023", "1998"]
+JOBS = [QuoteJob(service, "10001", year, "Toyota", "Camry") for service in SERVICES for year in YEARS]
+
+def job_stream(jobs, interrupt_after=None):
+    """Job đầu vào (mỗi job lặp hai lần); ném KeyboardInterrupt sau `interrupt_after` job như khi Ctrl+C"""
+    for i, job in enumerate(job for job in jobs for _ in range(2)):
+        if interrupt_after is not None and i == interrupt_after:
+            raise KeyboardInterrupt
+        yield job
+
+def read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+def record_key(record):
+    return QuoteJob(record["service"], record["zip_code"], record["year"], record["make"], record["model"]).key
+
+def serve_service_pages(site, content):
+    """Mọi trang /services/<slug> tồn tại: kết quả đi qua bước phân tích trang dịch vụ"""
+
+    def route(method, path, query, headers):
+        if path.startswith("/services/"):
+            return 200, content, {}
+        return 404, b"", {}
+
+    site.default = route
+
+@pytest.mark.parametrize("parse_workers", [0, 2], ids=["threads", "process_pool"])
+def test_interrupted_run_resumes_without_duplicates_or_gaps(make_scraper, site, pages, tmp_path, parse_workers):
+    serve_service_pages(site, pages("service_page.html"))
+    output, checkpoint_path = str(tmp_path / "quotes.jsonl"), str(tmp_path / "quotes.checkpoint")
+
+    writer, checkpoint = JsonlWriter(output), Checkpoint(checkpoint_path)
+    with pytest.raises(KeyboardInterrupt):
+        run_bulk(make_scraper(site), job_stream(JOBS, interrupt_after=30), writer, checkpoint,
+                 max_workers=2, chunk_size=3, parse_workers=parse_workers)
+    writer.close()
+
+    # Chỉ những dòng đã ghi mới được checkpoint; job đang chạy dở được tra lại ở lượt sau
+    written = [record_key(record) for record in read_jsonl(output)]
+    assert 0 < len(written) < len(JOBS)
+    assert all(key in checkpoint for key in written) and len(checkpoint) == len(written)
+    checkpoint.close()
+
+    writer, checkpoint = JsonlWriter(output, append=True), Checkpoint(checkpoint_path)
+    stats = run_bulk(make_scraper(site), job_stream(JOBS), writer, checkpoint, max_workers=2, chunk_size=3,
+                     parse_workers=parse_workers)
+    writer.close()
+
+    records = read_jsonl(output)
+    assert {record["source"] for record in records} == {"service_page"}
+    counts = Counter(record_key(record) for record in records)
+    assert set(counts) == {job.key for job in JOBS}
+    assert set(counts.values()) == {1}
+    assert stats["done"] == len(JOBS) - len(written)
+    assert stats["skipped"] == len(JOBS) + len(written)
+    assert len(checkpoint) == len(JOBS)
+    checkpoint.close()
+
+def test_failed_jobs_are_not_checkpointed(make_scraper, site, tmp_path):
+    scraper = make_scraper(site)
+    quote = scraper.search_service_pricing
+
+    def flaky(service, *args):
+        if service == "Oil Change":
+            raise RuntimeError("upstream error")
+        return quote(service, *args)
+
+    scraper.search_service_pricing = flaky
+    writer, checkpoint = JsonlWriter(str(tmp_path / "quotes.jsonl")), Checkpoint(str(tmp_path / "checkpoint"))
+    stats = run_bulk(scraper, job_stream(JOBS), writer, checkpoint, max_workers=3, chunk_size=4)
+    writer.close()
+
+    assert stats["failed"] == len(YEARS)
+    assert len(checkpoint) == len(JOBS) - len(YEARS)
+    assert all(job not in checkpoint for job in (j.key for j in JOBS if j.service == "Oil Change"))
+    checkpoint.close()
+
+def write_input(path, years):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["year", "make", "model"])
+        writer.writeheader()
+        writer.writerows({"year": year, "make": "Honda", "model": "Civic"} for year in years)
+
+def run_main(monkeypatch, make_scraper, site, *args):
+    monkeypatch.setattr(bulk_quote, "YourMechanicAdvancedScraper", lambda **options: make_scraper(site, **options))
+    monkeypatch.setattr(sys, "argv", ["bulk_quote.py", *args])
+    bulk_quote.main()
+
+def test_new_checkpoint_truncates_stale_output_and_resume_appends(monkeypatch, make_scraper, site, tmp_path):
+    input_path, output = str(tmp_path / "fleet.csv"), str(tmp_path / "quotes.jsonl")
+    with open(output, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"service": "stale"}) + "\n")
+    args = [input_path, "-o", output, "--services", "Oil Change;Brake Pad Replacement", "--zips", "10001",
+            "--chunk-size", "2"]
+
+    write_input(input_path, ["2015", "2018"])
+    run_main(monkeypatch, make_scraper, site, *args)
+    first = read_jsonl(output)
+    assert len(first) == 4 and all(record["service"] != "stale" for record in first)
+
+    write_input(input_path, ["2015", "2018", "2020"])
+    run_main(monkeypatch, make_scraper, site, *args)
+    resumed = read_jsonl(output)
+    assert resumed[:4] == first and len(resumed) == 6
+
+    # --restart bỏ checkpoint và ghi đè: tra lại toàn bộ
+    run_main(monkeypatch, make_scraper, site, *args, "--restart")
+    restarted = read_jsonl(output)
+    assert len(restarted) == 6
+    assert min(record["quoted_at"] for record in restarted) > max(record["quoted_at"] for record in resumed)
+
+def test_resumed_parquet_run_writes_next_part(monkeypatch, make_scraper, site, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    input_path, output = str(tmp_path / "fleet.csv"), str(tmp_path / "quotes.parquet")
+    args = [input_path, "-o", output, "--services", "Oil Change", "--zips", "10001;94103"]
+
+    parts = []
+    for years in (["2015"], ["2015", "2018"], ["2015", "2018", "2021"]):
+        write_input(input_path, years)
+        run_main(monkeypatch, make_scraper, site, *args)
+        parts.append(sorted(path.name for path in tmp_path.glob("quotes*.parquet")))
+
+    assert parts == [
+        ["quotes.parquet"],
+        ["quotes.parquet", "quotes.part1.parquet"],
+        ["quotes.parquet", "quotes.part1.parquet", "quotes.part2.parquet"],
+    ]
+    rows = [row for path in sorted(tmp_path.glob("quotes*.parquet")) for row in pq.read_table(path).to_pylist()]
+    assert sorted((row["year"], row["zip_code"]) for row in rows) == sorted(
+        (year, zip_code) for year in ("2015", "2018", "2021") for zip_code in ("10001", "94103")
+    )
@@ -0,0 +1,51 @@
+from quote_cache import QuoteCache
+
+ETAG = '"services-v1"'
+
+def page_with_etag(body, statuses):
+    """Route trang có ETag: trả 304 khi request gửi đúng If-None-Match"""
+
+    def route(method, path, query, headers):
+        if headers.get("If-None-Match") == ETAG:
+            statuses.append(304)
+            return 304, b"", {}
+        statuses.append(200)
+        return 200, body, {"ETag": ETAG}
+
+    return route
+
+def test_not_modified_after_restart_still_fills_catalog(tmp_path, make_scraper, site, pages):
+    statuses = []
+    site.routes["/services"] = page_with_etag(pages("services_page.html"), statuses)
+    cache_path = str(tmp_path / "cache.sqlite")
+
+    # Mỗi scraper như một tiến trình mới: chỉ mục dịch vụ rỗng, validator dùng chung file SQLite
+    first = make_scraper(site, cache=QuoteCache(path=cache_path))
+    categories = first.fetch_service_categories()
+    assert categories
+    assert len(first.catalog) > 0
+
+    restarted = make_scraper(site, cache=QuoteCache(path=cache_path))
+    assert restarted.fetch_service_categories() == categories
+    assert len(restarted.catalog) == len(first.catalog)
+    assert restarted.catalog.lookup("Brake Pad Replacement")
+
+    # Chỉ mục đã có thì lần tải sau mới dùng validator và nhận 304
+    assert restarted.fetch_service_categories() == categories
+    assert statuses == [200, 200, 304]
+    assert restarted.cache.stats()["not_modified"] == 1
+
+def test_service_page_revalidation_reuses_extracted_fields(make_scraper, site, pages):
+    statuses = []
+    site.routes["/services/brake-pad-replacement"] = page_with_etag(pages("service_page.html"), statuses)
+    scraper = make_scraper(site)
+    url = f"{scraper.base_url}/services/brake-pad-replacement"
+
+    full = scraper._extract_pricing_from_service_page(url, "10001", "2020", "Toyota", "Camry")
+    revalidated = scraper._extract_pricing_from_service_page(url, "94103", "2018", "Honda", "Civic")
+
+    assert statuses == [200, 304]
+    vehicle_fields = {"vehicle", "location"}
+    assert {k: v for k, v in revalidated.items() if k not in vehicle_fields} == \
+        {k: v for k, v in full.items() if k not in vehicle_fields}
+    assert (revalidated["vehicle"], revalidated["location"]) == ("2018 Honda Civic", "94103")
@@ -0,0 +1,48 @@
+import itertools
+
+import pandas as pd
+
+from estimate_engine import estimate_batch
+
+YEARS = ["1995", "2005", "2015", "2020", "2023", 2012, "", "unknown", None]
+MAKES = ["Toyota", "Honda", "BMW", "Porsche", "Ford", "Tesla"]
+EXTRA_SERVICES = ["Flux Capacitor Alignment", "Windshield Wiper Service", "Engine Replacement", ""]
+
+def test_estimate_batch_matches_per_row_estimates(make_scraper):
+    scraper = make_scraper()
+    services = [
+        service
+        for category in scraper._get_updated_fallback_categories().values()
+        for service in category
+    ] + EXTRA_SERVICES
+    rows = [
+        (service, year, make, "Model")
+        for service, (year, make) in itertools.product(services, itertools.product(YEARS, MAKES))
+    ]
+
+    batch = estimate_batch(rows)
+
+    assert len(batch) == len(rows)
+    for row, (service, year, make, model) in zip(batch.itertuples(index=False), rows):
+        expected = scraper._get_estimated_pricing(service, year, make, model)
+        assert (row.min_price, row.avg_price, row.max_price) == \
+            (expected["min_price"], expected["avg_price"], expected["max_price"]), (service, year, make)
+
+def test_estimate_batch_accepts_dataframe_and_keeps_input_columns():
+    frame = pd.DataFrame({
+        "service": ["Oil Change", "Brake Pad Replacement"],
+        "year": ["2022", "1999"],
+        "make": ["BMW", "Honda"],
+        "model": ["X5", "Civic"],
+        "note": ["ignored", "ignored"],
+    })
+
+    batch = estimate_batch(frame)
+
+    assert list(batch.columns) == ["service", "year", "make", "model", "min_price", "avg_price", "max_price"]
+    # 60 * 1.2 * 1.4 và 185 * 0.9 * 0.9
+    assert batch["avg_price"].tolist() == [100, 149]
+
+def test_estimate_batch_empty():
+    batch = estimate_batch([])
+    assert batch.empty and str(batch["avg_price"].dtype) == "int64"
@@ -0,0 +1,112 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from bs4 import BeautifulSoup
+
+from extraction import ExtractionEngine, FieldExtractor, service_page_engine
+
+# Kết quả của bản trích xuất gốc (nhiều lượt find_all, regex riêng cho trang estimate) trên các
+# trang mẫu; customer_rating không có trong file vì bản gốc sinh giá trị ngẫu nhiên theo hash của trang
+def load_expected(name):
+    with open(os.path.join(os.path.dirname(__file__), "fixtures", name), encoding="utf-8") as f:
+        return json.load(f)
+
+EXPECTED = load_expected("service_page_expected.json")
+ESTIMATE_EXPECTED = load_expected("estimate_page_expected.json")
+PAGES = {
+    "brake-pad-replacement": "service_page.html",
+    "timing-belt-replacement": "service_page_long.html",
+    "check-engine-light-diagnosis": "service_page_no_prices.html",
+}
+
+@pytest.mark.parametrize("slug", sorted(PAGES))
+def test_single_pass_extraction_matches_original_output(make_scraper, site, pages, slug):
+    site.routes[f"/services/{slug}"] = pages(PAGES[slug])
+    scraper = make_scraper(site)
+
+    result = scraper._extract_pricing_from_service_page(
+        f"{scraper.base_url}/services/{slug}", "10001", "2020", "Toyota", "Camry"
+    )
+
+    if result is not None:
+        result = result.to_dict()
+        result.pop("customer_rating")
+    assert result == EXPECTED[slug]
+
+@pytest.mark.parametrize("page", sorted(ESTIMATE_EXPECTED))
+def test_estimate_page_prices_match_original_output(make_scraper, site, pages, page):
+    site.routes["/estimate"] = pages(page)
+    scraper = make_scraper(site)
+
+    result = scraper._get_quote_via_api("Brake Pad Replacement", "10001", "2020", "Toyota", "Camry")
+
+    if result is not None and result["source"] != "estimate_page":
+        result = None
+    assert result == ESTIMATE_EXPECTED[page]
+
+def test_tree_is_walked_once_and_finished_extractors_are_skipped(pages):
+    visits = []
+
+    class FirstParagraph(FieldExtractor):
+        field = "first_paragraph"
+        tags = ("p",)
+
+        def visit_tag(self, node):
+            visits.append(node.get_text(strip=True))
+            self.done = True
+
+        def result(self):
+            return visits[0] if visits else None
+
+    engine = ExtractionEngine()
+    engine.register(FirstParagraph)
+    soup = BeautifulSoup(pages("service_page.html"), "html.parser")
+
+    fields = engine.run(soup)
+
+    assert visits == [fields["first_paragraph"]]
+    assert set(fields) == set(service_page_engine.run(soup)) | {"first_paragraph"}
+    assert fields["prices"] == service_page_engine.run(soup)["prices"]
+
+RATING_PAGES = {
+    "itemprop": """<div itemscope itemtype="https://schema.org/AggregateRating">
+        <meta itemprop="ratingValue" content="4.83"><span itemprop="reviewCount">2,417</span> reviews</div>""",
+    "json-ld": """<script type="application/ld+json">{"@graph": [{"@type": "Service", "name": "Oil Change",
+        "aggregateRating": {"@type": "AggregateRating", "ratingValue": "4.6", "ratingCount": 318}}]}</script>""",
+}
+
+@pytest.mark.parametrize("markup", sorted(RATING_PAGES))
+def test_rating_is_read_from_schema_org_markup(markup):
+    soup = BeautifulSoup(RATING_PAGES[markup], "html.parser")
+    expected = {"itemprop": (4.8, 2417), "json-ld": (4.6, 318)}[markup]
+
+    rating = service_page_engine.run(soup)["rating"]
+
+    assert (rating["average_rating"], rating["total_reviews"]) == expected
+
+def test_simulated_rating_is_stable_across_hash_seeds(pages):
+    # Chạy ở process riêng với PYTHONHASHSEED khác nhau: hash(str) cũ cho kết quả khác nhau
+    script = (
+        "import json, sys; from scraper_advanced import YourMechanicAdvancedScraper; "
+        "from quote_cache import QuoteCache; from quote_result import as_dict; "
+        "content = open(sys.argv[1], 'rb').read(); "
+        "result = YourMechanicAdvancedScraper(cache=QuoteCache(path=None))._parse_service_page("
+        "content, 'https://www.yourmechanic.com/services/oil-change', '10001', '2020', 'Toyota', 'Camry'); "
+        "print(json.dumps(as_dict(result)['customer_rating'], sort_keys=True))"
+    )
+    page = os.path.join(os.path.dirname(__file__), "fixtures", "service_page.html")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    # Không lưu snapshot/thống kê tier ra data/ của repo
+    env = {**os.environ, "YOURMECHANIC_SNAPSHOT_DIR": "", "YOURMECHANIC_TIER_STATS": ""}
+    outputs = {
+        subprocess.run([sys.executable, "-c", script, page], cwd=root, capture_output=True, text=True, check=True,
+                       env={**env, "PYTHONHASHSEED": seed}).stdout
+        for seed in ("1", "2", "3")
+    }
+
+    assert len(outputs) == 1
+    rating = json.loads(outputs.pop())
+    assert 4.2 <= rating["average_rating"] <= 4.9 and 150 <= rating["total_reviews"] < 650
@@ -0,0 +1,93 @@
+import time
+
+import pytest
+
+from history_db import COMPARISON, HISTORY, HistoryDB
+from quote_result import QuoteResult
+
+DAY = 24 * 3600
+
+def quote(service, avg_price, **extra):
+    return {
+        "service": service, "min_price": avg_price - 20, "avg_price": avg_price, "max_price": avg_price + 20,
+        "labor_time": "1 hour", "source": "service_page", **extra,
+    }
+
+@pytest.fixture
+def db(tmp_path):
+    return HistoryDB(path=str(tmp_path / "history.sqlite"))
+
+def test_add_stores_search_and_flat_quotes(db):
+    search_id = db.add("alice", [quote("Oil Change", 80), quote("Brake Pad Replacement", 250)], HISTORY,
+                       "2020", "Toyota", "Camry", "10001")
+
+    searches = db.searches("alice")
+    assert searches[["id", "vehicle", "zip_code", "services", "total_cost"]].to_dict("records") == [
+        {"id": search_id, "vehicle": "2020 Toyota Camry", "zip_code": "10001", "services": 2, "total_cost": 330}
+    ]
+    quotes = db.quotes("alice", HISTORY, search_id=search_id)
+    assert list(quotes["service"]) == ["Oil Change", "Brake Pad Replacement"]
+    assert set(quotes["make"]) == {"Toyota"}
+
+def test_detail_returns_full_quote(db):
+    search_id = db.add("alice", [quote("Oil Change", 80, whats_included=["Oil", "Filter"])], HISTORY)
+    quote_id = int(db.quotes("alice", search_id=search_id)["id"][0])
+
+    detail = db.detail(quote_id)
+
+    assert isinstance(detail, QuoteResult)
+    assert detail.to_dict()["whats_included"] == ["Oil", "Filter"]
+    assert db.detail(quote_id + 100) is None
+
+def test_searches_page_newest_first(db):
+    now = time.time()
+    for i in range(5):
+        db.add("alice", [quote("Oil Change", 80 + i)], HISTORY, created_at=now + i)
+
+    first = db.searches("alice", limit=2)
+    second = db.searches("alice", limit=2, offset=2)
+
+    assert db.count_searches("alice") == 5
+    assert list(first["total_cost"]) == [84, 83]
+    assert list(second["total_cost"]) == [82, 81]
+
+def test_users_and_kinds_are_isolated(db):
+    db.add("alice", [quote("Oil Change", 80)], HISTORY)
+    db.add("alice", [quote("Oil Change", 90), quote("Battery Replacement", 200)], COMPARISON)
+    db.add("bob", [quote("Oil Change", 100)], HISTORY)
+
+    assert db.count_searches("alice", HISTORY) == 1
+    assert db.count_quotes("alice", COMPARISON) == 2
+    assert list(db.quotes("bob")["avg_price"]) == [100]
+
+    db.clear("alice", COMPARISON)
+
+    assert db.count_quotes("alice", COMPARISON) == 0
+    assert db.count_quotes("alice", HISTORY) == 1
+    assert db.stats() == {"searches": 2, "quotes": 2, "users": 2}
+
+def test_summary_and_trend_aggregate_in_database(db):
+    start = 1_700_000_000
+    db.add("alice", [quote("Oil Change", 80), quote("Oil Change", 100)], HISTORY, make="Toyota", created_at=start)
+    db.add("alice", [quote("Oil Change", 120)], HISTORY, make="Honda", created_at=start + 2 * DAY)
+
+    summary = db.summary(("service",), user_id="alice")
+    assert summary.to_dict("records") == [
+        {"service": "Oil Change", "quotes": 3, "min_price": 60, "avg_price": 100, "max_price": 140}
+    ]
+    trend = db.price_trend("make", "day", user_id="alice", kind=HISTORY)
+    assert list(trend["make"]) == ["Toyota", "Honda"]
+    assert list(trend["avg_price"]) == [90, 120]
+    assert db.count_quotes("alice", since=start + DAY) == 1
+
+def test_unknown_filter_is_rejected(db):
+    with pytest.raises(ValueError):
+        db.quotes("alice", vehicle="2020 Toyota Camry")
+
+def test_empty_path_keeps_history_in_memory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    db = HistoryDB(path="")
+    db.add("alice", [quote("Oil Change", 80)])
+
+    assert db.count_searches("alice") == 1
+    assert not list(tmp_path.iterdir())
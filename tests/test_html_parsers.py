@@ -0,0 +1,25 @@
+import pytest
+
+from html_parsers import DEFAULT_PARSER, available_parsers, resolve_parser
+
+def test_resolve_parser_falls_back_to_default(monkeypatch):
+    monkeypatch.delenv("YOURMECHANIC_HTML_PARSER", raising=False)
+    assert resolve_parser() == DEFAULT_PARSER
+    assert resolve_parser("beautiful-guess") == DEFAULT_PARSER
+
+    monkeypatch.setenv("YOURMECHANIC_HTML_PARSER", "no-such-parser")
+    assert resolve_parser() == DEFAULT_PARSER
+
+@pytest.mark.parametrize("backend", available_parsers())
+def test_backends_extract_the_same_quote(make_scraper, pages, backend):
+    url = "https://www.yourmechanic.com/services/brake-pad-replacement"
+    reference = make_scraper(parser=DEFAULT_PARSER)
+    scraper = make_scraper(parser=backend)
+    assert scraper.parser == backend
+
+    for name in ("service_page.html", "service_page_long.html"):
+        expected = reference._parse_service_page(pages(name), url, "10001", "2020", "Toyota", "Camry").to_dict()
+        actual = scraper._parse_service_page(pages(name), url, "10001", "2020", "Toyota", "Camry").to_dict()
+        for result in (expected, actual):
+            result.pop("customer_rating")
+        assert actual == expected
@@ -0,0 +1,94 @@
+import socket
+import urllib.error
+import urllib.request
+
+import pytest
+
+import metrics
+from metrics import MetricsRegistry
+
+def test_counter_and_histogram_render_prometheus_text():
+    registry = MetricsRegistry()
+    requests_total = registry.counter("demo_requests_total", "Số request", ["method", "status"])
+    latency = registry.histogram("demo_seconds", "Độ trễ", ["stage"], buckets=(0.1, 1.0))
+    requests_total.inc(method="GET", status=200)
+    requests_total.inc(2, method="GET", status=200)
+    requests_total.inc(method="HEAD", status='say "hi"')
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value, stage="parse")
+
+    assert registry.render().splitlines() == [
+        "# HELP demo_requests_total Số request",
+        "# TYPE demo_requests_total counter",
+        'demo_requests_total{method="GET",status="200"} 3',
+        'demo_requests_total{method="HEAD",status="say \\"hi\\""} 1',
+        "# HELP demo_seconds Độ trễ",
+        "# TYPE demo_seconds histogram",
+        'demo_seconds_bucket{stage="parse",le="0.1"} 1',
+        'demo_seconds_bucket{stage="parse",le="1.0"} 2',
+        'demo_seconds_bucket{stage="parse",le="+Inf"} 3',
+        'demo_seconds_sum{stage="parse"} 5.55',
+        'demo_seconds_count{stage="parse"} 3',
+    ]
+
+def test_registering_same_name_returns_existing_metric():
+    registry = MetricsRegistry()
+    first = registry.counter("demo_total", "Demo")
+
+    assert registry.counter("demo_total", "Demo") is first
+
+def test_histogram_summary_uses_bucket_upper_bounds():
+    histogram = MetricsRegistry().histogram("demo_seconds", "Độ trễ", buckets=(0.1, 1.0))
+    for value in (0.05, 0.05, 0.05, 0.5):
+        histogram.observe(value)
+
+    summary = histogram.summary()[()]
+    assert summary["count"] == 4
+    assert (summary["p50"], summary["p95"]) == (0.1, 1.0)
+
+def test_quote_records_cache_source_and_stages(make_scraper, site):
+    quotes, lookups = metrics.QUOTES.values(), metrics.CACHE_LOOKUPS.values()
+    stages = {key: value["count"] for key, value in metrics.STAGE_SECONDS.summary().items()}
+    scraper = make_scraper(site)
+
+    scraper.search_service_pricing("Oil Change")
+    scraper.search_service_pricing("Oil Change")
+
+    def delta(after, before, key):
+        return after.get(key, 0) - before.get(key, 0)
+
+    assert delta(metrics.QUOTES.values(), quotes, ("estimated",)) == 2
+    assert delta(metrics.CACHE_LOOKUPS.values(), lookups, ("miss",)) == 1
+    assert delta(metrics.CACHE_LOOKUPS.values(), lookups, ("hit",)) == 1
+    counts = {key: value["count"] for key, value in metrics.STAGE_SECONDS.summary().items()}
+    assert delta(counts, stages, ("quote",)) == 2
+    assert delta(counts, stages, ("tier_estimated",)) == 1
+    assert delta(counts, stages, ("http_request",)) > 0
+
+@pytest.fixture
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def test_metrics_endpoint_serves_registry(monkeypatch, free_port):
+    monkeypatch.setattr(metrics, "_server", None)
+    registry = MetricsRegistry()
+    registry.counter("demo_total", "Demo").inc()
+
+    server = metrics.start_metrics_server(port=free_port, host="127.0.0.1", registry=registry)
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{free_port}/metrics", timeout=5) as response:
+            assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            assert "demo_total 1" in response.read().decode("utf-8")
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"http://127.0.0.1:{free_port}/other", timeout=5)
+        assert metrics.start_metrics_server(port=free_port, host="127.0.0.1", registry=registry) is server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_port_zero_disables_endpoint(monkeypatch):
+    monkeypatch.setattr(metrics, "_server", None)
+
+    assert metrics.start_metrics_server(port=0) is None
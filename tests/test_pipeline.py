@@ -0,0 +1,51 @@
+import pytest
+
+from bulk_quote import QuoteJob
+from pipeline import QuotePipeline
+from tier_router import TierRouter
+
+SERVICES = ["Brake Pad Replacement", "Oil Change", "Spark Plug Replacement", "Alternator Replacement"]
+VEHICLES = [("10001", "2020", "Toyota", "Camry"), ("94103", "2015", "Honda", "Civic"),
+            ("60601", "2018", "Ford", "F-150")]
+
+class EstimateOnlyRouter(TierRouter):
+    """Router đã bỏ tier service_page cho mọi dịch vụ"""
+
+    def plan(self, service_name):
+        return ["estimate_page"]
+
+def serve_pages(site, pages):
+    """Trang dịch vụ nào cũng có giá (dùng chung cho nhiều xe) và trang /estimate"""
+    service_page, estimate_page = pages("service_page.html"), pages("estimate_page.html")
+
+    def route(method, path, query, headers):
+        if path.startswith("/services/"):
+            return 200, service_page, {}
+        if path == "/estimate":
+            return 200, estimate_page, {}
+        return 404, b"", {}
+
+    site.default = route
+
+def jobs():
+    return [QuoteJob(service, *vehicle) for service in SERVICES for vehicle in VEHICLES]
+
+def quote(scraper, job):
+    return scraper.search_service_pricing(job.service, job.zip_code, job.year, job.make, job.model)
+
+@pytest.mark.parametrize("router, sources", [
+    (TierRouter, {"service_page"}),
+    (EstimateOnlyRouter, {"estimate_page"}),
+], ids=["all_tiers", "estimate_only"])
+def test_pipeline_with_parse_workers_matches_serial_search(make_scraper, site, pages, router, sources):
+    serve_pages(site, pages)
+    serial = make_scraper(site, router=router(path=None))
+    piped = make_scraper(site, router=router(path=None))
+    expected = {job: quote(serial, job) for job in jobs()}
+
+    with QuotePipeline(piped, fetch_workers=4, parse_workers=2) as pipeline:
+        actual = dict(pipeline.run(jobs()))
+
+    assert actual == expected
+    assert {result["source"] for result in expected.values()} == sources
+    assert len({result["vehicle"] for result in expected.values()}) == len(VEHICLES)
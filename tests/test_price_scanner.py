@@ -0,0 +1,21 @@
+from price_scanner import PriceSummary, scan_price_values, scan_prices, summarize_prices
+
+TEXT = "Dealer quote $1,250.00, our price $612.99; filter $19, rebuild $9,999 and oil $45."
+
+def test_scan_prices_keeps_reasonable_values_with_context():
+    tokens = scan_prices(TEXT, context_chars=8)
+
+    assert [(t.value, t.raw) for t in tokens] == [(1250, "$1,250.00"), (612, "$612.99"), (45, "$45")]
+    first = tokens[0]
+    assert TEXT[first.start:first.end] == "$1,250.00"
+    assert first.context == "r quote $1,250.00, our pr"
+
+def test_scan_price_values_matches_scan_prices():
+    assert scan_price_values(TEXT) == [t.value for t in scan_prices(TEXT)]
+    assert scan_price_values(TEXT, min_price=10, max_price=10000) == [1250, 612, 19, 9999, 45]
+    assert scan_price_values("no prices here, 45 dollars") == []
+
+def test_summarize_prices():
+    assert summarize_prices([95, 120, 215]) == PriceSummary(95, 215, 143)
+    assert summarize_prices(iter([100])) == PriceSummary(100, 100, 100)
+    assert summarize_prices([]) is None
@@ -0,0 +1,94 @@
+import pytest
+
+import quote_cache
+from quote_cache import QuoteCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(quote_cache, "time", fake)
+    return fake
+
+def quote(source, price=100):
+    return {"service": "Oil Change", "source": source, "avg_price": price}
+
+def test_make_key_normalizes_case_and_whitespace():
+    assert QuoteCache.make_key(" Oil Change", "10001", 2020, "TOYOTA ", "Camry") == \
+        QuoteCache.make_key("oil change", "10001", "2020", "toyota", "camry")
+
+def test_scraped_quotes_expire_before_estimated_ones(clock):
+    cache = QuoteCache(path=None)
+    cache.set("scraped", quote("service_page"))
+    cache.set("estimated", quote("estimated"))
+
+    clock.now += cache.ttls["service_page"] + 1
+
+    assert cache.get("scraped") is None
+    assert cache.get("estimated") == quote("estimated")
+    assert cache.stats()["expired"] == 1
+
+def test_explicit_ttl_and_unknown_source_default(clock):
+    cache = QuoteCache(path=None, default_ttl=60)
+    cache.set("short", quote("estimated"), ttl=10)
+    cache.set("unknown", quote("somewhere"))
+
+    clock.now += 30
+    assert cache.get("short") is None
+    assert cache.get("unknown") is not None
+    clock.now += 31
+    assert cache.get("unknown") is None
+
+def test_memory_tier_is_bounded_lru(clock):
+    cache = QuoteCache(path=None, max_entries=2)
+    cache.set("a", quote("estimated", 1))
+    cache.set("b", quote("estimated", 2))
+    assert cache.get("a")["avg_price"] == 1  # "a" mới dùng: "b" là cũ nhất
+    cache.set("c", quote("estimated", 3))
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+
+def test_evicted_entry_is_served_from_disk_and_promoted(tmp_path, clock):
+    cache = QuoteCache(path=str(tmp_path / "cache.sqlite"), max_entries=1)
+    cache.set("a", quote("estimated", 1))
+    cache.set("b", quote("estimated", 2))
+
+    assert cache.get("a")["avg_price"] == 1
+    assert cache.get("a")["avg_price"] == 1
+    stats = cache.stats()
+    assert (stats["disk_hits"], stats["memory_hits"]) == (1, 1)
+    assert stats["memory_entries"] == 1 and stats["disk_entries"] == 2
+
+def test_disk_tier_survives_restart_and_drops_expired_rows(tmp_path, clock):
+    path = str(tmp_path / "cache.sqlite")
+    first = QuoteCache(path=path)
+    first.set("fresh", quote("estimated"))
+    first.set("stale", quote("service_page"))
+
+    clock.now += first.ttls["service_page"] + 1
+    restarted = QuoteCache(path=path)
+
+    assert restarted.get("fresh") == quote("estimated")
+    assert restarted.get("stale") is None
+    assert restarted.stats()["disk_entries"] == 1
+
+def test_purge_expired_and_hit_rate(tmp_path, clock):
+    cache = QuoteCache(path=str(tmp_path / "cache.sqlite"))
+    cache.set("a", quote("service_page"))
+    cache.set("b", quote("estimated"))
+    cache.get("a")
+    cache.get("missing")
+
+    clock.now += cache.ttls["service_page"] + 1
+
+    assert cache.purge_expired() == 1
+    assert cache.stats()["hit_rate"] == 0.5
@@ -0,0 +1,65 @@
+import json
+import pickle
+from collections.abc import Mapping
+
+import pandas as pd
+
+from quote_result import QuoteResult, as_dict
+
+def make_quote(service="Brake Pad Replacement", avg_price=250, **extra):
+    return QuoteResult(
+        service=service, vehicle="2020 Toyota Camry", location="ZIP 10001",
+        min_price=200, max_price=300, avg_price=avg_price, labor_time="1.5 hours", source="service_page",
+        whats_included=["Pads", "Labor"],
+        warranty_info={"parts_warranty": "12 months", "labor_warranty": "12 months"},
+        cost_breakdown={"labor_cost": 120, "parts_cost": 130},
+        mechanic_info={"service_locations": ["Home", "Office"]},
+        **extra,
+    )
+
+def test_quote_result_is_a_full_mapping():
+    result = make_quote(note="extra field")
+
+    assert isinstance(result, Mapping)
+    assert list(result.keys()) == list(result.to_dict())
+    assert list(result.values())[5] == 250
+    assert dict(result.items())["note"] == "extra field"
+    assert len(result) == len(result.to_dict())
+    assert dict(result) == result
+    assert "cost_breakdown" in result and "customer_rating" not in result
+
+def test_pickle_round_trip_keeps_type_and_shared_sections():
+    result = make_quote()
+
+    restored = pickle.loads(pickle.dumps(result))
+
+    assert type(restored) is QuoteResult
+    assert restored == result
+    # Phần giống nhau được intern lại thành cùng một object ở bên nhận
+    assert restored["warranty_info"] is result["warranty_info"]
+
+def test_json_round_trip_through_to_dict():
+    result = make_quote(note="extra field")
+
+    data = json.loads(json.dumps(result.to_dict()))
+
+    assert data == result.to_dict()
+    assert type(data["whats_included"]) is list and type(data["cost_breakdown"]) is dict
+    assert QuoteResult.from_dict(data) == result
+    assert as_dict(result) == data
+
+def test_to_dict_returns_plain_mutable_nested_values():
+    data = make_quote().to_dict()
+
+    data["whats_included"].append("Rotors")
+    data["mechanic_info"]["service_locations"].append("Shop")
+
+    assert make_quote()["whats_included"] == ("Pads", "Labor")
+
+def test_dataframe_round_trip():
+    results = [make_quote(), make_quote("Oil Change", 80)]
+
+    df = pd.DataFrame([as_dict(result) for result in results])
+
+    assert list(df.columns) == list(results[0])
+    assert [QuoteResult.from_dict(row) for row in df.to_dict("records")] == results
@@ -0,0 +1,160 @@
+import pytest
+import requests
+
+import rate_limiter
+from rate_limiter import AdaptiveConcurrency, DeadlineExceeded, RateLimiter, RetryPolicy, TokenBucket
+
+class FakeTime:
+    """Đồng hồ giả: sleep chỉ tăng thời gian, không chờ thật"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(rate_limiter, "time", fake)
+    return fake
+
+def make_response(status, headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers or {})
+    return response
+
+def test_token_bucket_spaces_requests_at_rate(clock):
+    bucket = TokenBucket(rate=2, burst=1)
+    assert bucket.acquire()
+    assert bucket.acquire()
+    assert bucket.acquire()
+    assert clock.sleeps == pytest.approx([0.5, 0.5])
+
+def test_token_bucket_allows_burst_then_refills(clock):
+    bucket = TokenBucket(rate=1, burst=3)
+    for _ in range(3):
+        assert bucket.acquire()
+    assert clock.sleeps == []
+    clock.now += 2
+    assert bucket.acquire() and bucket.acquire()
+    assert clock.sleeps == []
+
+def test_token_bucket_gives_up_past_deadline(clock):
+    bucket = TokenBucket(rate=1, burst=1)
+    assert bucket.acquire()
+    assert not bucket.acquire(deadline=clock.now + 0.5)
+    assert clock.sleeps == []
+
+def test_token_bucket_pause_blocks_until_resume(clock):
+    bucket = TokenBucket(rate=10, burst=5)
+    bucket.pause(3)
+    assert bucket.acquire()
+    assert sum(clock.sleeps) == pytest.approx(3)
+
+def test_aimd_additive_increase(clock):
+    concurrency = AdaptiveConcurrency(initial=4, max_limit=8)
+    # +1/limit mỗi lần thành công: khoảng một vòng (limit lượt) thì tăng thêm 1
+    for _ in range(5):
+        assert concurrency.acquire()
+        concurrency.release(ok=True, latency=0.1)
+    assert concurrency.limit == 5
+
+def test_aimd_multiplicative_decrease_once_per_window(clock):
+    concurrency = AdaptiveConcurrency(initial=8, backoff=0.5)
+    concurrency.acquire()
+    concurrency.release(ok=True, latency=0.2)
+    for _ in range(3):
+        concurrency.acquire()
+        concurrency.release(ok=False)
+        clock.now += 0.05
+    # Nhiều lỗi trong cùng một khoảng độ trễ chỉ giảm giới hạn một lần
+    assert concurrency.limit == 4
+    clock.now += 1
+    concurrency.acquire()
+    concurrency.release(ok=False)
+    assert concurrency.limit == 2
+
+def test_aimd_slow_responses_do_not_increase_limit(clock):
+    concurrency = AdaptiveConcurrency(initial=4, latency_tolerance=2.0)
+    concurrency.acquire()
+    concurrency.release(ok=True, latency=0.1)
+    limit = concurrency._limit
+    concurrency.acquire()
+    concurrency.release(ok=True, latency=1.0)
+    assert concurrency._limit == limit
+
+def test_concurrency_cap(clock):
+    concurrency = AdaptiveConcurrency(initial=2, max_limit=2)
+    assert concurrency.acquire() and concurrency.acquire()
+    assert concurrency.in_flight == 2
+    assert not concurrency.acquire(deadline=clock.now)
+    concurrency.release(ok=True)
+    assert concurrency.acquire(deadline=clock.now)
+
+def test_call_retries_overload_then_succeeds(clock):
+    limiter = RateLimiter(rate=100, retry=RetryPolicy(max_attempts=3, base_delay=0))
+    responses = [make_response(503), make_response(200)]
+    response = limiter.call("https://example.com/a", lambda timeout: responses.pop(0))
+    assert response.status_code == 200
+    stats = limiter.stats()
+    assert stats["requests"] == 2 and stats["retries"] == 1 and stats["overloads"] == 1
+
+def test_call_honours_retry_after(clock):
+    limiter = RateLimiter(rate=100, retry=RetryPolicy(max_attempts=2, base_delay=0))
+    responses = [make_response(429, {"Retry-After": "3"}), make_response(200)]
+    started = clock.now
+    assert limiter.call("https://example.com/a", lambda timeout: responses.pop(0)).status_code == 200
+    assert clock.now - started >= 3
+
+def test_call_returns_last_response_after_retries(clock):
+    limiter = RateLimiter(rate=100, retry=RetryPolicy(max_attempts=2, base_delay=0))
+    calls = []
+    response = limiter.call("https://example.com/a", lambda timeout: calls.append(timeout) or make_response(502))
+    assert response.status_code == 502
+    assert len(calls) == 2
+
+def test_call_raises_last_network_error(clock):
+    limiter = RateLimiter(rate=100, retry=RetryPolicy(max_attempts=2, base_delay=0))
+
+    def send(timeout):
+        raise requests.exceptions.ConnectionError("down")
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        limiter.call("https://example.com/a", send)
+
+def test_call_does_not_retry_client_errors(clock):
+    limiter = RateLimiter(rate=100, retry=RetryPolicy(max_attempts=3, base_delay=0))
+    calls = []
+    response = limiter.call("https://example.com/a", lambda timeout: calls.append(1) or make_response(404))
+    assert response.status_code == 404
+    assert len(calls) == 1
+
+def test_call_passes_remaining_deadline_as_timeout(clock):
+    limiter = RateLimiter(rate=100, deadline=10)
+    timeouts = []
+    limiter.call("https://example.com/a", lambda timeout: timeouts.append(timeout) or make_response(200), timeout=15)
+    assert timeouts == [10]
+
+def test_deadline_exceeded_waiting_for_token(clock):
+    limiter = RateLimiter(rate=0.1, burst=1, deadline=5)
+    ok = lambda timeout: make_response(200)
+    limiter.call("https://example.com/a", ok)
+    with pytest.raises(DeadlineExceeded) as raised:
+        limiter.call("https://example.com/b", ok)
+    assert isinstance(raised.value, requests.exceptions.Timeout)
+    assert limiter.stats()["deadline_exceeded"] == 1
+
+def test_hosts_have_separate_limits(clock):
+    limiter = RateLimiter(rate=1, burst=1)
+    ok = lambda timeout: make_response(200)
+    limiter.call("https://a.example.com/", ok)
+    limiter.call("https://b.example.com/", ok)
+    assert clock.sleeps == []
+    assert set(limiter.stats()["hosts"]) == {"a.example.com", "b.example.com"}
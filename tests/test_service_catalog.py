@@ -0,0 +1,78 @@
+from bs4 import BeautifulSoup
+
+from service_catalog import ServiceCatalog, normalize_service_name
+
+BASE_URL = "https://www.yourmechanic.com"
+
+def services_catalog(pages):
+    catalog = ServiceCatalog(path="")
+    soup = BeautifulSoup(pages("services_page.html"), "html.parser")
+    catalog.update_from_soup(soup, BASE_URL)
+    return catalog
+
+def test_normalize_service_name():
+    assert normalize_service_name("Car Oil-Change!") == "oil change"
+    assert normalize_service_name("  Brake   Pad Replacement ") == "brake pad replacement"
+
+def test_services_page_links_are_indexed_with_categories(pages):
+    catalog = services_catalog(pages)
+
+    assert catalog.lookup("Brake Rotor Replacement") == {
+        "name": "Brake Rotor Replacement",
+        "url": f"{BASE_URL}/services/brake-rotor-replacement",
+        "category": "Brakes",
+    }
+    assert catalog.lookup("oil change")["category"] == "Maintenance"
+    # Link ngoài danh mục vẫn vào chỉ mục nhưng không có danh mục
+    assert catalog.lookup("Battery Replacement")["category"] is None
+    # Bỏ link không phải /services/<slug> và tên quá ngắn
+    assert catalog.lookup("How to change your oil") is None
+    assert catalog.lookup("ABS") is None
+    assert len(catalog) == 5
+
+def test_sitemap_index_returns_children_and_urlset_adds_services(pages):
+    catalog = ServiceCatalog(path="")
+
+    children = catalog.update_from_sitemap(pages("sitemap_index.xml"))
+    assert children == [f"{BASE_URL}/sitemap-services.xml", f"{BASE_URL}/sitemap-articles.xml"]
+    assert len(catalog) == 0
+
+    assert catalog.update_from_sitemap(pages("sitemap_services.xml")) == []
+    assert catalog.lookup("timing belt replacement")["url"] == f"{BASE_URL}/services/timing-belt-replacement"
+    assert len(catalog) == 2
+
+def test_fuzzy_lookup_respects_cutoff(pages):
+    catalog = services_catalog(pages)
+
+    assert catalog.lookup("Brake Pads Replacement")["url"] == f"{BASE_URL}/services/brake-pad-replacement"
+    assert catalog.lookup("Transmission Fluid Flush") is None
+
+def test_save_and_load_round_trip(tmp_path, pages):
+    path = str(tmp_path / "catalog.json")
+    catalog = services_catalog(pages)
+    catalog.mark_built()
+    catalog.save(path)
+
+    loaded = ServiceCatalog(path=path)
+    assert len(loaded) == len(catalog)
+    assert loaded.built_at == catalog.built_at
+    assert loaded.lookup("Spark Plug Replacement") == catalog.lookup("Spark Plug Replacement")
+
+def test_refresh_catalog_follows_service_sitemaps_only(make_scraper, site, pages):
+    site.routes["/services"] = pages("services_page.html")
+    site.routes["/sitemap.xml"] = pages("sitemap_index.xml")
+    site.routes["/sitemap-services.xml"] = pages("sitemap_services.xml")
+    scraper = make_scraper(site)
+
+    assert scraper.refresh_catalog(save=False) == 6
+    fetched = [path for method, path in site.calls if method == "GET"]
+    assert fetched == ["/services", "/sitemap.xml", "/sitemap-services.xml"]
+
+def test_catalog_lookup_replaces_head_probes(make_scraper, site, pages):
+    site.routes["/services"] = pages("services_page.html")
+    scraper = make_scraper(site)
+    scraper.get_service_categories_from_website()
+
+    assert scraper._find_service_page("Oil Change") == f"{BASE_URL}/services/oil-change"
+    assert scraper._find_service_page("Timing Belt Replacement") is None
+    assert not [call for call in site.calls if call[0] == "HEAD"]
@@ -0,0 +1,77 @@
+import threading
+import time
+
+import service_resolver
+from service_resolver import ServicePageResolver
+
+def test_highest_priority_hit_wins_even_if_slower():
+    def probe(url):
+        if url == "first":
+            time.sleep(0.05)
+            return True
+        return url == "second"
+
+    resolver = ServicePageResolver()
+    assert resolver.resolve("slug", ["first", "second", "third"], probe) == "first"
+
+def test_candidates_are_deduplicated_and_probed_concurrently():
+    probed = []
+    barrier = threading.Barrier(3, timeout=2)
+
+    def probe(url):
+        probed.append(url)
+        barrier.wait()  # Chỉ qua được khi cả 3 probe chạy cùng lúc
+        return url == "c"
+
+    resolver = ServicePageResolver(max_workers=4)
+    assert resolver.resolve("slug", ["a", "b", "a", "c"], probe) == "c"
+    assert sorted(probed) == ["a", "b", "c"]
+
+def test_found_and_missing_results_are_remembered():
+    calls = []
+
+    def probe(url):
+        calls.append(url)
+        return url == "found"
+
+    resolver = ServicePageResolver()
+    assert resolver.resolve("hit", ["found"], probe) == "found"
+    assert resolver.resolve("hit", ["found"], probe) == "found"
+    assert resolver.resolve("miss", ["nothing"], probe) is None
+    assert resolver.resolve("miss", ["nothing"], probe) is None
+
+    assert calls == ["found", "nothing"]
+    stats = resolver.stats()
+    assert (stats["hits"], stats["negative_hits"], stats["misses"]) == (1, 1, 2)
+
+def test_negative_result_expires(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(service_resolver, "time", type("Clock", (), {"time": staticmethod(lambda: now[0])}))
+    resolver = ServicePageResolver(negative_ttl=60)
+    resolver.remember("slug", None)
+
+    assert resolver.cached("slug") == (True, None)
+    now[0] += 61
+    assert resolver.cached("slug") == (False, None)
+
+def test_network_errors_are_not_remembered():
+    def probe(url):
+        raise ConnectionError("offline")
+
+    resolver = ServicePageResolver()
+    assert resolver.resolve("slug", ["a", "b"], lambda url: None) is None
+    assert resolver.resolve("slug", ["a"], probe) is None
+    assert resolver.cached("slug") == (False, None)
+
+def test_scraper_probes_each_service_once(make_scraper, site):
+    site.routes["/services/brake-pad-replacement"] = b"<html></html>"
+    scraper = make_scraper(site)
+
+    for _ in range(3):
+        url = scraper._find_service_page("Brake Pad Replacement")
+        assert url == f"{scraper.base_url}/services/brake-pad-replacement"
+
+    heads = [path for method, path in site.calls if method == "HEAD"]
+    candidates = set(scraper._candidate_service_urls("Brake Pad Replacement"))
+    assert len(heads) <= len(candidates)
+    assert scraper.resolver.stats()["hits"] == 2
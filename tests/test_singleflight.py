@@ -0,0 +1,105 @@
+import asyncio
+import threading
+import time
+
+from singleflight import AsyncSingleFlight, SingleFlight
+
+CALLERS = 8
+
+def run_callers(flights, caller, release):
+    """Chạy CALLERS thread, chỉ cho lời gọi upstream kết thúc khi mọi caller đã vào do()"""
+    threads = [threading.Thread(target=caller) for _ in range(CALLERS)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while flights.stats()["calls"] < CALLERS and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+    assert not any(thread.is_alive() for thread in threads)
+
+def test_concurrent_callers_share_one_call():
+    flights = SingleFlight()
+    release = threading.Event()
+    upstream = []
+    results = []
+
+    def fetch():
+        upstream.append(1)
+        release.wait(5)
+        return "page"
+
+    def caller():
+        results.append(flights.do(("GET", "/services"), fetch))
+
+    run_callers(flights, caller, release)
+
+    assert upstream == [1]
+    assert results == ["page"] * CALLERS
+    assert flights.stats() == {"calls": CALLERS, "shared": CALLERS - 1, "in_flight": 0}
+
+def test_error_reaches_every_waiter():
+    flights = SingleFlight()
+    release = threading.Event()
+    upstream = []
+    errors = []
+
+    def fetch():
+        upstream.append(1)
+        release.wait(5)
+        raise ValueError("upstream failed")
+
+    def caller():
+        try:
+            flights.do("key", fetch)
+        except ValueError as e:
+            errors.append(e)
+
+    run_callers(flights, caller, release)
+
+    assert upstream == [1]
+    assert len(errors) == CALLERS
+    assert all(str(e) == "upstream failed" for e in errors)
+
+def test_new_call_after_completion():
+    flights = SingleFlight()
+    calls = []
+    assert flights.do("key", lambda: calls.append(1) or len(calls)) == 1
+    assert flights.do("key", lambda: calls.append(1) or len(calls)) == 2
+
+def test_async_callers_share_one_call():
+    async def main():
+        flights = AsyncSingleFlight()
+        upstream = []
+
+        async def fetch():
+            upstream.append(1)
+            await asyncio.sleep(0.01)
+            return "page"
+
+        results = await asyncio.gather(*(flights.do("key", fetch) for _ in range(CALLERS)))
+        return upstream, results, flights.stats()
+
+    upstream, results, stats = asyncio.run(main())
+    assert upstream == [1]
+    assert results == ["page"] * CALLERS
+    assert stats == {"calls": CALLERS, "shared": CALLERS - 1, "in_flight": 0}
+
+def test_async_error_reaches_every_waiter():
+    async def main():
+        flights = AsyncSingleFlight()
+        upstream = []
+
+        async def fetch():
+            upstream.append(1)
+            await asyncio.sleep(0.01)
+            raise ValueError("upstream failed")
+
+        results = await asyncio.gather(*(flights.do("key", fetch) for _ in range(CALLERS)),
+                                       return_exceptions=True)
+        return upstream, results
+
+    upstream, results = asyncio.run(main())
+    assert upstream == [1]
+    assert all(isinstance(result, ValueError) for result in results)
@@ -0,0 +1,138 @@
+import os
+import random
+import threading
+import time
+
+import snapshot_store
+from snapshot_store import SnapshotStore
+
+def make_store(tmp_path, **kwargs):
+    """Kho không tự dọn khi put để test gọi prune tường minh"""
+    kwargs.setdefault("max_age_days", 0)
+    kwargs.setdefault("max_mb", 0)
+    return SnapshotStore(root=str(tmp_path / "snapshots"), **kwargs)
+
+def page(n, size=2000):
+    # Byte ngẫu nhiên (cố định theo n) để gzip không nén được, dung lượng blob gần bằng `size`
+    return random.Random(n).randbytes(size)
+
+def blob_files(store):
+    return sorted(
+        name for _, _, names in os.walk(os.path.join(store.root, "objects")) for name in names
+    )
+
+def test_prune_drops_snapshots_older_than_max_age(tmp_path, monkeypatch):
+    store = make_store(tmp_path)
+    now = time.time()
+    monkeypatch.setattr(snapshot_store.time, "time", lambda: now - 10 * 86400)
+    old = store.put("https://example.com/services/old", page(1), "service_page")
+    monkeypatch.setattr(snapshot_store.time, "time", lambda: now)
+    fresh = store.put("https://example.com/services/fresh", page(2), "service_page")
+
+    result = store.prune(max_age=7 * 86400, max_bytes=0)
+
+    assert result["snapshots"] == 1 and result["blobs"] == 1
+    assert store.latest("https://example.com/services/old") is None
+    assert store.latest("https://example.com/services/fresh")["sha256"] == fresh
+    assert blob_files(store) == [f"{fresh}.gz"]
+    assert old != fresh
+
+def test_prune_keeps_blob_still_seen_by_another_url(tmp_path, monkeypatch):
+    store = make_store(tmp_path)
+    content = page(1)
+    now = time.time()
+    monkeypatch.setattr(snapshot_store.time, "time", lambda: now - 10 * 86400)
+    sha = store.put("https://example.com/a", content)
+    monkeypatch.setattr(snapshot_store.time, "time", lambda: now)
+    store.put("https://example.com/b", content)
+
+    store.prune(max_age=7 * 86400, max_bytes=0)
+
+    assert store.latest("https://example.com/a") is None
+    assert store.get(sha) == content
+
+def test_prune_evicts_least_recently_seen_blobs_over_max_bytes(tmp_path, monkeypatch):
+    store = make_store(tmp_path)
+    clock = [time.time()]
+    monkeypatch.setattr(snapshot_store.time, "time", lambda: clock[0])
+    shas = []
+    for n in range(5):
+        clock[0] += 1
+        shas.append(store.put(f"https://example.com/services/{n}", page(n)))
+    clock[0] += 1
+    store.put("https://example.com/services/0", page(0))  # Thấy lại trang 0: giờ là mới nhất
+    page_size = os.path.getsize(os.path.join(store.root, "objects", shas[1][:2], f"{shas[1]}.gz"))
+
+    result = store.prune(max_age=0, max_bytes=3 * page_size)
+
+    assert result["blobs"] == 2
+    assert store.stats()["stored_bytes"] <= 3 * page_size
+    assert blob_files(store) == sorted(f"{sha}.gz" for sha in (shas[0], shas[3], shas[4]))
+
+def test_put_prunes_at_most_once_per_interval(tmp_path, monkeypatch):
+    store = make_store(tmp_path, max_age_days=1, prune_interval=3600)
+    calls = []
+    monkeypatch.setattr(store, "prune", lambda: calls.append(1))
+
+    store.put("https://example.com/a", page(1))
+    store.put("https://example.com/b", page(2))
+
+    assert calls == [1]
+
+def test_submit_writes_in_background_and_flush_waits(tmp_path):
+    store = make_store(tmp_path)
+
+    assert store.submit("https://example.com/services/a", page(1), "service_page")
+    store.flush()
+
+    assert store.latest("https://example.com/services/a")["kind"] == "service_page"
+    assert store.stats()["pending"] == 0
+
+def test_submit_drops_snapshot_when_queue_is_full(tmp_path, monkeypatch):
+    store = make_store(tmp_path, max_pending=1)
+    writing, release = threading.Event(), threading.Event()
+    put = store.put
+
+    def slow_put(*args):
+        writing.set()
+        release.wait(5)
+        return put(*args)
+
+    monkeypatch.setattr(store, "put", slow_put)
+    assert store.submit("https://example.com/a", page(1))
+    writing.wait(5)                                        # Thread ghi đang bận với trang a
+    assert store.submit("https://example.com/b", page(2))  # Chiếm chỗ duy nhất trong hàng đợi
+    assert not store.submit("https://example.com/c", page(3))
+    release.set()
+    store.flush()
+
+    assert store.stats()["dropped"] == 1
+    assert store.latest("https://example.com/b") is not None
+    assert store.latest("https://example.com/c") is None
+
+def test_disabled_store_ignores_submit():
+    store = SnapshotStore(root=None)
+
+    assert not store.submit("https://example.com/a", page(1))
+    assert store.stats() == {"enabled": False}
+
+def test_scraper_archives_fetched_pages(tmp_path, monkeypatch, make_scraper, site, pages):
+    site.routes["/services/brake-pad-replacement"] = pages("service_page.html")
+    store = make_store(tmp_path)
+    scraper = make_scraper(site, snapshots=store)
+    url = f"{scraper.base_url}/services/brake-pad-replacement"
+
+    live = scraper._extract_pricing_from_service_page(url, "10001", "2020", "Toyota", "Camry")
+    scraper._request('HEAD', url)
+    store.flush()
+
+    snapshot = store.latest(url)
+    assert snapshot["kind"] == "service_page"
+    assert store.get(snapshot["sha256"]) == pages("service_page.html")
+    assert store.stats()["snapshots"] == 1
+
+    # Trích xuất lại offline trên process pool cho cùng kết quả, không ghi gì ra thư mục làm việc
+    monkeypatch.chdir(tmp_path)
+    records = list(snapshot_store.reextract(store, workers=1, vehicle=("10001", "2020", "Toyota", "Camry")))
+    assert [record["result"] for record in records] == [live]
+    assert sorted(os.listdir(tmp_path)) == ["snapshots"]
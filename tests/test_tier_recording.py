@@ -0,0 +1,55 @@
+from tier_router import TierRouter
+
+SERVICE = "Brake Pad Replacement"
+
+class PlannedRouter(TierRouter):
+    """Router cố định các tier và ghi lại mọi lần record"""
+
+    def __init__(self, tiers):
+        super().__init__(path=None)
+        self.tiers = tiers
+        self.records = []
+
+    def plan(self, service_name):
+        return list(self.tiers)
+
+    def record(self, service_name, tier, ok):
+        self.records.append((tier, ok))
+
+def service_pages_only(content):
+    """Trang /estimate luôn 404, mọi trang /services/<slug> tồn tại"""
+
+    def route(method, path, query, headers):
+        if path.startswith("/services/"):
+            return 200, content, {}
+        return 404, b"", {}
+
+    return route
+
+def test_service_page_fallback_is_recorded_as_service_page(make_scraper, site, pages):
+    site.default = service_pages_only(pages("service_page.html"))
+    scraper = make_scraper(site, router=PlannedRouter(["service_page", "estimate_page"]))
+    # Lần tải trang dịch vụ đầu lỗi tạm thời, fallback bên trong tier estimate_page tải lại thành công
+    original = scraper._extract_pricing_from_service_page
+    calls = []
+
+    def flaky(*args):
+        calls.append(args)
+        return original(*args) if len(calls) > 1 else None
+
+    scraper._extract_pricing_from_service_page = flaky
+
+    result = scraper.search_service_pricing(SERVICE)
+
+    assert result["source"] == "service_page"
+    assert scraper.router.records == [("service_page", False), ("estimate_page", False), ("service_page", True)]
+
+def test_estimate_tier_skips_service_page_when_router_dropped_it(make_scraper, site, pages):
+    site.default = service_pages_only(pages("service_page.html"))
+    scraper = make_scraper(site, router=PlannedRouter(["estimate_page"]))
+
+    result = scraper.search_service_pricing(SERVICE)
+
+    assert result["source"] == "estimated"
+    assert scraper.router.records == [("estimate_page", False)]
+    assert not any(path.startswith("/services/") for _, path in site.calls)
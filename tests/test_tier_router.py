@@ -0,0 +1,38 @@
+import tier_router
+from tier_router import TierRouter
+
+SERVICE = "Brake Pad Replacement"
+
+def test_failing_tier_is_skipped_until_a_success_revives_it(monkeypatch):
+    router = TierRouter(path=None, epsilon=0.05)
+    monkeypatch.setattr(tier_router.random, "random", lambda: 0.5)  # Không rơi vào lượt thử lại
+    for _ in range(3):
+        router.record(SERVICE, "service_page", False)
+
+    assert router.plan(SERVICE) == ["estimate_page"]
+    assert router.plan("Oil Change") == ["service_page", "estimate_page"]
+
+    monkeypatch.setattr(tier_router.random, "random", lambda: 0.01)
+    assert router.plan(SERVICE) == ["service_page", "estimate_page"]
+    router.record(SERVICE, "service_page", True)
+
+    monkeypatch.setattr(tier_router.random, "random", lambda: 0.5)
+    assert router.plan(SERVICE) == ["service_page", "estimate_page"]
+    assert router.stats()["skipped"] == 1 and router.stats()["reprobes"] == 1
+
+def test_processes_sharing_a_database_merge_instead_of_overwriting(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    app, warmer = TierRouter(path=path), TierRouter(path=path)
+
+    app.record(SERVICE, "estimate_page", False)
+    warmer.record(SERVICE, "estimate_page", False)
+    warmer.record(SERVICE, "estimate_page", False)
+    app.save()
+    warmer.save()
+
+    # Process mới thấy đủ 3 lần thất bại của cả hai process
+    restarted = TierRouter(path=path, epsilon=0)
+    assert restarted.success_rate(SERVICE, "estimate_page") == 0.0
+    assert restarted.plan(SERVICE) == ["service_page"]
+    app.load()
+    assert app.stats()["dead_estimate_page"] == 1
@@ -0,0 +1,137 @@
+import json
+import threading
+
+import rate_limiter
+from quote_cache import QuoteCache
+from snapshot_store import SnapshotStore
+from tier_router import TierRouter
+from usage_log import UsageLog
+from warmup import QuoteWarmer, budget_limiter
+
+def record(log, service, make="Toyota", times=1):
+    for _ in range(times):
+        log.record(service, "10001", "2020", make, "Camry")
+
+def test_tail_reads_only_new_complete_lines(tmp_path):
+    log = UsageLog(path=str(tmp_path / "usage.jsonl"))
+    entries, position = log.tail()
+    assert entries == []
+
+    record(log, "Oil Change", times=2)
+    entries, position = log.tail(position)
+    assert [e["service"] for e in entries] == ["Oil Change", "Oil Change"]
+
+    with open(log.path, "a", encoding="utf-8") as f:
+        f.write("not json\n")
+        f.write(json.dumps({"service": "Brake Pad Replacement"}))  # Dòng đang ghi dở
+    entries, position = log.tail(position)
+    assert entries == []
+
+    with open(log.path, "a", encoding="utf-8") as f:
+        f.write("\n")
+    entries, position = log.tail(position)
+    assert [e["service"] for e in entries] == ["Brake Pad Replacement"]
+
+def test_rotation_keeps_one_backup_and_tail_follows_it(tmp_path):
+    log = UsageLog(path=str(tmp_path / "usage.jsonl"), max_bytes=400)
+    record(log, "Oil Change", times=2)
+    entries, position = log.tail()
+    assert len(entries) == 2
+
+    for i in range(12):
+        record(log, f"Service {i}")
+
+    # Mỗi entry ~120 byte: file đã xoay vòng nhiều lần, chỉ còn file hiện tại và một bản .1
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["usage.jsonl", "usage.jsonl.1"]
+    assert all(p.stat().st_size < 400 + 200 for p in tmp_path.iterdir())
+
+    # Đọc từ đầu: bản .1 rồi file hiện tại, đúng thứ tự ghi
+    fresh, _ = log.tail()
+    assert [e["service"] for e in fresh] == [f"Service {i}" for i in range(12)][-len(fresh):]
+
+def test_tail_finishes_rotated_file_before_new_one(tmp_path):
+    log = UsageLog(path=str(tmp_path / "usage.jsonl"), max_bytes=300)
+    record(log, "A")
+    _, position = log.tail()
+    record(log, "B")
+    record(log, "C")  # Vượt max_bytes: lượt ghi kế tiếp xoay vòng
+    record(log, "D")
+    assert (tmp_path / "usage.jsonl.1").exists()
+
+    entries, _ = log.tail(position)
+    assert [e["service"] for e in entries] == ["B", "C", "D"]
+
+class FakeScraper:
+    def __init__(self):
+        self.cache = QuoteCache(path=None)
+        self.snapshots = SnapshotStore(root=None)
+        self.router = TierRouter(path=None)
+        self.calls = []
+
+    def search_service_pricing(self, service, zip_code, year, make, model):
+        self.calls.append((service, make))
+        self.cache.set(self.cache.make_key(service, zip_code, year, make, model), {"source": "estimated"})
+
+def test_warmer_ranks_recent_window_incrementally(tmp_path):
+    log = UsageLog(path=str(tmp_path / "usage.jsonl"))
+    warmer = QuoteWarmer(FakeScraper(), usage_log=log, sample_data_path=str(tmp_path / "missing.json"),
+                         top_n=2, rate_per_minute=0, history_limit=4)
+    record(log, "Oil Change", times=3)
+    record(log, "Brake Pad Replacement")
+    assert [q[0] for q in warmer.popular_queries()] == ["Oil Change", "Brake Pad Replacement"]
+
+    # Chỉ 4 lượt gần nhất được tính: Oil Change rơi khỏi cửa sổ
+    record(log, "Spark Plug Replacement", make="Honda", times=3)
+    assert warmer.popular_queries() == [
+        ("Spark Plug Replacement", "10001", "2020", "Honda", "Camry"),
+        ("Brake Pad Replacement", "10001", "2020", "Toyota", "Camry"),
+    ]
+
+def test_run_once_skips_cached_quotes(tmp_path):
+    log = UsageLog(path=str(tmp_path / "usage.jsonl"))
+    scraper = FakeScraper()
+    warmer = QuoteWarmer(scraper, usage_log=log, sample_data_path=str(tmp_path / "missing.json"),
+                         top_n=5, rate_per_minute=0)
+    record(log, "Oil Change", times=2)
+    record(log, "Brake Pad Replacement")
+
+    assert warmer.run_once() == 2
+    assert warmer.run_once() == 0
+    assert len(scraper.calls) == 2
+
+class FakeTime:
+    """Đồng hồ giả cho rate limiter: sleep chỉ tăng thời gian"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self._lock = threading.Lock()
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        with self._lock:
+            self.now += seconds
+
+def test_budget_counts_every_http_request_of_a_quote(tmp_path, monkeypatch, make_scraper, site):
+    clock = FakeTime()
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    sent = []
+
+    def missing_page(method, path, query, headers):
+        sent.append(clock.now)
+        return 404, b"", {}
+
+    site.default = missing_page
+
+    log = UsageLog(path=str(tmp_path / "usage.jsonl"))
+    scraper = make_scraper(site, rate_limiter=budget_limiter(60))
+    warmer = QuoteWarmer(scraper, usage_log=log, sample_data_path=str(tmp_path / "missing.json"),
+                         top_n=2, rate_per_minute=60)
+    record(log, "Oil Change", times=2)
+    record(log, "Brake Pad Replacement")
+
+    assert warmer.run_once() == 2
+    # Mỗi lượt tra gửi nhiều request (probe, estimate); tất cả chia chung 60 request/phút
+    assert len(sent) > 2
+    assert sent[-1] - sent[0] >= len(sent) - 1 - 1e-6
@@ -0,0 +1,214 @@
+"""
+Định tuyến tra giá theo tier nguồn: ghi nhận thành công/thất bại của từng tier mạng (trang dịch vụ,
+trang /estimate) cho từng dịch vụ, bỏ qua tier liên tục thất bại và thỉnh thoảng thử lại tier đó
+(xác suất `epsilon`) để nhận ra khi nó hoạt động trở lại.
+"""
+
+import logging
+import os
+import random
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+
+from quote_cache import DEFAULT_CACHE_PATH
+from service_catalog import normalize_service_name
+
+logger = logging.getLogger(__name__)
+
+# Thống kê nằm trong database SQLite của cache báo giá (bảng tier_stats), dùng chung giữa ứng dụng và
+# worker làm ấm; đặt YOURMECHANIC_TIER_STATS="" để chỉ giữ trong bộ nhớ
+DEFAULT_TIER_STATS_PATH = os.environ.get("YOURMECHANIC_TIER_STATS", DEFAULT_CACHE_PATH)
+
+# Các tier mạng theo thứ tự ưu tiên; ước tính nội bộ luôn là tier cuối, không cần định tuyến
+TIERS = ("service_page", "estimate_page")
+
+class TierRouter:
+    """Thống kê thành công theo (dịch vụ, tier) với trọng số giảm dần theo thời gian.
+
+    Một tier bị coi là "chết" với dịch vụ khi đã thử ít nhất `min_attempts` lần và tỉ lệ thành công
+    (các lần gần đây nặng ký hơn, hệ số `decay`) dưới `min_success_rate`. Tier chết bị bỏ qua,
+    trừ một tỉ lệ `epsilon` lượt tra vẫn thử lại; một lần thành công đủ để tier sống lại.
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_TIER_STATS_PATH, epsilon: float = 0.05,
+                 min_attempts: int = 3, min_success_rate: float = 0.1, decay: float = 0.9,
+                 save_every: int = 50):
+        self.path = path or None
+        self.epsilon = epsilon
+        self.min_attempts = min_attempts
+        self.min_success_rate = min_success_rate
+        self.decay = decay
+        self.save_every = save_every
+
+        self._entries = {}  # service key -> {tier: [successes, failures, attempts]}
+        # Phần chưa ghi xuống database: {tier: [số lần ghi nhận, successes, failures]} đã tính decay, để
+        # cộng dồn vào giá trị trên đĩa (có thể đã được process khác cập nhật) thay vì ghi đè
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._save_lock = threading.RLock()
+        self._unsaved = 0
+        self._stats = {"planned": 0, "skipped": 0, "reprobes": 0}
+
+        self._db = None
+        if self.path:
+            try:
+                self._db = self._connect(self.path)
+            except sqlite3.Error as e:
+                logger.error(f"Cannot open tier stats at {self.path}, using memory only: {e}")
+            else:
+                self.load()
+
+    def _connect(self, path: str) -> sqlite3.Connection:
+        """Mở (và khởi tạo nếu cần) bảng thống kê trong database SQLite"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS tier_stats ("
+            " service TEXT NOT NULL, tier TEXT NOT NULL, successes REAL NOT NULL, failures REAL NOT NULL,"
+            " attempts INTEGER NOT NULL, PRIMARY KEY (service, tier))"
+        )
+        return db
+
+    def _is_dead(self, counts: Optional[List[float]]) -> bool:
+        if counts is None:
+            return False
+        successes, failures, attempts = counts
+        return attempts >= self.min_attempts and successes < self.min_success_rate * (successes + failures)
+
+    def plan(self, service_name: str) -> List[str]:
+        """Các tier mạng nên thử cho dịch vụ, theo thứ tự ưu tiên"""
+        key = normalize_service_name(service_name)
+        with self._lock:
+            entry = self._entries.get(key, {})
+            dead = [tier for tier in TIERS if self._is_dead(entry.get(tier))]
+            self._stats["planned"] += 1
+
+        tiers = []
+        for tier in TIERS:
+            if tier not in dead:
+                tiers.append(tier)
+            elif random.random() < self.epsilon:
+                tiers.append(tier)
+                with self._lock:
+                    self._stats["reprobes"] += 1
+            else:
+                with self._lock:
+                    self._stats["skipped"] += 1
+        return tiers
+
+    def record(self, service_name: str, tier: str, ok: bool):
+        """Ghi nhận kết quả một lần thử tier cho dịch vụ"""
+        key = normalize_service_name(service_name)
+        with self._lock:
+            counts = self._entries.setdefault(key, {}).setdefault(tier, [0.0, 0.0, 0])
+            counts[0] = counts[0] * self.decay + (1 if ok else 0)
+            counts[1] = counts[1] * self.decay + (0 if ok else 1)
+            counts[2] += 1
+            pending = self._pending.setdefault(key, {}).setdefault(tier, [0, 0.0, 0.0])
+            pending[0] += 1
+            pending[1] = pending[1] * self.decay + (1 if ok else 0)
+            pending[2] = pending[2] * self.decay + (0 if ok else 1)
+            self._unsaved += 1
+            due = self._db is not None and self._unsaved >= self.save_every
+            if due:
+                self._unsaved = 0
+        if due:
+            self.save()
+
+    def success_rate(self, service_name: str, tier: str) -> Optional[float]:
+        """Tỉ lệ thành công (có trọng số) của tier cho dịch vụ, None nếu chưa thử lần nào"""
+        with self._lock:
+            counts = self._entries.get(normalize_service_name(service_name), {}).get(tier)
+        if counts is None or not counts[0] + counts[1]:
+            return None
+        return counts[0] / (counts[0] + counts[1])
+
+    def stats(self) -> Dict:
+        """Số lượt định tuyến, số tier bị bỏ qua/thử lại và số cặp (dịch vụ, tier) đang chết"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["services"] = len(self._entries)
+            for tier in TIERS:
+                stats[f"dead_{tier}"] = sum(1 for entry in self._entries.values() if self._is_dead(entry.get(tier)))
+        return stats
+
+    def save(self):
+        """Cộng dồn các lần ghi nhận chưa lưu vào database rồi nạp lại thống kê đã gộp của mọi process"""
+        if self._db is None:
+            return
+        with self._save_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._unsaved = 0
+            rows = [
+                (key, tier, counts[1], counts[2], counts[0], self.decay ** counts[0], counts[1],
+                 self.decay ** counts[0], counts[2], counts[0])
+                for key, entry in pending.items() for tier, counts in entry.items()
+            ]
+            try:
+                self._db.execute("BEGIN IMMEDIATE")
+                try:
+                    self._db.executemany(
+                        "INSERT INTO tier_stats (service, tier, successes, failures, attempts) VALUES (?, ?, ?, ?, ?)"
+                        " ON CONFLICT (service, tier) DO UPDATE SET successes = successes * ? + ?,"
+                        " failures = failures * ? + ?, attempts = attempts + ?",
+                        rows,
+                    )
+                    self._db.execute("COMMIT")
+                except sqlite3.Error:
+                    self._db.execute("ROLLBACK")
+                    raise
+            except sqlite3.Error as e:
+                logger.error(f"Cannot save tier stats to {self.path}: {e}")
+                with self._lock:
+                    for key, entry in pending.items():
+                        for tier, counts in entry.items():
+                            self._merge_pending(key, tier, counts)
+                return
+            self.load()
+
+    def _merge_pending(self, key: str, tier: str, earlier: List[float]):
+        """Đưa lại phần chưa lưu `earlier` (xảy ra trước phần đang chờ hiện tại) vào hàng chờ"""
+        later = self._pending.setdefault(key, {}).setdefault(tier, [0, 0.0, 0.0])
+        factor = self.decay ** later[0]
+        later[1] += earlier[1] * factor
+        later[2] += earlier[2] * factor
+        later[0] += earlier[0]
+
+    def load(self):
+        """Nạp thống kê từ database (các lần ghi nhận chưa lưu của process này vẫn được giữ)"""
+        if self._db is None:
+            return
+        try:
+            with self._save_lock:
+                rows = self._db.execute("SELECT service, tier, successes, failures, attempts FROM tier_stats").fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Cannot load tier stats from {self.path}: {e}")
+            return
+        entries = {}
+        for key, tier, successes, failures, attempts in rows:
+            if tier in TIERS:
+                entries.setdefault(key, {})[tier] = [float(successes), float(failures), int(attempts)]
+        with self._lock:
+            for key, entry in self._pending.items():
+                for tier, (count, successes, failures) in entry.items():
+                    counts = entries.setdefault(key, {}).setdefault(tier, [0.0, 0.0, 0])
+                    factor = self.decay ** count
+                    counts[0] = counts[0] * factor + successes
+                    counts[1] = counts[1] * factor + failures
+                    counts[2] += count
+            self._entries = entries
+
+    def clear(self):
+        """Xóa toàn bộ thống kê đã học (cả trong database)"""
+        with self._lock:
+            self._entries.clear()
+            self._pending.clear()
+            self._unsaved = 0
+        if self._db is not None:
+            with self._save_lock:
+                self._db.execute("DELETE FROM tier_stats")
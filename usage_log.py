@@ -0,0 +1,109 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USAGE_LOG_PATH = os.environ.get("YOURMECHANIC_USAGE_LOG", os.path.join("data", "usage_log.jsonl"))
+DEFAULT_MAX_BYTES = int(os.environ.get("YOURMECHANIC_USAGE_LOG_MAX_BYTES", str(8 * 1024 * 1024)))
+
+# Vị trí đọc tiếp theo trong file: (inode, offset)
+Position = Tuple[Optional[int], int]
+
+class UsageLog:
+    """Nhật ký các lượt tra giá của người dùng (JSON Lines, chỉ ghi nối thêm).
+
+    File được xoay vòng khi vượt `max_bytes`: bản cũ đổi tên thành `<path>.1` (chỉ giữ một bản),
+    nên dung lượng trên đĩa tối đa khoảng 2 x max_bytes. Người đọc dùng `tail()` để chỉ đọc phần mới.
+    """
+
+    def __init__(self, path: str = DEFAULT_USAGE_LOG_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.backup_path = f"{path}.1"
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def record(self, service_name: str, zip_code: str, year: str, make: str, model: str):
+        """Ghi một lượt tra giá"""
+        entry = {
+            "ts": time.time(),
+            "service": service_name,
+            "zip_code": str(zip_code),
+            "year": str(year),
+            "make": make,
+            "model": model,
+        }
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with self._lock:
+                if self.max_bytes and os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+                    os.replace(self.path, self.backup_path)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except OSError as e:
+            logger.error(f"Error writing usage log: {e}")
+
+    def tail(self, position: Optional[Position] = None) -> Tuple[List[Dict], Position]:
+        """Các entry ghi thêm kể từ `position` (trả về từ lần gọi trước) cùng vị trí mới.
+
+        `position=None` đọc từ đầu, gồm cả bản xoay vòng `<path>.1`. Nếu file đã được xoay vòng kể từ
+        lần đọc trước, phần còn lại của file cũ được đọc nốt trước file mới. Dòng hỏng bị bỏ qua;
+        dòng đang ghi dở (chưa có newline) được đọc ở lần sau.
+        """
+        inode, offset = position or (None, 0)
+        entries = []
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            f = None
+
+        try:
+            stat = os.fstat(f.fileno()) if f else None
+            current = stat.st_ino if stat else None
+            if position is None or current != inode:
+                # Lần đọc đầu hoặc file đã được xoay vòng: đọc (nốt) bản cũ trước
+                backup_offset = 0 if position is None else offset
+                if position is None or self._inode(self.backup_path) == inode:
+                    self._read_lines(self.backup_path, backup_offset, entries)
+                offset = 0
+            elif stat is not None and offset > stat.st_size:
+                offset = 0  # File bị cắt ngắn: đọc lại từ đầu
+
+            if f is not None:
+                offset = self._read_from(f, offset, entries)
+        finally:
+            if f is not None:
+                f.close()
+        return entries, (current, offset)
+
+    @staticmethod
+    def _inode(path: str) -> Optional[int]:
+        try:
+            return os.stat(path).st_ino
+        except OSError:
+            return None
+
+    def _read_lines(self, path: str, offset: int, entries: List[Dict]):
+        try:
+            with open(path, "rb") as f:
+                self._read_from(f, offset, entries)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _read_from(f, offset: int, entries: List[Dict]) -> int:
+        """Đọc các dòng hoàn chỉnh từ offset, trả về offset sau dòng cuối cùng đã đọc"""
+        f.seek(offset)
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue
+        return offset + end
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Worker làm ấm cache: tính trước báo giá cho các tổ hợp (dịch vụ, hãng, model, năm, ZIP)
+được tra nhiều nhất, theo nhật ký sử dụng và danh mục trong sample_data.json.
+
+    python warmup.py            # chạy một lượt
+    python warmup.py --loop     # chạy định kỳ (dùng khi khởi động container)
+"""
+
+import argparse
+import json
+import logging
+import os
+import threading
+from collections import Counter, deque
+from typing import List, Optional, Tuple
+
+from rate_limiter import DEFAULT_DEADLINE, RateLimiter
+from scraper_advanced import YourMechanicAdvancedScraper
+from usage_log import UsageLog
+
+logger = logging.getLogger(__name__)
+
+# (service, zip_code, year, make, model)
+Query = Tuple[str, str, str, str, str]
+
+DEFAULT_VEHICLE = ("10001", "2020", "Toyota", "Camry")
+
+def budget_limiter(rate_per_minute: float) -> RateLimiter:
+    """Rate limiter giới hạn số request HTTP mỗi phút (kể cả probe, fallback và retry của một lượt tra)"""
+    rate = rate_per_minute / 60.0
+    # Deadline đủ dài để vài request của cùng một lượt tra xếp hàng chờ token
+    return RateLimiter(rate=rate, burst=1, initial_concurrency=1, max_concurrency=2,
+                       deadline=max(DEFAULT_DEADLINE, 10 / rate))
+
+class QuoteWarmer:
+    """Tính trước báo giá phổ biến qua search_service_pricing trong giới hạn số request mỗi phút.
+
+    Ngân sách tính theo request HTTP (mỗi lượt tra có thể gửi nhiều request): khi không truyền scraper,
+    worker tạo scraper riêng có rate limiter `budget_limiter(rate_per_minute)`.
+    """
+
+    def __init__(self, scraper: Optional[YourMechanicAdvancedScraper] = None, usage_log: Optional[UsageLog] = None,
+                 sample_data_path: str = "sample_data.json", top_n: int = 200,
+                 rate_per_minute: float = 30, interval: float = 3600, history_limit: int = 50000):
+        if scraper is None:
+            limiter = budget_limiter(rate_per_minute) if rate_per_minute > 0 else None
+            scraper = YourMechanicAdvancedScraper(rate_limiter=limiter)
+        self.scraper = scraper
+        self.usage_log = usage_log or UsageLog()
+        self.sample_data_path = sample_data_path
+        self.top_n = top_n
+        self.rate_per_minute = rate_per_minute
+        self.interval = interval
+        self.history_limit = history_limit
+
+        # Cửa sổ `history_limit` lượt tra gần nhất, đếm dần theo phần mới của nhật ký
+        self._history = deque()
+        self._counts = Counter()
+        self._vehicles = Counter()
+        self._log_position = None
+
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample_services(self) -> List[str]:
+        """Dịch vụ trong sample_data.json, theo thứ tự danh mục"""
+        try:
+            with open(self.sample_data_path, encoding="utf-8") as f:
+                categories = json.load(f).get("categories", {})
+        except (OSError, ValueError) as e:
+            logger.warning(f"Cannot read {self.sample_data_path}: {e}")
+            return []
+        services = [service for services in categories.values() for service in services]
+        return list(dict.fromkeys(services))
+
+    def _update_counts(self):
+        """Đọc phần nhật ký ghi thêm từ lượt trước và cập nhật bộ đếm (không đọc lại cả file)"""
+        entries, self._log_position = self.usage_log.tail(self._log_position)
+        for entry in entries:
+            try:
+                query = (entry["service"], entry["zip_code"], entry["year"], entry["make"], entry["model"])
+            except KeyError:
+                continue
+            self._history.append(query)
+            self._counts[query] += 1
+            self._vehicles[query[1:]] += 1
+
+        while len(self._history) > self.history_limit:
+            query = self._history.popleft()
+            self._counts[query] -= 1
+            self._vehicles[query[1:]] -= 1
+        self._counts += Counter()  # Bỏ các tổ hợp đã về 0
+        self._vehicles += Counter()
+
+    def popular_queries(self) -> List[Query]:
+        """Các tổ hợp được tra nhiều nhất, bổ sung bằng dịch vụ mẫu cho các xe phổ biến"""
+        self._update_counts()
+
+        queries = [query for query, _ in self._counts.most_common(self.top_n)]
+        if len(queries) < self.top_n:
+            seen = set(queries)
+            top_vehicles = [vehicle for vehicle, _ in self._vehicles.most_common(3)] or [DEFAULT_VEHICLE]
+            for service in self._sample_services():
+                for vehicle in top_vehicles:
+                    query = (service,) + vehicle
+                    if query not in seen:
+                        seen.add(query)
+                        queries.append(query)
+                if len(queries) >= self.top_n:
+                    break
+        return queries[:self.top_n]
+
+    def run_once(self) -> int:
+        """Một lượt làm ấm; trả về số báo giá đã tính mới"""
+        warmed = 0
+        for service, zip_code, year, make, model in self.popular_queries():
+            if self._stop.is_set():
+                break
+            key = self.scraper.cache.make_key(service, zip_code, year, make, model)
+            if self.scraper.cache.get(key) is not None:
+                continue
+
+            # Ngân sách request do rate limiter của scraper giữ, tính trên từng request HTTP
+            try:
+                self.scraper.search_service_pricing(service, zip_code, year, make, model)
+                warmed += 1
+            except Exception as e:
+                logger.error(f"Error warming {service}: {e}")
+
+        self.scraper.router.save()
+        self.scraper.snapshots.prune()
+        logger.info(f"Warm-up pass done: {warmed} quotes computed")
+        return warmed
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval)
+
+    def start(self) -> "QuoteWarmer":
+        """Chạy làm ấm định kỳ ở thread nền"""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="quote-warmer", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm the quote cache with popular queries")
+    parser.add_argument("--loop", action="store_true", help="Chạy định kỳ thay vì một lượt")
+    parser.add_argument("--top", type=int, default=int(os.environ.get("YOURMECHANIC_WARMUP_TOP", "200")))
+    parser.add_argument("--rate", type=float, default=float(os.environ.get("YOURMECHANIC_WARMUP_RATE", "30")),
+                        help="Số request HTTP tối đa mỗi phút")
+    parser.add_argument("--interval", type=float,
+                        default=float(os.environ.get("YOURMECHANIC_WARMUP_INTERVAL", "3600")),
+                        help="Số giây giữa các lượt khi chạy --loop")
+    args = parser.parse_args()
+
+    warmer = QuoteWarmer(top_n=args.top, rate_per_minute=args.rate, interval=args.interval)
+    if args.loop:
+        warmer._run()
+    else:
+        warmer.run_once()
+
+if __name__ == "__main__":
+    main()